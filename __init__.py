@@ -1,2 +1,17 @@
 # cm_carton_pricing/__init__.py
+from . import controllers
 from . import models
+from . import wizard
+
+from .models.carton_cache_mixin import (
+    CATALOGUE_VERSION_SEQUENCE,
+    CATALOGUE_VERSION_TABLE,
+)
+from .models.carton_pricing_report import SUMMARY_TABLE
+
+
+def uninstall_hook(env):
+    """جدول‌ها و sequenceهایی که خارج از ORM ساخته شده‌اند حذف می‌شوند."""
+    env.cr.execute(f"DROP TABLE IF EXISTS {SUMMARY_TABLE} CASCADE")
+    env.cr.execute(f"DROP TABLE IF EXISTS {CATALOGUE_VERSION_TABLE}")
+    env.cr.execute(f"DROP SEQUENCE IF EXISTS {CATALOGUE_VERSION_SEQUENCE}")
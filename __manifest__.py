@@ -14,7 +14,7 @@
 - ایجاد سفارش فروش از روی استعلام تأییدشده
     """,
 
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.1.0",
     "author": "Hossein Setareh",
     "website": "https://mohammadcarton.com",
     "category": "Manufacturing",
@@ -36,9 +36,22 @@
     # ============================
     "data": [
         "security/ir.model.access.csv",
+        "data/carton_corrugator_data.xml",
+        "data/carton_config_data.xml",
+        "data/carton_job_cron.xml",
+        "data/carton_pricing_report_cron.xml",
         "views/carton_customer_product_views.xml",
         "views/carton_price_inquiry_views.xml",
+        "views/carton_corrugator_views.xml",
+        "views/carton_board_views.xml",
+        "views/carton_perf_log_views.xml",
+        "views/carton_job_views.xml",
+        "views/carton_pricing_report_views.xml",
+        "views/carton_run_plan_views.xml",
+        "wizard/carton_import_wizard_views.xml",
+        "wizard/carton_export_wizard_views.xml",
         "views/menu_views.xml",
+        "report/carton_price_inquiry_report.xml",
     ],
 
     # اگر بعداً data اولیه مثل پارامترهای پیش‌فرض یا activity type اختصاصی داشتی،
@@ -46,4 +59,5 @@
 
     "installable": True,
     "application": True,
+    "uninstall_hook": "uninstall_hook",
 }
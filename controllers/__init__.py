@@ -0,0 +1,3 @@
+# cm_carton_pricing/controllers/__init__.py
+from . import pricing_api
+from . import quote_export
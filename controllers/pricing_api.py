@@ -0,0 +1,28 @@
+# cm_carton_pricing/controllers/pricing_api.py
+from odoo import http
+from odoo.http import request
+
+
+class CartonPricingApi(http.Controller):
+    """
+    تخمین قیمت فوری برای وب‌سایت و پرتال فروش.
+
+    فقط‌خواندنی: روی کرسر readonly اجرا می‌شود، رکورد استعلام نمی‌سازد و
+    قیمت ورق و عرض‌های کروگیتور از ormcache خوانده می‌شوند. پاسخ فقط قیمت
+    فروش و چیدمان را دارد (``_estimate_price_public``)، نه داده‌های هزینه.
+
+    نمونه بدنه (JSON-RPC):
+        {"params": {"carton_type": "normal", "length_cm": 40, "width_cm": 30,
+                    "height_cm": 25, "layer_count": "5", "flute_step": "BC",
+                    "quantity": 3000}}
+    """
+
+    @http.route(
+        "/cm_carton_pricing/api/estimate",
+        type="json",
+        auth="public",
+        methods=["POST"],
+        readonly=True,
+    )
+    def estimate(self, **params):
+        return request.env["cm.carton.price_inquiry"].sudo()._estimate_price_public(params)
@@ -0,0 +1,48 @@
+# cm_carton_pricing/controllers/quote_export.py
+import tempfile
+
+from werkzeug.exceptions import NotFound
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.http import Response, content_disposition, request
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv;charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class CartonQuoteExport(http.Controller):
+    """
+    دانلود خروجی ``cm.carton.export.wizard``.
+
+    فایل داخل همین درخواست در یک فایل موقت (بدون نام روی دیسک) نوشته و
+    به صورت جریانی ارسال می‌شود؛ حافظه به تعداد استعلام‌ها وابسته نیست.
+    """
+
+    @http.route(
+        "/cm_carton_pricing/export/<int:wizard_id>",
+        type="http",
+        auth="user",
+        methods=["GET"],
+        readonly=True,
+    )
+    def export(self, wizard_id):
+        wizard = request.env["cm.carton.export.wizard"].browse(wizard_id).exists()
+        if not wizard or wizard.create_uid != request.env.user:
+            raise NotFound()
+
+        fileobj = tempfile.TemporaryFile()
+        wizard._write_export(fileobj)
+        size = fileobj.tell()
+        fileobj.seek(0)
+        return Response(
+            wrap_file(request.httprequest.environ, fileobj),
+            headers=[
+                ("Content-Type", EXPORT_MIMETYPES[wizard.file_format]),
+                ("Content-Length", size),
+                ("Content-Disposition", content_disposition(wizard._export_filename())),
+            ],
+            direct_passthrough=True,
+        )
@@ -0,0 +1,14 @@
+# cm_carton_pricing/engine/__init__.py
+"""
+هسته‌های محاسباتی مستقل از ORM.
+
+ماژول‌های این پکیج هیچ وابستگی‌ای به odoo ندارند تا بتوان آن‌ها را
+در ورکرها، اسکریپت‌ها و محاسبات what-if بدون رجیستری اجرا کرد.
+"""
+from . import cache
+from . import nesting
+from . import board
+from . import die_index
+from . import pricing
+from . import batch
+from . import planning
@@ -0,0 +1,281 @@
+# cm_carton_pricing/engine/batch.py
+"""
+قیمت‌گذاری دسته‌ای و برداری (NumPy) برای تعداد زیادی استعلام.
+
+منطق دقیقاً همان ``engine.pricing`` است، فقط به جای حلقه روی رکوردها
+روی آرایه‌ها اجرا می‌شود. اگر NumPy نصب نباشد، به حلقه‌ی ساده روی
+``pricing.price`` برمی‌گردد.
+"""
+from dataclasses import replace
+
+from . import pricing
+from .cache import RESULT_CACHE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy اختیاری است
+    np = None
+
+
+def price_many(inputs, cache=RESULT_CACHE):
+    """
+    قیمت‌گذاری لیستی از ``PricingInput``.
+
+    خروجی: (results, errors)
+      - results: لیستی هم‌طول ورودی از ``PricingResult`` (برای ردیف‌های خطادار None)
+      - errors: dict از اندیس ردیف به کد خطای ``PricingError``
+    """
+    inputs = list(inputs)
+    if not inputs:
+        return [], {}
+
+    # نتایج موجود در کش مشترک دوباره محاسبه نمی‌شوند
+    keys = [pricing.fingerprint(inp) for inp in inputs]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, res in enumerate(results) if res is None]
+    if not missing:
+        return results, {}
+
+    compute = _price_many_python if np is None else _price_many_numpy
+    computed, computed_errors = compute([inputs[i] for i in missing])
+
+    errors = {}
+    for j, i in enumerate(missing):
+        if j in computed_errors:
+            errors[i] = computed_errors[j]
+            continue
+        results[i] = computed[j]
+        cache.put(keys[i], computed[j])
+    return results, errors
+
+
+def _price_many_python(inputs):
+    results, errors = [], {}
+    for i, inp in enumerate(inputs):
+        try:
+            results.append(pricing.price(inp))
+        except pricing.PricingError as e:
+            results.append(None)
+            errors[i] = e.code
+    return results, errors
+
+
+def _column(inputs, getter, dtype=float):
+    return np.fromiter(
+        (getter(inp) or 0 for inp in inputs), dtype=dtype, count=len(inputs)
+    )
+
+
+def _price_arrays(inputs):
+    """
+    بخش برداری محاسبه: ابعاد خوابیده، مایه‌کاری و قیمت‌ها به صورت آرایه.
+    خروجی: (dict آرایه‌ها، errors)
+    """
+    n = len(inputs)
+    errors = {}
+
+    ctype = np.array([inp.carton_type or "normal" for inp in inputs], dtype=object)
+    is_die_type = (ctype == "diecut") | (ctype == "laminated")
+    is_normal = ctype == "normal"
+    is_sheet = ctype == "sheet"
+    is_other = ~(is_die_type | is_normal | is_sheet)
+
+    qty = _column(inputs, lambda i: i.quantity)
+    L = _column(inputs, lambda i: i.length_cm) * 10.0
+    W = _column(inputs, lambda i: i.width_cm) * 10.0
+    H = _column(inputs, lambda i: i.height_cm) * 10.0
+
+    has_die = np.array([bool(i.die and i.die.has_blade_dims) for i in inputs])
+    blade_L = _column(inputs, lambda i: i.die.blade_length_mm if i.die else 0.0)
+    blade_W = _column(inputs, lambda i: i.die.blade_width_mm if i.die else 0.0)
+    cavities = _column(
+        inputs, lambda i: (i.die.cavities_per_sheet or 1) if i.die else 1
+    )
+    die_book_value = _column(inputs, lambda i: i.die.book_value if i.die else 0.0)
+    die_cost_per_sheet = _column(
+        inputs, lambda i: i.die.cost_per_sheet if i.die else 0.0
+    )
+    blank_L = _column(inputs, lambda i: i.die_length_mm)
+    blank_W = _column(inputs, lambda i: i.die_width_mm)
+    is_full = np.array([i.flow_mode == "full" for i in inputs])
+
+    has_lwh = (L > 0) & (W > 0) & (H > 0)
+    has_lw = (L > 0) & (W > 0)
+    has_blank = (blank_L > 0) & (blank_W > 0)
+    margin2 = 2 * _column(inputs, lambda i: i.side_margin_mm)
+    glue = _column(inputs, lambda i: i.glue_allowance_mm)
+
+    # ----------------- ابعاد خوابیده -----------------
+    flat_L = np.zeros(n)
+    flat_W = np.zeros(n)
+
+    die_base_L = np.where(has_die, blade_L, np.where(has_blank, blank_L, L))
+    die_base_W = np.where(has_die, blade_W, np.where(has_blank, blank_W, W))
+    die_ok = is_die_type & (has_die | has_blank | has_lwh)
+    flat_L = np.where(die_ok, die_base_L + margin2, flat_L)
+    flat_W = np.where(die_ok, die_base_W + margin2, flat_W)
+
+    for i in np.nonzero(is_die_type & ~has_die & ~has_blank & is_full)[0]:
+        errors[int(i)] = "die_dims_required"
+
+    normal_ok = is_normal & has_lwh
+    flat_L = np.where(
+        normal_ok, 2 * (L + W) + glue + margin2, flat_L
+    )
+    flat_W = np.where(normal_ok, H + (W / 2 + 10.0) * 2 + margin2, flat_W)
+
+    sheet_ok = is_sheet & has_lw
+    flat_L = np.where(sheet_ok, L + margin2, flat_L)
+    flat_W = np.where(sheet_ok, W + margin2, flat_W)
+
+    other_ok = is_other & has_lwh
+    flat_L = np.where(other_ok, 2 * (L + W) + margin2, flat_L)
+    flat_W = np.where(other_ok, H + W + margin2, flat_W)
+
+    # ----------------- مایه‌کاری -----------------
+    paper = _column(inputs, lambda i: i.paper_price_per_m2)
+    lamination = _column(inputs, lambda i: i.lamination_price_per_m2)
+    area_m2 = (flat_W / 1000.0) * (flat_L / 1000.0)
+
+    sheets = np.ceil(qty / np.where(cavities > 0, cavities, 1.0))
+    die_area = (blade_L / 1000.0) * (blade_W / 1000.0) * sheets
+    # همان DieSpec.charge_for: استهلاک هر ورق تا سقف ارزش دفتری
+    book_value = np.maximum(die_book_value, 0.0)
+    die_charge = np.where(
+        die_cost_per_sheet > 0,
+        np.minimum(book_value, sheets * die_cost_per_sheet),
+        book_value,
+    )
+
+    material = np.where(is_normal | is_sheet, area_m2 * qty * paper, 0.0)
+    material = np.where(ctype == "diecut", die_area * paper + die_charge, material)
+    material = np.where(
+        ctype == "laminated",
+        die_area * paper + die_area * lamination + die_charge,
+        material,
+    )
+    overhead_rate = np.array(
+        [pricing.OVERHEAD_RATE.get(t, 0.0) for t in ctype], dtype=float
+    )
+    overhead = material * overhead_rate
+
+    for i in np.nonzero((ctype == "diecut") & ~has_die)[0]:
+        errors.setdefault(int(i), "diecut_die_required")
+    for i in np.nonzero((ctype == "laminated") & ~has_die)[0]:
+        errors.setdefault(int(i), "laminated_die_required")
+
+    # ----------------- قیمت نهایی -----------------
+    fixed = (
+        np.where(is_die_type, 0.0, _column(inputs, lambda i: i.die_cost))
+        + _column(inputs, lambda i: i.cliche_cost)
+        + qty * _column(inputs, lambda i: i.print_cost_per_1000) / 1000.0
+        + _column(inputs, lambda i: i.design_cost)
+        + _column(inputs, lambda i: i.punch_cost_total)
+        + _column(inputs, lambda i: i.pallet_wrap_cost_total)
+        + _column(inputs, lambda i: i.shipping_cost)
+    )
+    has_qty = qty > 0
+    base_cost = np.where(
+        has_qty, (material + overhead + fixed) / np.where(has_qty, qty, 1.0), 0.0
+    )
+    margin_cash = _column(inputs, lambda i: i.margin_cash_percent)
+    margin_credit = _column(inputs, lambda i: i.margin_credit_percent)
+    price_cash = base_cost * (1.0 + margin_cash / 100.0)
+    price_credit = base_cost * (1.0 + margin_credit / 100.0)
+    is_cash = np.array([i.payment_type == "cash" for i in inputs])
+    unit_with_tax = np.where(is_cash, price_cash, price_credit) * (
+        1.0 + _column(inputs, lambda i: i.tax_percent) / 100.0
+    )
+    total_with_tax = unit_with_tax * qty
+
+    arrays = {
+        "flat_L": flat_L,
+        "flat_W": flat_W,
+        "material": material,
+        "overhead": overhead,
+        "has_qty": has_qty,
+        "base_cost": base_cost,
+        "price_cash": price_cash,
+        "price_credit": price_credit,
+        "unit_with_tax": unit_with_tax,
+        "total_with_tax": total_with_tax,
+    }
+    return arrays, errors
+
+
+def _breakdown(arrays, i):
+    if not arrays["has_qty"][i]:
+        return None
+    return pricing.PriceBreakdown(
+        base_cost_per_carton=float(arrays["base_cost"][i]),
+        sale_price_cash=float(arrays["price_cash"][i]),
+        sale_price_credit=float(arrays["price_credit"][i]),
+        unit_price_with_tax=float(arrays["unit_with_tax"][i]),
+        total_price_with_tax=float(arrays["total_with_tax"][i]),
+    )
+
+
+def _price_many_numpy(inputs):
+    arrays, errors = _price_arrays(inputs)
+    flat_L, flat_W = arrays["flat_L"], arrays["flat_W"]
+
+    results = []
+    for i in range(len(inputs)):
+        if i in errors:
+            results.append(None)
+            continue
+
+        # چیدمان روی عرض‌ها با کش ابعاد در engine/nesting.py انجام می‌شود
+        suggestions = pricing.suggestions_for(
+            inputs[i], float(flat_L[i]), float(flat_W[i])
+        )
+        industrial_width, corrugator_id = pricing.select_width(
+            inputs[i], suggestions
+        )
+
+        results.append(
+            pricing.PricingResult(
+                flat_length_mm=float(flat_L[i]),
+                flat_width_mm=float(flat_W[i]),
+                suggestions=suggestions,
+                industrial_width_cm=industrial_width,
+                material_cost_total=float(arrays["material"][i]),
+                overhead_cost_total=float(arrays["overhead"][i]),
+                prices=_breakdown(arrays, i),
+                suggestion_key=pricing.suggestion_key(
+                    inputs[i], float(flat_L[i]), float(flat_W[i])
+                ),
+                corrugator_id=corrugator_id,
+                input_fingerprint=pricing.fingerprint(
+                    pricing.settle(inputs[i], industrial_width, corrugator_id)
+                ),
+            )
+        )
+    return results, errors
+
+
+def price_ladder(inp, quantities):
+    """
+    پلکان قیمت: قیمت واحد و کل یک استعلام برای چند تیراژ در یک گذر برداری.
+
+    خروجی: لیستی از ``PriceBreakdown`` هم‌ترتیب ``quantities``.
+    در صورت ورودی ناقص (مثلاً نبود قالب دایکاتی) ``PricingError`` می‌دهد.
+    """
+    inputs = [replace(inp, quantity=int(q)) for q in quantities]
+    if not inputs:
+        return []
+
+    if np is None:
+        ladder = []
+        for item in inputs:
+            flat_length_mm, flat_width_mm = pricing.compute_flat_dimensions(item)
+            material, overhead = pricing.compute_costs(
+                item, flat_length_mm, flat_width_mm
+            )
+            ladder.append(pricing.compute_prices(item, material, overhead))
+        return ladder
+
+    arrays, errors = _price_arrays(inputs)
+    if errors:
+        raise pricing.PricingError(next(iter(errors.values())))
+    return [_breakdown(arrays, i) for i in range(len(inputs))]
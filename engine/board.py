@@ -0,0 +1,50 @@
+# cm_carton_pricing/engine/board.py
+"""
+قیمت هر مترمربع ورق از روی ساختار لایه‌ها (BOM کاغذ).
+
+قیمت هر لایه = گرماژ (kg/m²) × ضریب مصرف فلوت × قیمت هر کیلو کاغذ؛
+قیمت ورق مجموع لایه‌هاست.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+
+# ضریب مصرف (take-up) کاغذ فلوت در هر پروفیل
+FLUTE_TAKE_UP = {
+    "B": 1.32,
+    "C": 1.43,
+    "E": 1.27,
+}
+
+
+@dataclass(frozen=True)
+class BoardLayer:
+    """یک لایه ورق: گرماژ کاغذ، ضریب مصرف و قیمت هر کیلو."""
+
+    grammage_gsm: float
+    price_per_kg: float
+    take_up_factor: float = 1.0
+
+
+def take_up_for(flute_profile):
+    """ضریب مصرف یک لایه؛ لاینرها ۱ هستند."""
+    return FLUTE_TAKE_UP.get(flute_profile or "", 1.0)
+
+
+def price_per_m2(layers):
+    return sum(
+        (layer.grammage_gsm / 1000.0) * layer.take_up_factor * layer.price_per_kg
+        for layer in layers
+    )
+
+
+def price_on(price_history, date):
+    """
+    قیمت معتبر در یک تاریخ از تاریخچه مرتب‌شده [(date_from, price), ...].
+    تاریخ‌ها رشته ISO هستند؛ قبل از اولین تاریخ، صفر برمی‌گردد.
+    """
+    if not price_history:
+        return 0.0
+    idx = bisect_right([d for d, _p in price_history], date)
+    if idx == 0:
+        return 0.0
+    return price_history[idx - 1][1]
@@ -0,0 +1,48 @@
+# cm_carton_pricing/engine/cache.py
+"""
+کش LRU ساده و thread-safe برای نتایج موتور قیمت‌گذاری.
+
+کلید کش اثر انگشت ``PricingInput`` است؛ چون ورودی همه‌ی داده‌های لازم را
+دارد، نتیجه برای یک اثر انگشت همیشه یکسان است و نیازی به باطل‌سازی نیست.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+# کش مشترک نتایج قیمت‌گذاری در هر پروسس
+RESULT_CACHE = LRUCache(maxsize=8192)
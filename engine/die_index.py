@@ -0,0 +1,65 @@
+# cm_carton_pricing/engine/die_index.py
+"""
+ایندکس ابعادی قالب‌ها برای پیدا کردن قالب موجود با ابعاد نزدیک.
+
+قالب‌ها بر اساس طول تیغه به تیغ مرتب نگه داشته می‌شوند؛ برای هر جستجو
+فقط بازه‌ی طول [L - tol, L + tol] با bisect جدا و در همان بازه عرض و
+فاصله بررسی می‌شود. با ده‌ها هزار قالب، هر جستجو زیر یک میلی‌ثانیه است.
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from math import hypot
+
+
+@dataclass(frozen=True)
+class DieEntry:
+    die_id: int
+    blade_length_mm: float
+    blade_width_mm: float
+
+
+@dataclass(frozen=True)
+class DieMatch:
+    die_id: int
+    # فاصله اقلیدسی ابعاد (mm)
+    distance_mm: float
+    length_diff_mm: float
+    width_diff_mm: float
+
+
+class DieIndex:
+    def __init__(self, entries):
+        self._entries = tuple(
+            sorted(entries, key=lambda e: (e.blade_length_mm, e.blade_width_mm))
+        )
+        self._lengths = [e.blade_length_mm for e in self._entries]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def nearest(self, length_mm, width_mm, tolerance_mm, limit=10):
+        """
+        قالب‌هایی که طول و عرضشان هر کدام حداکثر ``tolerance_mm`` با ابعاد
+        خواسته‌شده فاصله دارد، به ترتیب نزدیکی.
+        """
+        if length_mm <= 0 or width_mm <= 0 or tolerance_mm < 0:
+            return []
+
+        lo = bisect_left(self._lengths, length_mm - tolerance_mm)
+        hi = bisect_right(self._lengths, length_mm + tolerance_mm)
+        matches = []
+        for entry in self._entries[lo:hi]:
+            width_diff = entry.blade_width_mm - width_mm
+            if abs(width_diff) > tolerance_mm:
+                continue
+            length_diff = entry.blade_length_mm - length_mm
+            matches.append(
+                DieMatch(
+                    die_id=entry.die_id,
+                    distance_mm=hypot(length_diff, width_diff),
+                    length_diff_mm=length_diff,
+                    width_diff_mm=width_diff,
+                )
+            )
+        matches.sort(key=lambda m: (m.distance_mm, m.die_id))
+        return matches[:limit] if limit else matches
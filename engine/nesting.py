@@ -0,0 +1,187 @@
+# cm_carton_pricing/engine/nesting.py
+"""
+چیدمان بلنک‌ها روی عرض صنعتی کروگیتور (nesting).
+
+برای هر عرض صنعتی همه‌ی ترکیب‌های ممکن بررسی می‌شود:
+  - جهت عادی: عرض خوابیده در عرض ورق، طول خوابیده در جهت حرکت دستگاه
+  - جهت چرخیده: برعکس حالت عادی
+  - ترکیبی: چند لاین عادی و چند لاین چرخیده کنار هم (دو تیغه برش)
+و اگر قالب چندضربی باشد، هر واحد چیدمان ``cavities`` کارتن می‌دهد.
+
+چیدمان‌های هر عرض فقط به ابعاد بستگی دارند و با ``lru_cache`` روی
+تاپل ابعاد نگه داشته می‌شوند؛ تیراژ فقط طول کل را عوض می‌کند.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from math import ceil, floor
+
+# دقت گرد کردن ابعاد برای کلید کش (cm)
+_KEY_PRECISION = 2
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class Layout:
+    """یک چیدمان روی یک عرض صنعتی (مستقل از تیراژ)."""
+
+    industrial_width_cm: float
+    normal_count: int
+    rotated_count: int
+    waste_cm: float
+    waste_percent: float
+    # تعداد واحد چیدمان در هر سانتی‌متر طول
+    units_per_cm: float
+
+    @property
+    def orientation(self):
+        if self.normal_count and self.rotated_count:
+            return "mixed"
+        return "rotated" if self.rotated_count else "normal"
+
+    @property
+    def units_per_row(self):
+        return self.normal_count + self.rotated_count
+
+
+def _candidate_layouts(width_cm, usable, flat_w_cm, flat_l_cm, allow_rotation):
+    max_rotated = floor(usable / flat_l_cm + _EPS) if allow_rotation else 0
+    for rotated in range(max_rotated + 1):
+        rest = usable - rotated * flat_l_cm
+        normal = floor(rest / flat_w_cm + _EPS)
+        if normal + rotated <= 0:
+            continue
+        waste = usable - normal * flat_w_cm - rotated * flat_l_cm
+        yield Layout(
+            industrial_width_cm=width_cm,
+            normal_count=normal,
+            rotated_count=rotated,
+            waste_cm=waste,
+            waste_percent=(waste / width_cm) * 100.0,
+            units_per_cm=normal / flat_l_cm + rotated / flat_w_cm,
+        )
+
+
+@lru_cache(maxsize=4096)
+def best_layouts(
+    flat_w_cm, flat_l_cm, industrial_widths_cm, side_margin_cm, allow_rotation
+):
+    """
+    بهترین چیدمان هر عرض صنعتی: بیشترین تولید در واحد طول، سپس کمترین ضایعات.
+    خروجی: تاپلی از ``Layout`` (عرض‌هایی که هیچ بلنکی در آن‌ها جا نمی‌شود حذف می‌شوند).
+    """
+    if flat_w_cm <= 0 or flat_l_cm <= 0:
+        return ()
+
+    layouts = []
+    for width_cm in industrial_widths_cm:
+        usable = width_cm - 2 * side_margin_cm
+        if usable <= 0:
+            continue
+        candidates = list(
+            _candidate_layouts(width_cm, usable, flat_w_cm, flat_l_cm, allow_rotation)
+        )
+        if candidates:
+            layouts.append(
+                max(candidates, key=lambda c: (c.units_per_cm, -c.waste_cm))
+            )
+    return tuple(layouts)
+
+
+def run_length_cm(layout, units, flat_w_cm, flat_l_cm):
+    """
+    کمترین طول کروگیتور که ``units`` واحد را تولید کند.
+    هر لاین فقط در نقاط برش کامل (مضرب طول خودش) واحد تحویل می‌دهد.
+    """
+    if units <= 0:
+        return 0.0
+
+    def produced(length):
+        return layout.normal_count * floor(
+            length / flat_l_cm + _EPS
+        ) + layout.rotated_count * floor(length / flat_w_cm + _EPS)
+
+    length = units / layout.units_per_cm
+    while produced(length) < units:
+        steps = []
+        if layout.normal_count:
+            steps.append((floor(length / flat_l_cm + _EPS) + 1) * flat_l_cm)
+        if layout.rotated_count:
+            steps.append((floor(length / flat_w_cm + _EPS) + 1) * flat_w_cm)
+        length = min(steps)
+    return length
+
+
+def pareto_front(
+    items, waste=lambda s: s.waste_percent, length=lambda s: s.total_length_cm
+):
+    """اعضای جبهه پارتو (ضایعات کمتر / طول کمتر)."""
+    front = []
+    for a in items:
+        dominated = any(
+            waste(b) <= waste(a)
+            and length(b) <= length(a)
+            and (waste(b) < waste(a) or length(b) < length(a))
+            for b in items
+        )
+        if not dominated:
+            front.append(a)
+    return front
+
+
+def nest(
+    flat_width_mm,
+    flat_length_mm,
+    quantity,
+    industrial_widths_cm,
+    side_margin_cm,
+    cavities=1,
+    allow_rotation=True,
+):
+    """
+    چیدمان بهینه هر عرض صنعتی برای یک تیراژ.
+
+    خروجی: لیستی از dict با کلیدهای
+    industrial_width_cm, layout, carton_per_row, total_length_cm, board_area_m2
+    و is_pareto_optimal.
+    """
+    flat_w_cm = round(flat_width_mm / 10.0, _KEY_PRECISION)
+    flat_l_cm = round(flat_length_mm / 10.0, _KEY_PRECISION)
+    layouts = best_layouts(
+        flat_w_cm,
+        flat_l_cm,
+        tuple(industrial_widths_cm),
+        side_margin_cm,
+        bool(allow_rotation),
+    )
+    if not layouts:
+        return []
+
+    cavities = max(int(cavities or 1), 1)
+    units = ceil((quantity or 0) / cavities)
+
+    rows = []
+    for layout in layouts:
+        length = run_length_cm(layout, units, flat_w_cm, flat_l_cm)
+        rows.append(
+            {
+                "industrial_width_cm": layout.industrial_width_cm,
+                "layout": layout,
+                "carton_per_row": layout.units_per_row * cavities,
+                "total_length_cm": length,
+                "waste_percent": layout.waste_percent,
+                "board_area_m2": layout.industrial_width_cm * length / 10000.0,
+            }
+        )
+
+    front = {
+        id(r)
+        for r in pareto_front(
+            rows,
+            waste=lambda r: r["waste_percent"],
+            length=lambda r: r["total_length_cm"],
+        )
+    }
+    for r in rows:
+        r["is_pareto_optimal"] = id(r) in front
+    return rows
@@ -0,0 +1,294 @@
+# cm_carton_pricing/engine/planning.py
+"""
+برنامه‌ریزی اجرای مشترک کروگیتور برای چند سفارش هم‌گرید.
+
+سفارش‌های یک گرید ورق (تعداد لایه / گام فلوت) کنار هم روی عرض صنعتی
+چیده می‌شوند: هر «الگو» چند لاین است (حداکثر ``max_orders`` سفارش متفاوت،
+هرکدام یک یا چند لاین هم‌عرض) و تا تمام شدن یکی از سفارش‌های آن اجرا
+می‌شود. الگوی هر مرحله به روش حریصانه انتخاب می‌شود:
+
+  - سفارش لنگر: عریض‌ترین سفارش باقیمانده (سخت‌ترین برای جا دادن)
+  - برای هر عرض صنعتی و هر تعداد لاین لنگر، بهترین پرکردن باقیمانده‌ی عرض
+    با سفارش‌های دیگر (برنامه‌ریزی پویا روی عرض باقیمانده)
+  - کمترین درصد دورریز، و در تساوی عرض بیشتر
+
+نتیجه‌ی پرکردن هر عرض باقیمانده تا وقتی مجموعه‌ی سفارش‌های باز تغییر نکند
+در کش نگه داشته می‌شود؛ عرض‌ها با دقت ۰٫۱ میلی‌متر به عدد صحیح تبدیل
+می‌شوند تا کلیدهای کش دقیق باشند. چرخاندن بلنک در نظر گرفته نمی‌شود
+(عرض خوابیده همیشه در عرض ورق).
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from math import ceil, floor
+
+from .pricing import DEFAULT_MACHINE
+
+# حداکثر لاین‌های یک سفارش در یک الگو (محدودیت تیغه‌های اسلیتر)
+MAX_LANES = 6
+
+# حداکثر سفارش‌های متفاوت کنار هم در یک الگو
+MAX_ORDERS = 2
+
+# واحد داخلی عرض: ۰٫۱ میلی‌متر
+_SCALE = 10
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class RunJob:
+    """یک سفارش: ابعاد خوابیده (mm) و تعداد بلنک لازم."""
+
+    job_id: int
+    flat_width_mm: float
+    flat_length_mm: float
+    blank_count: int
+
+
+@dataclass(frozen=True)
+class RunPattern:
+    """یک مرحله‌ی اجرا: چند لاین کنار هم روی یک عرض صنعتی."""
+
+    corrugator_id: int
+    industrial_width_cm: float
+    # تاپل (job_id، تعداد لاین)
+    lanes: tuple
+    used_width_mm: float
+    run_length_m: float
+
+    @property
+    def trim_mm(self):
+        return self.industrial_width_cm * 10.0 - self.used_width_mm
+
+    @property
+    def waste_m2(self):
+        return self.trim_mm / 1000.0 * self.run_length_m
+
+    @property
+    def waste_percent(self):
+        width_mm = self.industrial_width_cm * 10.0
+        return self.trim_mm / width_mm * 100.0 if width_mm else 0.0
+
+
+@dataclass(frozen=True)
+class JobPlan:
+    """سهم یک سفارش از برنامه‌ی اجرا."""
+
+    job_id: int
+    run_length_m: float
+    board_area_m2: float
+    waste_m2: float
+
+    @property
+    def waste_percent(self):
+        total = self.board_area_m2 + self.waste_m2
+        return self.waste_m2 / total * 100.0 if total else 0.0
+
+
+@dataclass(frozen=True)
+class RunPlan:
+    patterns: tuple = ()
+    jobs: tuple = ()
+    # سفارش‌هایی که روی هیچ عرض صنعتی جا نمی‌شوند
+    unplanned_job_ids: tuple = ()
+
+    @property
+    def run_length_m(self):
+        return sum(p.run_length_m for p in self.patterns)
+
+    @property
+    def waste_m2(self):
+        return sum(p.waste_m2 for p in self.patterns)
+
+    @property
+    def waste_percent(self):
+        total = sum(
+            p.industrial_width_cm / 100.0 * p.run_length_m for p in self.patterns
+        )
+        return self.waste_m2 / total * 100.0 if total else 0.0
+
+
+class _Planner:
+    def __init__(self, jobs, machines, max_lanes, max_orders):
+        self.max_lanes = max_lanes
+        self.max_orders = max_orders
+        # (corrugator_id، عرض صنعتی cm، عرض کل و عرض قابل استفاده به واحد داخلی)
+        self.widths = sorted(
+            {
+                (
+                    machine.machine_id,
+                    float(width_cm),
+                    round(width_cm * 10.0 * _SCALE),
+                    floor((width_cm - 2 * machine.side_margin_cm) * 10.0 * _SCALE),
+                )
+                for machine in machines
+                for width_cm in machine.industrial_widths_cm
+            },
+            key=lambda w: (w[1], w[0]),
+        )
+        max_usable = max((w[3] for w in self.widths), default=0)
+
+        self.jobs = {}
+        self.remaining = {}
+        self.unplanned = []
+        for job in jobs:
+            width = ceil(job.flat_width_mm * _SCALE)
+            if job.blank_count <= 0 or job.flat_length_mm <= 0 or width <= 0:
+                continue
+            if width > max_usable:
+                self.unplanned.append(job.job_id)
+                continue
+            self.jobs[job.job_id] = (job, width)
+            # تعداد بلنک باقیمانده
+            self.remaining[job.job_id] = job.blank_count
+        self._build_options()
+
+    def _build_options(self):
+        """گزینه‌های (عرض، job_id، لاین) همه‌ی سفارش‌ها، مرتب بر اساس عرض."""
+        self.options = sorted(
+            (lanes * width, job_id, lanes)
+            for job_id, (__, width) in self.jobs.items()
+            for lanes in range(1, self.max_lanes + 1)
+        )
+        self.option_widths = [option[0] for option in self.options]
+        self._fill_cache = {}
+        # job_id ← کلیدهای کشی که آن سفارش در نتیجه‌شان آمده است
+        self._cache_keys_by_job = {}
+
+    def _remove_jobs(self, finished):
+        """
+        حذف سفارش‌های تمام‌شده از گزینه‌ها (ترتیب حفظ می‌شود).
+
+        حذف یک سفارش، پرکردنی را که شامل آن نیست بهتر نمی‌کند؛ پس فقط
+        نتیجه‌های کش‌شده‌ای که سفارش تمام‌شده در آن‌ها بوده دور ریخته می‌شوند.
+        """
+        finished = set(finished)
+        self.options = [o for o in self.options if o[1] not in finished]
+        self.option_widths = [option[0] for option in self.options]
+        for job_id in finished:
+            for key in self._cache_keys_by_job.pop(job_id, ()):
+                self._fill_cache.pop(key, None)
+
+    def _best_fill(self, capacity, depth, exclude, cap_width):
+        """
+        بیشترین عرض قابل پرکردن ``capacity`` با حداکثر ``depth`` سفارش
+        خارج از ``exclude``؛ گزینه‌ها حداکثر ``cap_width`` عرض دارند تا
+        هر ترکیب فقط یک‌بار (به ترتیب نزولی) شمرده شود.
+        خروجی: (عرض پرشده، تاپل (job_id، لاین))
+        """
+        if depth <= 0 or capacity <= 0:
+            return 0, ()
+        limit = min(capacity, cap_width)
+        key = (limit, capacity, depth, exclude)
+        cached = self._fill_cache.get(key)
+        if cached is not None:
+            return cached
+
+        best = (0, ())
+        for index in range(bisect_right(self.option_widths, limit) - 1, -1, -1):
+            width, job_id, lanes = self.options[index]
+            # حتی با بهترین حالت (همه‌ی سفارش‌ها هم‌عرض این گزینه) بهتر نمی‌شود
+            if width * depth <= best[0]:
+                break
+            if job_id in exclude:
+                continue
+            sub_width, sub_lanes = self._best_fill(
+                capacity - width, depth - 1, exclude | {job_id}, width
+            )
+            if width + sub_width > best[0]:
+                best = (width + sub_width, ((job_id, lanes),) + sub_lanes)
+                if best[0] == capacity:
+                    break
+
+        self._fill_cache[key] = best
+        for job_id, __ in best[1]:
+            self._cache_keys_by_job.setdefault(job_id, []).append(key)
+        return best
+
+    def _next_pattern(self):
+        # لنگر: عریض‌ترین سفارش باز، در تساوی بیشترین طول باقیمانده
+        anchor_id = max(
+            self.remaining,
+            key=lambda job_id: (self.jobs[job_id][1], self._lane_length_mm(job_id, 1)),
+        )
+        anchor_width = self.jobs[anchor_id][1]
+        exclude = frozenset({anchor_id})
+
+        best = None
+        for corrugator_id, width_cm, full, usable in self.widths:
+            for lanes in range(1, self.max_lanes + 1):
+                used = lanes * anchor_width
+                if used > usable:
+                    break
+                fill, others = self._best_fill(
+                    usable - used, self.max_orders - 1, exclude, usable
+                )
+                trim_ratio = (full - used - fill) / full
+                candidate = (trim_ratio, -full, corrugator_id, width_cm)
+                if best is None or candidate < best[0]:
+                    best = (candidate, ((anchor_id, lanes),) + others, used + fill)
+        (__, __, corrugator_id, width_cm), lanes, used = best
+        return corrugator_id, width_cm, lanes, used
+
+    def _lane_length_mm(self, job_id, lanes):
+        """طول لازم برای تکمیل بلنک‌های باقیمانده‌ی سفارش با ``lanes`` لاین (mm)."""
+        job = self.jobs[job_id][0]
+        return ceil(self.remaining[job_id] / lanes) * job.flat_length_mm
+
+    def run(self):
+        patterns = []
+        totals = {job_id: [0.0, 0.0, 0.0] for job_id in self.jobs}
+        while self.remaining:
+            corrugator_id, width_cm, lanes, used = self._next_pattern()
+            # تا تمام شدن اولین سفارش این الگو اجرا می‌شود (mm)؛ هر لاین فقط
+            # بلنک کامل تحویل می‌دهد، پس طول مضرب طول بلنک همان سفارش است
+            run_mm = min(self._lane_length_mm(job_id, count) for job_id, count in lanes)
+            pattern = RunPattern(
+                corrugator_id=corrugator_id,
+                industrial_width_cm=width_cm,
+                lanes=lanes,
+                used_width_mm=used / _SCALE,
+                run_length_m=run_mm / 1000.0,
+            )
+            patterns.append(pattern)
+
+            finished = []
+            for job_id, count in lanes:
+                lane_width_mm = count * self.jobs[job_id][1] / _SCALE
+                share = lane_width_mm / pattern.used_width_mm
+                totals[job_id][0] += pattern.run_length_m
+                totals[job_id][1] += lane_width_mm / 1000.0 * pattern.run_length_m
+                totals[job_id][2] += pattern.waste_m2 * share
+
+                flat_length_mm = self.jobs[job_id][0].flat_length_mm
+                self.remaining[job_id] -= count * floor(run_mm / flat_length_mm + _EPS)
+                if self.remaining[job_id] <= 0:
+                    del self.remaining[job_id]
+                    finished.append(job_id)
+            if finished:
+                self._remove_jobs(finished)
+
+        return RunPlan(
+            patterns=tuple(patterns),
+            jobs=tuple(
+                JobPlan(
+                    job_id=job_id,
+                    run_length_m=run_m,
+                    board_area_m2=area,
+                    waste_m2=waste,
+                )
+                for job_id, (run_m, area, waste) in totals.items()
+            ),
+            unplanned_job_ids=tuple(self.unplanned),
+        )
+
+
+def plan_runs(jobs, machines=(), max_lanes=MAX_LANES, max_orders=MAX_ORDERS):
+    """
+    برنامه‌ی اجرای مشترک سفارش‌های یک گرید روی عرض‌های صنعتی ``machines``.
+
+    ``jobs``: لیستی از ``RunJob``؛ ``machines``: تاپل ``MachineSpec`` (پارک
+    ماشین‌آلات شرکت). خروجی ``RunPlan``.
+    """
+    planner = _Planner(jobs, machines or (DEFAULT_MACHINE,), max_lanes, max_orders)
+    return planner.run()
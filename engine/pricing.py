@@ -0,0 +1,602 @@
+# cm_carton_pricing/engine/pricing.py
+"""
+موتور قیمت‌گذاری کارتن بدون وابستگی به ORM.
+
+ورودی یک ``PricingInput`` (دیتاکلاس ساده) است و خروجی یک ``PricingResult``؛
+مدل ``cm.carton.price_inquiry`` فقط ورودی را می‌سازد و نتیجه را با یک ``write``
+برمی‌گرداند. منطق همان منطق ساده‌شده‌ی فایل‌های اکسل است.
+"""
+import hashlib
+from dataclasses import dataclass, replace
+from math import ceil
+
+from . import nesting
+from .cache import RESULT_CACHE
+
+
+# مقادیر پیش‌فرض زیر فقط وقتی استفاده می‌شوند که هیچ کروگیتوری
+# (cm.carton.corrugator) برای شرکت تعریف نشده باشد.
+
+# حاشیه ۲ سانت از هر طرف شیت
+SIDE_MARGIN_MM = 20.0
+
+# لب چسب کارتن معمولی
+GLUE_ALLOWANCE_MM = 40.0
+
+# عرض‌های صنعتی رایج کروگیتور
+INDUSTRIAL_WIDTHS_CM = (80, 90, 95, 100, 105, 110, 115, 120, 125, 130, 135, 140)
+
+# حاشیه دو طرف عرض صنعتی
+SHEET_SIDE_MARGIN_CM = 2.0
+# انواعی که چرخاندن بلنک روی ورق برایشان مجاز نیست
+# (در کارتن معمولی جهت فلوت باید در راستای ارتفاع بماند)
+NO_ROTATION_TYPES = ("normal",)
+
+# ضریب سربار هر نوع محصول
+OVERHEAD_RATE = {
+    "normal": 0.10,
+    "sheet": 0.10,
+    "diecut": 0.15,
+    "laminated": 0.15,
+}
+
+# انواعی که هزینه قالبشان از استهلاک قالب (DieSpec) محاسبه می‌شود، نه از die_cost استعلام
+DIE_PRICED_TYPES = ("diecut", "laminated")
+
+
+class PricingError(Exception):
+    """
+    خطای ورودی موتور قیمت‌گذاری.
+
+    ``code`` یکی از کلیدهای شناخته‌شده است و لایه‌ی مدل آن را به پیام
+    ترجمه‌شده تبدیل می‌کند.
+    """
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+# =========================================================
+#   ورودی / خروجی
+# =========================================================
+@dataclass(frozen=True)
+class DieSpec:
+    """
+    مشخصات قالب لازم برای محاسبه.
+
+    ``book_value`` ارزش دفتری باقیمانده‌ی قالب و ``cost_per_sheet`` استهلاک هر
+    ورق است (هزینه ساخت تقسیم بر عمر مورد انتظار). اگر عمر تعریف نشده باشد
+    (صفر)، کل ارزش دفتری روی سفارش بعدی می‌نشیند.
+    """
+
+    blade_length_mm: float = 0.0
+    blade_width_mm: float = 0.0
+    cavities_per_sheet: int = 1
+    book_value: float = 0.0
+    cost_per_sheet: float = 0.0
+
+    @property
+    def has_blade_dims(self):
+        return bool(self.blade_length_mm and self.blade_width_mm)
+
+    def charge_for(self, sheets):
+        """سهم این سفارش از هزینه قالب برای ``sheets`` ورق (حداکثر تا ارزش دفتری)."""
+        book_value = max(self.book_value or 0.0, 0.0)
+        if self.cost_per_sheet > 0:
+            return min(book_value, sheets * self.cost_per_sheet)
+        return book_value
+
+
+@dataclass(frozen=True)
+class ClicheSummary:
+    """
+    جمع کلیشه‌های فعال یک محصول: هزینه ساخت کلیشه‌هایی که هنوز ساخته
+    نشده‌اند و هزینه چاپ هر ۱۰۰۰ کارتن (همه‌ی کلیشه‌ها).
+    """
+
+    new_cliche_cost: float = 0.0
+    print_cost_per_1000: float = 0.0
+
+    def print_cost(self, quantity):
+        return (quantity or 0) * self.print_cost_per_1000 / 1000.0
+
+
+@dataclass(frozen=True)
+class MachineSpec:
+    """مشخصات یک کروگیتور و عرض‌های رول موجود روی آن."""
+
+    machine_id: int = 0
+    industrial_widths_cm: tuple = INDUSTRIAL_WIDTHS_CM
+    side_margin_cm: float = SHEET_SIDE_MARGIN_CM
+    cost_per_linear_m: float = 0.0
+    max_speed_m_min: float = 0.0
+
+
+DEFAULT_MACHINE = MachineSpec()
+
+
+@dataclass(frozen=True)
+class PricingInput:
+    """همه‌ی ورودی‌های لازم برای قیمت‌گذاری یک استعلام."""
+
+    carton_type: str = "normal"
+    flow_mode: str = "quick"
+    quantity: int = 0
+
+    # ابعاد محصول (cm)
+    length_cm: float = 0.0
+    width_cm: float = 0.0
+    height_cm: float = 0.0
+
+    # قالب و ابعاد بلنک (mm)
+    die: DieSpec = None
+    die_length_mm: float = 0.0
+    die_width_mm: float = 0.0
+
+    # قیمت‌های پایه
+    paper_price_per_m2: float = 0.0
+    lamination_price_per_m2: float = 0.0
+
+    # هزینه‌های ثابت / خدمات
+    die_cost: float = 0.0
+    cliche_cost: float = 0.0
+    # هزینه چاپ به ازای هر ۱۰۰۰ کارتن (جمع کلیشه‌ها)
+    print_cost_per_1000: float = 0.0
+    design_cost: float = 0.0
+    punch_cost_total: float = 0.0
+    pallet_wrap_cost_total: float = 0.0
+    shipping_cost: float = 0.0
+
+    # سیاست قیمت‌گذاری
+    margin_cash_percent: float = 0.0
+    margin_credit_percent: float = 0.0
+    tax_percent: float = 0.0
+    payment_type: str = "cash"
+
+    # عرض صنعتی و کروگیتور انتخاب‌شده توسط اپراتور؛ صفر یعنی انتخاب خودکار
+    industrial_width_cm: float = 0.0
+    corrugator_id: int = 0
+
+    # پارک ماشین‌آلات و حاشیه‌های ابعاد خوابیده
+    machines: tuple = ()
+    side_margin_mm: float = SIDE_MARGIN_MM
+    glue_allowance_mm: float = GLUE_ALLOWANCE_MM
+
+
+@dataclass(frozen=True)
+class SheetSuggestion:
+    """یک پیشنهاد چیدمان روی یک عرض صنعتی."""
+
+    industrial_width_cm: float
+    carton_per_row: int
+    waste_cm: float
+    waste_percent: float
+    total_length_cm: float
+    orientation: str = "normal"
+    rotated_per_row: int = 0
+    board_area_m2: float = 0.0
+    is_pareto_optimal: bool = False
+    corrugator_id: int = 0
+    estimated_cost: float = 0.0
+    run_time_min: float = 0.0
+
+    def to_vals(self):
+        return {
+            "industrial_width_cm": self.industrial_width_cm,
+            "carton_per_row": self.carton_per_row,
+            "waste_cm": self.waste_cm,
+            "waste_percent": self.waste_percent,
+            "total_length_cm": self.total_length_cm,
+            "orientation": self.orientation,
+            "rotated_per_row": self.rotated_per_row,
+            "board_area_m2": self.board_area_m2,
+            "is_pareto_optimal": self.is_pareto_optimal,
+            "corrugator_id": self.corrugator_id or False,
+            "estimated_cost": self.estimated_cost,
+            "run_time_min": self.run_time_min,
+        }
+
+    @property
+    def key(self):
+        """کلید یکتای پیشنهاد در یک استعلام: (کروگیتور، عرض صنعتی)."""
+        return (self.corrugator_id or 0, float(self.industrial_width_cm))
+
+
+@dataclass(frozen=True)
+class PriceBreakdown:
+    """خروجی مرحله قیمت نهایی."""
+
+    base_cost_per_carton: float = 0.0
+    sale_price_cash: float = 0.0
+    sale_price_credit: float = 0.0
+    unit_price_with_tax: float = 0.0
+    total_price_with_tax: float = 0.0
+
+
+@dataclass(frozen=True)
+class PricingResult:
+    """نتیجه کامل قیمت‌گذاری یک استعلام."""
+
+    flat_length_mm: float
+    flat_width_mm: float
+    suggestions: tuple
+    industrial_width_cm: float
+    material_cost_total: float
+    overhead_cost_total: float
+    prices: PriceBreakdown = None
+    suggestion_key: str = ""
+    corrugator_id: int = 0
+    input_fingerprint: str = ""
+
+    def to_vals(self):
+        """مقادیر قابل نوشتن روی ``cm.carton.price_inquiry`` با یک ``write``."""
+        vals = {
+            "flat_length_mm": self.flat_length_mm,
+            "flat_width_mm": self.flat_width_mm,
+            "industrial_width_mm": self.industrial_width_cm,
+            "corrugator_id": self.corrugator_id or False,
+            "material_cost_total": self.material_cost_total,
+            "overhead_cost_total": self.overhead_cost_total,
+            "suggestion_input_key": self.suggestion_key,
+            "pricing_fingerprint": self.input_fingerprint,
+        }
+        if self.prices is not None:
+            vals.update(
+                {
+                    "base_cost_per_carton": self.prices.base_cost_per_carton,
+                    "sale_price_cash": self.prices.sale_price_cash,
+                    "sale_price_credit": self.prices.sale_price_credit,
+                    "unit_price_with_tax": self.prices.unit_price_with_tax,
+                    "total_price_with_tax": self.prices.total_price_with_tax,
+                }
+            )
+        return vals
+
+
+# =========================================================
+#   مراحل محاسبه
+# =========================================================
+def compute_flat_dimensions(inp):
+    """
+    محاسبه طول و عرض خوابیده روی ورق.
+
+    خروجی: (flat_length_mm, flat_width_mm)
+    """
+    carton_type = inp.carton_type or "normal"
+    margin2 = 2 * inp.side_margin_mm
+    L = (inp.length_cm or 0.0) * 10.0
+    W = (inp.width_cm or 0.0) * 10.0
+    H = (inp.height_cm or 0.0) * 10.0
+
+    # --- دایکاتی / لمینتی ---
+    if carton_type in ("diecut", "laminated"):
+        die = inp.die
+        if die and die.has_blade_dims:
+            base_L = die.blade_length_mm
+            base_W = die.blade_width_mm
+        elif inp.die_length_mm and inp.die_width_mm:
+            base_L = inp.die_length_mm
+            base_W = inp.die_width_mm
+        else:
+            if inp.flow_mode == "full":
+                raise PricingError("die_dims_required")
+            if not (L and W and H):
+                return 0.0, 0.0
+            base_L = L
+            base_W = W
+
+        return base_L + margin2, base_W + margin2
+
+    # --- کارتن معمولی ---
+    if carton_type == "normal":
+        if not (L and W and H):
+            return 0.0, 0.0
+
+        flat_length = 2 * (L + W) + inp.glue_allowance_mm + margin2
+        flap_up_mm = W / 2 + 10.0
+        flap_down_mm = W / 2 + 10.0
+        flat_width = H + flap_up_mm + flap_down_mm + margin2
+        return flat_length, flat_width
+
+    # --- ورق ساده ---
+    if carton_type == "sheet":
+        if not (L and W):
+            return 0.0, 0.0
+        return L + margin2, W + margin2
+
+    # --- حالت‌های احتیاطی ---
+    if not (L and W and H):
+        return 0.0, 0.0
+    return 2 * (L + W) + margin2, H + W + margin2
+
+
+def generate_sheet_suggestions(
+    flat_width_mm,
+    flat_length_mm,
+    quantity,
+    industrial_widths_cm=INDUSTRIAL_WIDTHS_CM,
+    side_margin_cm=SHEET_SIDE_MARGIN_CM,
+    cavities=1,
+    allow_rotation=True,
+):
+    """
+    از روی ابعاد شیت و تیراژ، بهترین چیدمان هر عرض صنعتی را پیشنهاد می‌دهد
+    (جهت عادی، چرخیده یا ترکیبی؛ با در نظر گرفتن تعداد ضرب قالب).
+    """
+    rows = nesting.nest(
+        flat_width_mm,
+        flat_length_mm,
+        quantity,
+        industrial_widths_cm,
+        side_margin_cm,
+        cavities=cavities,
+        allow_rotation=allow_rotation,
+    )
+    suggestions = []
+    for row in rows:
+        layout = row["layout"]
+        suggestions.append(
+            SheetSuggestion(
+                industrial_width_cm=row["industrial_width_cm"],
+                carton_per_row=row["carton_per_row"],
+                waste_cm=layout.waste_cm,
+                waste_percent=layout.waste_percent,
+                total_length_cm=row["total_length_cm"],
+                orientation=layout.orientation,
+                rotated_per_row=layout.rotated_count * max(int(cavities or 1), 1),
+                board_area_m2=row["board_area_m2"],
+                is_pareto_optimal=row["is_pareto_optimal"],
+            )
+        )
+    return tuple(suggestions)
+
+
+def _layout_params(inp):
+    """(تعداد ضرب قالب، مجاز بودن چرخش) برای چیدمان."""
+    die = inp.die
+    cavities = die.cavities_per_sheet if die and die.has_blade_dims else 1
+    return cavities, inp.carton_type not in NO_ROTATION_TYPES
+
+
+def suggestions_for(inp, flat_length_mm, flat_width_mm):
+    """
+    پیشنهادهای چیدمان روی همه‌ی کروگیتورها و عرض‌های رول آن‌ها.
+
+    برای هر پیشنهاد هزینه برآوردی (هزینه هر متر طول دستگاه + مصرف ورق)
+    و زمان اجرا محاسبه و جبهه پارتو روی کل پارک ماشین‌آلات تعیین می‌شود.
+    """
+    cavities, allow_rotation = _layout_params(inp)
+    paper_price = inp.paper_price_per_m2 or 0.0
+
+    suggestions = []
+    for machine in inp.machines or (DEFAULT_MACHINE,):
+        for sug in generate_sheet_suggestions(
+            flat_width_mm,
+            flat_length_mm,
+            inp.quantity,
+            industrial_widths_cm=machine.industrial_widths_cm,
+            side_margin_cm=machine.side_margin_cm,
+            cavities=cavities,
+            allow_rotation=allow_rotation,
+        ):
+            length_m = sug.total_length_cm / 100.0
+            suggestions.append(
+                replace(
+                    sug,
+                    corrugator_id=machine.machine_id,
+                    estimated_cost=length_m * (machine.cost_per_linear_m or 0.0)
+                    + sug.board_area_m2 * paper_price,
+                    run_time_min=(
+                        length_m / machine.max_speed_m_min
+                        if machine.max_speed_m_min
+                        else 0.0
+                    ),
+                )
+            )
+
+    front = {id(s) for s in nesting.pareto_front(suggestions)}
+    return tuple(
+        replace(s, is_pareto_optimal=id(s) in front) for s in suggestions
+    )
+
+
+def suggestion_key(inp, flat_length_mm, flat_width_mm):
+    """
+    اثر انگشت ورودی‌های چیدمان (ابعاد خوابیده، تیراژ، ضرب قالب، ماشین‌ها).
+    تا وقتی این مقدار عوض نشود، پیشنهادهای ذخیره‌شده هم معتبرند.
+    """
+    cavities, allow_rotation = _layout_params(inp)
+    raw = repr(
+        (
+            round(flat_length_mm, 3),
+            round(flat_width_mm, 3),
+            inp.quantity,
+            cavities,
+            allow_rotation,
+            inp.machines or (DEFAULT_MACHINE,),
+            inp.paper_price_per_m2 or 0.0,
+        )
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def best_suggestion(suggestions):
+    """
+    ارزان‌ترین ترکیب کروگیتور/عرض (هزینه دستگاه + مصرف ورق)؛ اگر هزینه‌ای
+    تعریف نشده باشد، کمترین مصرف واقعی ورق (عرض صنعتی × طول کل) و سپس
+    کمترین درصد ضایعات.
+    """
+    if not suggestions:
+        return None
+    return min(
+        suggestions,
+        key=lambda s: (s.estimated_cost, s.board_area_m2, s.waste_percent),
+    )
+
+
+def select_width(inp, suggestions):
+    """
+    (عرض صنعتی، کروگیتور) نهایی: انتخاب اپراتور حفظ می‌شود،
+    در غیر این صورت بهترین پیشنهاد.
+    """
+    if inp.industrial_width_cm:
+        return inp.industrial_width_cm, inp.corrugator_id
+    best = best_suggestion(suggestions)
+    if not best:
+        return 0.0, inp.corrugator_id
+    return best.industrial_width_cm, best.corrugator_id
+
+
+def _die_sheet_area(inp, error_code):
+    die = inp.die
+    if not die or not die.has_blade_dims:
+        raise PricingError(error_code)
+
+    cavities = die.cavities_per_sheet or 1
+    qty = inp.quantity or 0
+    sheet_area_m2 = (die.blade_length_mm / 1000.0) * (die.blade_width_mm / 1000.0)
+    sheets_needed = ceil(qty / cavities) if cavities > 0 else 0
+    return die, sheets_needed, sheet_area_m2 * sheets_needed
+
+
+def compute_normal_carton(inp, flat_length_mm, flat_width_mm):
+    area_m2 = (flat_width_mm / 1000.0) * (flat_length_mm / 1000.0)
+    total_area_m2 = area_m2 * (inp.quantity or 0.0)
+    material = total_area_m2 * (inp.paper_price_per_m2 or 0.0)
+    return material, material * OVERHEAD_RATE["normal"]
+
+
+def compute_diecut_carton(inp, flat_length_mm=0.0, flat_width_mm=0.0):
+    """
+    مایه‌کاری دایکاتی (ساده‌شده از فایل دایکاتی.xlsx).
+    """
+    die, sheets, total_area_m2 = _die_sheet_area(inp, "diecut_die_required")
+    material = total_area_m2 * (inp.paper_price_per_m2 or 0.0)
+    material += die.charge_for(sheets)
+    return material, material * OVERHEAD_RATE["diecut"]
+
+
+def compute_laminated_carton(inp, flat_length_mm=0.0, flat_width_mm=0.0):
+    """
+    مایه‌کاری لمینتی (ساده‌شده از فایل لمینتی.xlsx).
+    """
+    die, sheets, total_area_m2 = _die_sheet_area(inp, "laminated_die_required")
+    material = total_area_m2 * (inp.paper_price_per_m2 or 0.0)
+    lam_cost = total_area_m2 * (inp.lamination_price_per_m2 or 0.0)
+    material = material + lam_cost + die.charge_for(sheets)
+    return material, material * OVERHEAD_RATE["laminated"]
+
+
+def compute_sheet(inp, flat_length_mm, flat_width_mm):
+    return compute_normal_carton(inp, flat_length_mm, flat_width_mm)
+
+
+COST_FUNCTIONS = {
+    "normal": compute_normal_carton,
+    "diecut": compute_diecut_carton,
+    "laminated": compute_laminated_carton,
+    "sheet": compute_sheet,
+}
+
+
+def compute_costs(inp, flat_length_mm, flat_width_mm):
+    """خروجی: (material_cost_total, overhead_cost_total)"""
+    func = COST_FUNCTIONS.get(inp.carton_type)
+    if not func:
+        return 0.0, 0.0
+    return func(inp, flat_length_mm, flat_width_mm)
+
+
+def compute_prices(inp, material_cost_total, overhead_cost_total):
+    """
+    مایه‌کاری هر کارتن، قیمت نقد/مدت‌دار و مالیات.
+    اگر تیراژ صفر باشد None برمی‌گرداند (قیمت‌ها دست نمی‌خورند).
+
+    در دایکاتی/لمینتی سهم قالب قبلاً در مایه‌کاری آمده است و ``die_cost``
+    استعلام دوباره اضافه نمی‌شود.
+    """
+    quantity = inp.quantity or 0
+    if quantity <= 0:
+        return None
+
+    die_cost = 0.0 if inp.carton_type in DIE_PRICED_TYPES else inp.die_cost
+    total_cost = (
+        material_cost_total
+        + overhead_cost_total
+        + (die_cost or 0.0)
+        + (inp.cliche_cost or 0.0)
+        + quantity * (inp.print_cost_per_1000 or 0.0) / 1000.0
+        + (inp.design_cost or 0.0)
+        + (inp.punch_cost_total or 0.0)
+        + (inp.pallet_wrap_cost_total or 0.0)
+        + (inp.shipping_cost or 0.0)
+    )
+
+    base_cost = total_cost / quantity
+    sale_price_cash = base_cost * (1.0 + (inp.margin_cash_percent or 0.0) / 100.0)
+    sale_price_credit = base_cost * (1.0 + (inp.margin_credit_percent or 0.0) / 100.0)
+    unit_price = sale_price_cash if inp.payment_type == "cash" else sale_price_credit
+    unit_price_with_tax = unit_price * (1.0 + (inp.tax_percent or 0.0) / 100.0)
+
+    return PriceBreakdown(
+        base_cost_per_carton=base_cost,
+        sale_price_cash=sale_price_cash,
+        sale_price_credit=sale_price_credit,
+        unit_price_with_tax=unit_price_with_tax,
+        total_price_with_tax=unit_price_with_tax * quantity,
+    )
+
+
+def fingerprint(inp):
+    """اثر انگشت همه‌ی ورودی‌های قیمت‌گذاری (sha1 روی repr دیتاکلاس)."""
+    return hashlib.sha1(repr(inp).encode()).hexdigest()
+
+
+def settle(inp, industrial_width_cm, corrugator_id):
+    """
+    ورودی‌ای که بعد از نوشتن نتیجه روی رکورد دوباره ساخته می‌شود
+    (عرض و کروگیتور انتخاب‌شده جایگزین انتخاب خودکار می‌شوند).
+    اثر انگشت همین ورودی ذخیره می‌شود تا کلیک دوباره، محاسبه را تکرار نکند.
+    """
+    return replace(
+        inp, industrial_width_cm=industrial_width_cm, corrugator_id=corrugator_id
+    )
+
+
+def price(inp):
+    """
+    اجرای کامل خط قیمت‌گذاری: ابعاد خوابیده، پیشنهاد عرض، مایه‌کاری و قیمت.
+    """
+    flat_length_mm, flat_width_mm = compute_flat_dimensions(inp)
+    suggestions = suggestions_for(inp, flat_length_mm, flat_width_mm)
+
+    industrial_width_cm, corrugator_id = select_width(inp, suggestions)
+
+    material, overhead = compute_costs(inp, flat_length_mm, flat_width_mm)
+    prices = compute_prices(inp, material, overhead)
+
+    return PricingResult(
+        flat_length_mm=flat_length_mm,
+        flat_width_mm=flat_width_mm,
+        suggestions=suggestions,
+        industrial_width_cm=industrial_width_cm,
+        material_cost_total=material,
+        overhead_cost_total=overhead,
+        prices=prices,
+        suggestion_key=suggestion_key(inp, flat_length_mm, flat_width_mm),
+        corrugator_id=corrugator_id,
+        input_fingerprint=fingerprint(
+            settle(inp, industrial_width_cm, corrugator_id)
+        ),
+    )
+
+
+def price_cached(inp, cache=RESULT_CACHE):
+    """``price`` با کش LRU مشترک بر اساس اثر انگشت ورودی."""
+    key = fingerprint(inp)
+    result = cache.get(key)
+    if result is None:
+        result = price(inp)
+        cache.put(key, result)
+    return result
@@ -0,0 +1,60 @@
+# cm_carton_pricing/migrations/18.0.1.1.0/pre-migrate.py
+"""
+یکی کردن تعریف‌های تکراری cm.carton.die و cm.carton.cliche.
+
+قالب:
+  - product_id (تعریف قدیمی در carton_models.py) در customer_product_id ادغام می‌شود
+  - is_active به active تغییر نام می‌دهد (ستون active پیش‌تر وجود نداشت)
+کلیشه:
+  - is_active و active هر دو وجود داشتند؛ رکوردی فعال است که هر دو فعال باشند
+"""
+import logging
+
+from odoo.tools.sql import column_exists, rename_column
+
+_logger = logging.getLogger(__name__)
+
+
+def _migrate_die(cr):
+    if column_exists(cr, "cm_carton_die", "product_id"):
+        cr.execute(
+            """
+            UPDATE cm_carton_die
+               SET customer_product_id = product_id
+             WHERE customer_product_id IS NULL
+               AND product_id IS NOT NULL
+            """
+        )
+        _logger.info("cm.carton.die: merged product_id into %s row(s)", cr.rowcount)
+        cr.execute("ALTER TABLE cm_carton_die DROP COLUMN product_id")
+
+    if column_exists(cr, "cm_carton_die", "is_active"):
+        if column_exists(cr, "cm_carton_die", "active"):
+            cr.execute(
+                """
+                UPDATE cm_carton_die
+                   SET active = COALESCE(active, TRUE) AND COALESCE(is_active, TRUE)
+                """
+            )
+            cr.execute("ALTER TABLE cm_carton_die DROP COLUMN is_active")
+        else:
+            rename_column(cr, "cm_carton_die", "is_active", "active")
+            cr.execute("UPDATE cm_carton_die SET active = TRUE WHERE active IS NULL")
+
+
+def _migrate_cliche(cr):
+    if column_exists(cr, "cm_carton_cliche", "is_active"):
+        cr.execute(
+            """
+            UPDATE cm_carton_cliche
+               SET active = COALESCE(active, TRUE) AND COALESCE(is_active, TRUE)
+            """
+        )
+        cr.execute("ALTER TABLE cm_carton_cliche DROP COLUMN is_active")
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    _migrate_die(cr)
+    _migrate_cliche(cr)
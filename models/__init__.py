@@ -1,4 +1,12 @@
 # cm_carton_pricing/models/__init__.py
+from . import carton_cache_mixin
 from . import carton_models
 from . import carton_die
 from . import carton_cliche
+from . import carton_corrugator
+from . import carton_price_break
+from . import carton_board
+from . import carton_perf_log
+from . import carton_job
+from . import carton_pricing_report
+from . import carton_run_plan
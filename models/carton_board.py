@@ -0,0 +1,271 @@
+from odoo import api, fields, models, tools
+
+from ..engine import board as board_engine
+
+FLUTE_PROFILE_SELECTION = [
+    ("B", "B"),
+    ("C", "C"),
+    ("E", "E"),
+]
+
+
+# =========================================================
+#   کاغذ و تاریخچه قیمت
+# =========================================================
+class CartonPaper(models.Model):
+    _name = "cm.carton.paper"
+    _inherit = ["cm.carton.cache.mixin"]
+    _description = "کاغذ ورق کارتن"
+    _order = "name asc"
+    _catalogue_fields = {
+        "grammage_gsm",
+    }
+
+    name = fields.Char(
+        string="نام کاغذ",
+        required=True,
+        help="مثلاً: کرافت لاینر ۱۴۰، تست لاینر ۱۲۵، فلوتینگ ۱۲۷",
+    )
+
+    code = fields.Char(string="کد کاغذ")
+
+    grammage_gsm = fields.Float(
+        string="گرماژ (g/m²)",
+        required=True,
+    )
+
+    price_ids = fields.One2many(
+        "cm.carton.paper.price",
+        "paper_id",
+        string="تاریخچه قیمت",
+    )
+
+    active = fields.Boolean(
+        string="فعال؟",
+        default=True,
+    )
+
+
+class CartonPaperPrice(models.Model):
+    _name = "cm.carton.paper.price"
+    _inherit = ["cm.carton.cache.mixin"]
+    _description = "قیمت کاغذ از تاریخ"
+    _order = "date_from desc"
+    _catalogue_fields = {
+        "paper_id",
+        "date_from",
+        "price_per_kg",
+    }
+
+    paper_id = fields.Many2one(
+        "cm.carton.paper",
+        string="کاغذ",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    date_from = fields.Date(
+        string="از تاریخ",
+        required=True,
+        default=fields.Date.context_today,
+    )
+
+    price_per_kg = fields.Monetary(
+        string="قیمت هر کیلو",
+        currency_field="currency_id",
+        required=True,
+    )
+
+    currency_id = fields.Many2one(
+        "res.currency",
+        string="ارز",
+        default=lambda self: self.env.company.currency_id.id,
+    )
+
+
+# =========================================================
+#   گرید ورق (ساختار لایه‌ها)
+# =========================================================
+class CartonBoardGrade(models.Model):
+    _name = "cm.carton.board_grade"
+    _inherit = ["cm.carton.cache.mixin"]
+    _description = "گرید ورق کارتن (ترکیب کاغذها)"
+    _order = "name asc"
+    _catalogue_fields = {
+        "layer_count",
+        "flute_step",
+        "active",
+    }
+
+    name = fields.Char(
+        string="نام گرید",
+        required=True,
+        help="مثلاً: ۵ لایه BC کرافت/تست/فلوت",
+    )
+
+    code = fields.Char(string="کد گرید")
+
+    layer_count = fields.Selection(
+        [
+            ("3", "سه لایه"),
+            ("5", "پنج لایه"),
+        ],
+        string="تعداد لایه",
+        required=True,
+        default="5",
+    )
+
+    flute_step = fields.Selection(
+        [
+            ("B", "B"),
+            ("C", "C"),
+            ("E", "E"),
+            ("BC", "BC"),
+            ("BE", "BE"),
+        ],
+        string="گام فلوت",
+        required=True,
+    )
+
+    layer_ids = fields.One2many(
+        "cm.carton.board_grade.layer",
+        "grade_id",
+        string="لایه‌ها",
+        copy=True,
+    )
+
+    price_per_m2_today = fields.Float(
+        string="قیمت هر مترمربع (امروز)",
+        compute="_compute_price_per_m2_today",
+    )
+
+    active = fields.Boolean(
+        string="فعال؟",
+        default=True,
+    )
+
+    def _compute_price_per_m2_today(self):
+        today = fields.Date.to_string(fields.Date.context_today(self))
+        for rec in self:
+            rec.price_per_m2_today = (
+                self._get_price_per_m2(rec.id, today) if rec.id else 0.0
+            )
+
+    # ----------------- کش قیمت -----------------
+    @api.model
+    @tools.ormcache("self._get_catalogue_version()")
+    def _get_board_catalogue(self):
+        """
+        کل داده‌های لازم برای قیمت ورق، یک‌بار در هر پروسس:
+        (dict گرید ← تاپل (paper_id, گرماژ, ضریب مصرف)،
+         dict کاغذ ← تاپل مرتب (date_from, price_per_kg))
+        """
+        grades = {}
+        layers = self.env["cm.carton.board_grade.layer"].sudo().search([])
+        for layer in layers:
+            grades.setdefault(layer.grade_id.id, []).append(
+                (
+                    layer.paper_id.id,
+                    layer.paper_id.grammage_gsm,
+                    layer.take_up_factor or 1.0,
+                )
+            )
+
+        prices = {}
+        for price in self.env["cm.carton.paper.price"].sudo().search([]):
+            prices.setdefault(price.paper_id.id, []).append(
+                (fields.Date.to_string(price.date_from), price.price_per_kg)
+            )
+
+        return (
+            {k: tuple(v) for k, v in grades.items()},
+            {k: tuple(sorted(v)) for k, v in prices.items()},
+        )
+
+    @api.model
+    @tools.ormcache("self._get_catalogue_version()", "layer_count", "flute_step")
+    def _get_grade_for(self, layer_count, flute_step):
+        """اولین گرید فعال با تعداد لایه و گام فلوت داده‌شده (برای تخمین بدون محصول)."""
+        grade = self.sudo().search(
+            [("layer_count", "=", layer_count), ("flute_step", "=", flute_step)],
+            limit=1,
+        )
+        return grade.id
+
+    @api.model
+    @tools.ormcache("self._get_catalogue_version()", "grade_id", "date")
+    def _get_price_per_m2(self, grade_id, date):
+        """
+        قیمت هر مترمربع یک گرید در تاریخ ``date`` (رشته ISO).
+        بعد از اولین فراخوانی، برای هر (گرید، تاریخ) فقط یک lookup در حافظه است.
+        """
+        grades, prices = self._get_board_catalogue()
+        return board_engine.price_per_m2(
+            board_engine.BoardLayer(
+                grammage_gsm=gsm,
+                price_per_kg=board_engine.price_on(prices.get(paper_id, ()), date),
+                take_up_factor=take_up,
+            )
+            for paper_id, gsm, take_up in grades.get(grade_id, ())
+        )
+
+
+class CartonBoardGradeLayer(models.Model):
+    _name = "cm.carton.board_grade.layer"
+    _inherit = ["cm.carton.cache.mixin"]
+    _description = "لایه گرید ورق"
+    _order = "sequence, id"
+    _catalogue_fields = {
+        "grade_id",
+        "paper_id",
+        "take_up_factor",
+    }
+
+    grade_id = fields.Many2one(
+        "cm.carton.board_grade",
+        string="گرید ورق",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    sequence = fields.Integer(string="ترتیب", default=10)
+
+    role = fields.Selection(
+        [
+            ("liner", "لاینر"),
+            ("flute", "فلوت (مدیوم)"),
+        ],
+        string="نقش لایه",
+        required=True,
+        default="liner",
+    )
+
+    flute_profile = fields.Selection(
+        FLUTE_PROFILE_SELECTION,
+        string="پروفیل فلوت",
+        help="فقط برای لایه‌های فلوت؛ ضریب مصرف پیش‌فرض از روی آن تعیین می‌شود.",
+    )
+
+    paper_id = fields.Many2one(
+        "cm.carton.paper",
+        string="کاغذ",
+        required=True,
+    )
+
+    take_up_factor = fields.Float(
+        string="ضریب مصرف",
+        compute="_compute_take_up_factor",
+        store=True,
+        readonly=False,
+        help="برای لاینر ۱؛ برای فلوت بسته به پروفیل (B/C/E) بیشتر از ۱.",
+    )
+
+    @api.depends("role", "flute_profile")
+    def _compute_take_up_factor(self):
+        for rec in self:
+            if rec.role == "flute":
+                rec.take_up_factor = board_engine.take_up_for(rec.flute_profile)
+            else:
+                rec.take_up_factor = 1.0
@@ -0,0 +1,97 @@
+from odoo import api, models
+
+# جدول تک‌سطری نسخه کش داده‌های پایه. نسخه داخل کلید ormcache متدهای
+# کاتالوگ می‌آید؛ با بالا رفتن آن فقط همین کش‌ها بی‌اعتبار می‌شوند و بقیه
+# کش‌های رجیستری (دسترسی‌ها، قوانین رکورد، قالب‌ها و ...) دست نمی‌خورند.
+# مقدار نسخه از یک sequence می‌آید تا نسخه‌ی تراکنشِ rollback‌شده هرگز
+# دوباره استفاده نشود.
+CATALOGUE_VERSION_TABLE = "cm_carton_catalogue_version"
+CATALOGUE_VERSION_SEQUENCE = "cm_carton_catalogue_version_seq"
+CATALOGUE_VERSION_KEY = "cm_carton_catalogue_version"
+
+
+class CartonCacheMixin(models.AbstractModel):
+    """
+    داده‌های پایه‌ای که در ormcache نگه داشته می‌شوند (کروگیتور، کاغذ، گرید و ...).
+
+    متدهای کش‌شده ``self._get_catalogue_version()`` را در کلید ormcache
+    می‌گذارند. create/unlink و write روی فیلدهای ``_catalogue_fields`` نسخه
+    را عوض می‌کنند؛ نوشتن فیلدهای دیگر (مثلاً نام یا کارکرد قالب) کشی را
+    پاک نمی‌کند. نسخه داخل تراکنش بالا می‌رود، پس پروسس‌های دیگر تا commit
+    همان داده قدیمی را با نسخه قدیمی می‌بینند.
+    """
+
+    _name = "cm.carton.cache.mixin"
+    _description = "پاک‌سازی کش داده‌های پایه کارتن"
+
+    # فیلدهایی که در کاتالوگ‌های کش‌شده خوانده می‌شوند؛ None یعنی همه فیلدها.
+    _catalogue_fields = None
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(
+            f"""
+            CREATE SEQUENCE IF NOT EXISTS {CATALOGUE_VERSION_SEQUENCE};
+            CREATE TABLE IF NOT EXISTS {CATALOGUE_VERSION_TABLE} (
+                version bigint NOT NULL
+            );
+            INSERT INTO {CATALOGUE_VERSION_TABLE} (version)
+            SELECT 0
+             WHERE NOT EXISTS (SELECT 1 FROM {CATALOGUE_VERSION_TABLE});
+            """
+        )
+
+    # ----------------- نسخه کش -----------------
+    @api.model
+    def _get_catalogue_version(self):
+        """نسخه فعلی کاتالوگ‌ها؛ در هر تراکنش یک‌بار از دیتابیس خوانده می‌شود."""
+        cr = self.env.cr
+        version = cr.cache.get(CATALOGUE_VERSION_KEY)
+        if version is None:
+            cr.execute(f"SELECT version FROM {CATALOGUE_VERSION_TABLE}")
+            version = self._set_catalogue_version(cr.fetchone()[0])
+        return version
+
+    @api.model
+    def _set_catalogue_version(self, version):
+        cr = self.env.cr
+        if CATALOGUE_VERSION_KEY not in cr.cache:
+            # بعد از پایان تراکنش دوباره از دیتابیس خوانده شود
+            def forget():
+                cr.cache.pop(CATALOGUE_VERSION_KEY, None)
+
+            cr.postcommit.add(forget)
+            cr.postrollback.add(forget)
+        cr.cache[CATALOGUE_VERSION_KEY] = version
+        return version
+
+    @api.model
+    def _bump_catalogue_version(self):
+        self.env.cr.execute(
+            f"""
+            UPDATE {CATALOGUE_VERSION_TABLE}
+               SET version = nextval('{CATALOGUE_VERSION_SEQUENCE}')
+            RETURNING version
+            """
+        )
+        self._set_catalogue_version(self.env.cr.fetchone()[0])
+
+    # ----------------- CRUD -----------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._bump_catalogue_version()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._catalogue_fields is None or not self._catalogue_fields.isdisjoint(
+            vals
+        ):
+            self._bump_catalogue_version()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._bump_catalogue_version()
+        return res
@@ -1,33 +1,58 @@
-from odoo import models, fields
+from odoo import api, fields, models, tools
+
+from ..engine import pricing as pricing_engine
+
+
+# فیلدهایی که نیاز استعلام‌های پیش‌نویس به استعلام چاپ را عوض می‌کنند
+PRINT_QUOTE_FIELDS = {
+    "customer_product_id",
+    "print_cost_per_1000",
+    "is_laminate",
+    "active",
+}
+
 
 class CartonCliche(models.Model):
     _name = "cm.carton.cliche"
     _description = "کلیشه چاپ کارتن"
+    _inherit = ["cm.carton.cache.mixin"]
+    _catalogue_fields = {
+        "customer_product_id",
+        "cliche_cost",
+        "print_cost_per_1000",
+        "is_made",
+        "is_laminate",
+        "active",
+    }
 
     customer_product_id = fields.Many2one(
         "cm.carton.customer_product",
         string="محصول مشتری",
         required=True,
         ondelete="cascade",
+        index=True,
     )
 
     name = fields.Char(
         string="نام کلیشه",
         required=True,
+        help="مثلاً: کلیشه لوگو، کلیشه وجه A و ...",
     )
 
     color = fields.Char(
-        string="رنگ",
+        string="رنگ / رنگ‌ها",
+        help="مثلاً: قرمز + مشکی",
     )
 
     side = fields.Selection(
         [
+            ("front", "روبرو"),
+            ("back", "پشت"),
+            ("both", "دو رو"),
             ("top", "بالا"),
             ("bottom", "پایین"),
             ("left", "چپ"),
             ("right", "راست"),
-            ("front", "روبرو"),
-            ("back", "پشت"),
         ],
         string="سمت چاپ",
     )
@@ -42,14 +67,23 @@ class CartonCliche(models.Model):
         currency_field="currency_id",
     )
 
-    is_active = fields.Boolean(
-        string="فعال؟",
-        default=True,
+    design_file_id = fields.Many2one(
+        "ir.attachment",
+        string="فایل طرح",
+        help="فایل طرح نهایی برای استفاده در سفارش‌های بعدی",
+    )
+
+    is_made = fields.Boolean(
+        string="ساخته شده؟",
+        default=False,
+        help="بعد از اولین سفارش تأییدشده‌ی محصول علامت می‌خورد؛ "
+        "هزینه ساخت کلیشه‌ی ساخته‌شده دوباره در قیمت نمی‌آید.",
     )
 
     is_laminate = fields.Boolean(
         string="چاپ لمینتی؟",
         default=False,
+        help="اگر True باشد، این کلیشه/طرح برای چاپ لمینتی استفاده می‌شود.",
     )
 
     active = fields.Boolean(
@@ -62,3 +96,81 @@ class CartonCliche(models.Model):
         string="ارز",
         default=lambda self: self.env.company.currency_id.id,
     )
+
+    # ----------------- نیاز به استعلام چاپ -----------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.customer_product_id._get_draft_inquiries()._recompute_need_quotes()
+        return records
+
+    def write(self, vals):
+        if not PRINT_QUOTE_FIELDS.intersection(vals):
+            return super().write(vals)
+        products = self.customer_product_id
+        res = super().write(vals)
+        products |= self.customer_product_id
+        products._get_draft_inquiries()._recompute_need_quotes()
+        return res
+
+    def unlink(self):
+        products = self.customer_product_id
+        res = super().unlink()
+        products._get_draft_inquiries()._recompute_need_quotes()
+        return res
+
+    # ----------------- کش خلاصه کلیشه‌ها -----------------
+    def _is_used_for(self, carton_type):
+        """
+        کلیشه‌های به کار رفته در کارتنی از نوع ``carton_type``: کلیشه‌های
+        لمینتی فقط برای کارتن لمینتی و بقیه برای سایر انواع.
+        """
+        laminated = carton_type == "laminated"
+        return self.filtered(lambda c: c.active and c.is_laminate == laminated)
+
+    @api.model
+    @tools.ormcache("self._get_catalogue_version()")
+    def _get_cliche_catalogue(self):
+        """
+        dict (محصول، لمینتی؟) ← ``ClicheSummary`` کلیشه‌های فعال، با یک کوئری
+        یک‌بار در هر پروسس. با هر تغییر کلیشه (cm.carton.cache.mixin) دوباره
+        ساخته می‌شود.
+        """
+        self.flush_model(
+            [
+                "customer_product_id",
+                "cliche_cost",
+                "print_cost_per_1000",
+                "is_made",
+                "is_laminate",
+                "active",
+            ]
+        )
+        self.env.cr.execute(
+            """
+            SELECT customer_product_id,
+                   COALESCE(is_laminate, FALSE),
+                   sum(COALESCE(cliche_cost, 0)) FILTER (WHERE NOT is_made),
+                   sum(COALESCE(print_cost_per_1000, 0))
+              FROM cm_carton_cliche
+             WHERE active
+             GROUP BY 1, 2
+            """
+        )
+        return {
+            (product_id, laminated): pricing_engine.ClicheSummary(
+                new_cliche_cost=new_cost or 0.0,
+                print_cost_per_1000=print_cost or 0.0,
+            )
+            for product_id, laminated, new_cost, print_cost in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _get_cliche_summary(self, product_id, carton_type):
+        """
+        خلاصه کلیشه‌های فعال یک محصول که در کارتن ``carton_type`` به کار
+        می‌روند، یا None اگر چنین کلیشه‌ای ندارد.
+        """
+        return self._get_cliche_catalogue().get(
+            (product_id, carton_type == "laminated")
+        )
@@ -0,0 +1,161 @@
+from odoo import api, fields, models, tools
+
+from ..engine import pricing as pricing_engine
+
+
+class CartonCorrugator(models.Model):
+    _name = "cm.carton.corrugator"
+    _inherit = ["cm.carton.cache.mixin"]
+    _description = "دستگاه کروگیتور"
+    _order = "sequence, id"
+    _catalogue_fields = {
+        "sequence",
+        "company_id",
+        "active",
+        "trim_margin_cm",
+        "flat_margin_mm",
+        "glue_allowance_mm",
+        "max_speed_m_min",
+        "cost_per_linear_m",
+    }
+
+    # ----------------- شناسه دستگاه -----------------
+    name = fields.Char(
+        string="نام دستگاه",
+        required=True,
+        help="مثلاً: کروگیتور خط ۱ (BHS ۲۵۰۰)",
+    )
+
+    sequence = fields.Integer(
+        string="ترتیب",
+        default=10,
+        help="اولین دستگاه فعال شرکت، مرجع حاشیه‌ها و لب چسب در محاسبه ابعاد خوابیده است.",
+    )
+
+    company_id = fields.Many2one(
+        "res.company",
+        string="شرکت",
+        required=True,
+        default=lambda self: self.env.company,
+    )
+
+    active = fields.Boolean(
+        string="فعال؟",
+        default=True,
+    )
+
+    # ----------------- عرض‌های رول -----------------
+    width_ids = fields.One2many(
+        "cm.carton.corrugator.width",
+        "corrugator_id",
+        string="عرض‌های رول موجود",
+    )
+
+    # ----------------- حاشیه‌ها -----------------
+    trim_margin_cm = fields.Float(
+        string="حاشیه دو طرف عرض صنعتی (cm)",
+        default=pricing_engine.SHEET_SIDE_MARGIN_CM,
+    )
+
+    flat_margin_mm = fields.Float(
+        string="حاشیه هر طرف شیت (mm)",
+        default=pricing_engine.SIDE_MARGIN_MM,
+    )
+
+    glue_allowance_mm = fields.Float(
+        string="لب چسب کارتن معمولی (mm)",
+        default=pricing_engine.GLUE_ALLOWANCE_MM,
+    )
+
+    # ----------------- سرعت و هزینه -----------------
+    max_speed_m_min = fields.Float(
+        string="حداکثر سرعت (متر در دقیقه)",
+    )
+
+    cost_per_linear_m = fields.Monetary(
+        string="هزینه هر متر طول",
+        currency_field="currency_id",
+        help="هزینه اجرای دستگاه به ازای هر متر طول ورق (بدون قیمت کاغذ).",
+    )
+
+    currency_id = fields.Many2one(
+        "res.currency",
+        string="ارز",
+        default=lambda self: self.env.company.currency_id.id,
+    )
+
+    # ----------------- کش پارک ماشین‌آلات -----------------
+    @api.model
+    @tools.ormcache("self._get_catalogue_version()", "company_id")
+    def _get_machine_park(self, company_id):
+        """
+        پارک ماشین‌آلات یک شرکت برای موتور قیمت‌گذاری.
+
+        خروجی: (تاپلی از ``MachineSpec``، (حاشیه شیت mm، لب چسب mm))
+        در کش پروسس نگه داشته و با هر تغییر دستگاه/عرض پاک می‌شود.
+        """
+        machines = self.sudo().search(
+            [("company_id", "=", company_id), ("active", "=", True)]
+        )
+        specs = []
+        for machine in machines:
+            widths = tuple(
+                sorted(set(machine.width_ids.filtered("active").mapped("width_cm")))
+            )
+            if not widths:
+                continue
+            specs.append(
+                pricing_engine.MachineSpec(
+                    machine_id=machine.id,
+                    industrial_widths_cm=widths,
+                    side_margin_cm=machine.trim_margin_cm,
+                    cost_per_linear_m=machine.cost_per_linear_m or 0.0,
+                    max_speed_m_min=machine.max_speed_m_min or 0.0,
+                )
+            )
+
+        if machines:
+            allowances = (machines[0].flat_margin_mm, machines[0].glue_allowance_mm)
+        else:
+            allowances = (
+                pricing_engine.SIDE_MARGIN_MM,
+                pricing_engine.GLUE_ALLOWANCE_MM,
+            )
+        return tuple(specs), allowances
+
+
+class CartonCorrugatorWidth(models.Model):
+    _name = "cm.carton.corrugator.width"
+    _inherit = ["cm.carton.cache.mixin"]
+    _description = "عرض رول کروگیتور"
+    _order = "width_cm asc"
+    _catalogue_fields = {
+        "corrugator_id",
+        "width_cm",
+        "active",
+    }
+
+    corrugator_id = fields.Many2one(
+        "cm.carton.corrugator",
+        string="کروگیتور",
+        required=True,
+        ondelete="cascade",
+    )
+
+    width_cm = fields.Float(
+        string="عرض صنعتی (cm)",
+        required=True,
+    )
+
+    active = fields.Boolean(
+        string="فعال؟",
+        default=True,
+    )
+
+    _sql_constraints = [
+        (
+            "width_unique",
+            "unique(corrugator_id, width_cm)",
+            "این عرض قبلاً برای این دستگاه ثبت شده است.",
+        ),
+    ]
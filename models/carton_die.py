@@ -1,10 +1,22 @@
-from odoo import models, fields, _
+from odoo import api, models, fields, tools, _
+from odoo.tools.sql import create_index
+
+from ..engine import die_index
+
+# تلورانس پیش‌فرض تطبیق ابعاد قالب (mm)؛ با پارامتر سیستمی قابل تغییر است
+DIE_MATCH_TOLERANCE_MM = 5.0
 
 
 class CartonDie(models.Model):
     _name = "cm.carton.die"
+    _inherit = ["cm.carton.cache.mixin"]
     _description = "قالب دایکات / لمینتی"
     _order = "name asc"
+    _catalogue_fields = {
+        "active",
+        "blade_length_mm",
+        "blade_width_mm",
+    }
 
     # ----------------- شناسه قالب -----------------
     name = fields.Char(
@@ -26,6 +38,11 @@ class CartonDie(models.Model):
         help="اگر این قالب مخصوص یک محصول خاص مشتری است، اینجا انتخاب کن."
     )
 
+    partner_id = fields.Many2one(
+        "res.partner",
+        string="سازنده / چاپخانه",
+    )
+
     # ----------------- ابعاد تیغه به تیغه -----------------
     blade_width_mm = fields.Float(
         string="عرض تیغه به تیغه (mm)",
@@ -54,6 +71,42 @@ class CartonDie(models.Model):
         help="هزینه یک‌باره ساخت این قالب (برای استهلاک روی سفارش‌ها در نظر گرفته می‌شود)."
     )
 
+    # ----------------- استهلاک قالب -----------------
+    lifetime_sheets = fields.Integer(
+        string="عمر مورد انتظار (تعداد ورق)",
+        help="تعداد ورقی که قالب تا فرسودگی می‌زند. هزینه ساخت به نسبت ورق‌های هر "
+             "سفارش از ارزش دفتری کم می‌شود؛ اگر خالی باشد، کل ارزش دفتری روی "
+             "اولین سفارش می‌نشیند."
+    )
+
+    usage_ids = fields.One2many(
+        "cm.carton.die.usage",
+        "die_id",
+        string="دفتر مصرف قالب",
+    )
+
+    sheets_run = fields.Integer(
+        string="ورق‌های زده‌شده",
+        compute="_compute_sheets_run",
+        store=True,
+        help="جمع ورق‌های ثبت‌شده در دفتر مصرف قالب."
+    )
+
+    cost_per_sheet = fields.Float(
+        string="استهلاک هر ورق",
+        compute="_compute_book_value",
+        store=True,
+        digits=(16, 6),
+    )
+
+    book_value = fields.Monetary(
+        string="ارزش دفتری باقیمانده",
+        currency_field="currency_id",
+        compute="_compute_book_value",
+        store=True,
+        help="بخشی از هزینه ساخت قالب که هنوز روی هیچ سفارشی نیامده است."
+    )
+
     # ----------------- فایل‌های طرح قالب -----------------
     design_attachment_ids = fields.Many2many(
         "ir.attachment",
@@ -68,7 +121,7 @@ class CartonDie(models.Model):
     )
 
     # ----------------- وضعیت و ارز -----------------
-    is_active = fields.Boolean(
+    active = fields.Boolean(
         string="فعال؟",
         default=True,
         help="اگر قالب از رده خارج شد، می‌توانی تیک فعال را برداری تا دیگر در انتخاب‌ها نیاید."
@@ -80,20 +133,154 @@ class CartonDie(models.Model):
         default=lambda self: self.env.company.currency_id.id,
     )
 
+    @api.depends("usage_ids.sheets")
+    def _compute_sheets_run(self):
+        # یک read_group روی ایندکس die_id دفتر مصرف، به جای پیمایش سفارش‌ها
+        sheets = dict(
+            self.env["cm.carton.die.usage"]._read_group(
+                [("die_id", "in", self.ids)], ["die_id"], ["sheets:sum"]
+            )
+        )
+        for rec in self:
+            rec.sheets_run = sheets.get(rec._origin, 0)
+
+    @api.depends("die_cost", "lifetime_sheets", "sheets_run")
+    def _compute_book_value(self):
+        for rec in self:
+            die_cost = rec.die_cost or 0.0
+            if rec.lifetime_sheets > 0:
+                rec.cost_per_sheet = die_cost / rec.lifetime_sheets
+                rec.book_value = max(
+                    die_cost - rec.sheets_run * rec.cost_per_sheet, 0.0
+                )
+            else:
+                rec.cost_per_sheet = 0.0
+                rec.book_value = 0.0 if rec.sheets_run else die_cost
+
+    def init(self):
+        super().init()
+        create_index(
+            self.env.cr,
+            "cm_carton_die_blade_dims_idx",
+            self._table,
+            ["blade_length_mm", "blade_width_mm"],
+        )
+
+    # ----------------- جستجوی قالب با ابعاد نزدیک -----------------
+    @api.model
+    @tools.ormcache("self._get_catalogue_version()")
+    def _get_die_index(self):
+        """
+        ایندکس مرتب قالب‌های فعال بر اساس ابعاد تیغه به تیغ، یک‌بار در هر پروسس.
+        با هر تغییر قالب (cm.carton.cache.mixin) دوباره ساخته می‌شود.
+        """
+        self.flush_model(["active", "blade_length_mm", "blade_width_mm"])
+        self.env.cr.execute(
+            """
+            SELECT id, blade_length_mm, blade_width_mm
+              FROM cm_carton_die
+             WHERE active
+               AND blade_length_mm > 0
+               AND blade_width_mm > 0
+            """
+        )
+        return die_index.DieIndex(
+            die_index.DieEntry(die_id, length, width)
+            for die_id, length, width in self.env.cr.fetchall()
+        )
+
+    @api.model
+    def _get_match_tolerance(self):
+        return float(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "cm_carton_pricing.die_match_tolerance_mm", DIE_MATCH_TOLERANCE_MM
+            )
+        )
+
+    @api.model
+    def _find_fitting_dies(self, length_mm, width_mm, tolerance_mm=None, limit=10):
+        """
+        قالب‌های موجود با ابعاد نزدیک، به ترتیب نزدیکی (جستجو در حافظه).
+        """
+        if tolerance_mm is None:
+            tolerance_mm = self._get_match_tolerance()
+        matches = self._get_die_index().nearest(
+            length_mm or 0.0, width_mm or 0.0, tolerance_mm, limit=limit
+        )
+        return self.browse([m.die_id for m in matches])
+
+    @api.model
+    def _fitting_domain(self, length_mm, width_mm, tolerance_mm=None):
+        """دامنه‌ی بازه‌ای معادل، برای لیست‌ها (از ایندکس ابعاد استفاده می‌کند)."""
+        if tolerance_mm is None:
+            tolerance_mm = self._get_match_tolerance()
+        return [
+            ("active", "=", True),
+            ("blade_length_mm", ">=", length_mm - tolerance_mm),
+            ("blade_length_mm", "<=", length_mm + tolerance_mm),
+            ("blade_width_mm", ">=", width_mm - tolerance_mm),
+            ("blade_width_mm", "<=", width_mm + tolerance_mm),
+        ]
+
+    def action_assign_to_product(self):
+        """دکمه «استفاده از این قالب» در پیشنهادهای فرم محصول مشتری."""
+        self.ensure_one()
+        product_id = self.env.context.get("cm_carton_product_id")
+        if product_id:
+            self.env["cm.carton.customer_product"].browse(product_id).die_id = self
+
     # ----------------- نمایش نام در دراپ‌داون‌ها -----------------
-    def name_get(self):
+    @api.depends("name", "code", "customer_product_id.display_name")
+    def _compute_display_name(self):
         """
         نمایش قالب به صورت:
         «نام قالب [کد] - محصول مشتری»
         تا در انتخاب‌ها راحت‌تر تشخیص داده شود.
         """
-        result = []
         for rec in self:
-            parts = [rec.name]
+            parts = [rec.name or ""]
             if rec.code:
                 parts.append(f"[{rec.code}]")
             if rec.customer_product_id:
-                parts.append(rec.customer_product_id.display_name or rec.customer_product_id.name)
-            name = " - ".join(parts)
-            result.append((rec.id, name))
-        return result
+                parts.append(rec.customer_product_id.display_name)
+            rec.display_name = " - ".join(parts)
+
+
+class CartonDieUsage(models.Model):
+    _name = "cm.carton.die.usage"
+    _description = "دفتر مصرف قالب"
+    _order = "date desc, id desc"
+
+    die_id = fields.Many2one(
+        "cm.carton.die",
+        string="قالب",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    date = fields.Date(
+        string="تاریخ",
+        required=True,
+        default=fields.Date.context_today,
+    )
+
+    sheets = fields.Integer(
+        string="تعداد ورق",
+        required=True,
+    )
+
+    price_inquiry_id = fields.Many2one(
+        "cm.carton.price_inquiry",
+        string="استعلام قیمت",
+        ondelete="set null",
+        index=True,
+    )
+
+    sale_order_id = fields.Many2one(
+        "sale.order",
+        string="سفارش فروش",
+        ondelete="set null",
+    )
@@ -0,0 +1,355 @@
+import logging
+import time
+
+from psycopg2 import errors as pg_errors
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# خطاهای هم‌زمانی که تکرار همان chunk معمولاً حلشان می‌کند
+CONCURRENCY_ERRORS = (
+    pg_errors.SerializationFailure,
+    pg_errors.DeadlockDetected,
+    pg_errors.LockNotAvailable,
+)
+MAX_CHUNK_RETRIES = 5
+# سقف فاصله (ثانیه) تا تکرار chunkی که به تداخل خورده
+MAX_RETRY_DELAY_S = 30
+# سقف زمان هر اجرای کرون؛ باقی کار با trigger بعدی ادامه پیدا می‌کند
+CRON_TIME_BUDGET_S = 240
+DEFAULT_CHUNK_SIZE = 50
+# اکشن‌هایی که رکوردهای یک مشتری را با هم پردازش می‌کنند و chunk نباید
+# استعلام‌های یک مشتری را از هم جدا کند
+PARTNER_GROUPED_METHODS = ("action_accept_merged",)
+
+
+class CartonJob(models.Model):
+    """
+    اجرای پس‌زمینه‌ی اکشن‌های استعلام روی تعداد زیادی رکورد.
+
+    رکوردها به chunk تقسیم و هر chunk در کرون اجرا و commit می‌شود؛
+    پیشرفت روی همین رکورد ثبت می‌شود.
+    """
+
+    _name = "cm.carton.job"
+    _description = "کار پس‌زمینه استعلام قیمت"
+    _order = "id desc"
+
+    name = fields.Char(
+        string="عنوان",
+        required=True,
+    )
+
+    method = fields.Selection(
+        [
+            ("action_compute", "محاسبه"),
+            ("action_mark_sent", "ارسال به مشتری"),
+            ("action_accept", "تأیید مشتری"),
+            ("action_accept_merged", "تأیید مشتری (سفارش واحد هر مشتری)"),
+        ],
+        string="اکشن",
+        required=True,
+    )
+
+    state = fields.Selection(
+        [
+            ("pending", "در صف"),
+            ("running", "در حال اجرا"),
+            ("done", "انجام شد"),
+            ("failed", "انجام شد با خطا"),
+        ],
+        string="وضعیت",
+        default="pending",
+        required=True,
+        index=True,
+    )
+
+    res_ids = fields.Json(
+        string="شناسه رکوردها",
+        required=True,
+    )
+
+    chunk_size = fields.Integer(
+        string="اندازه هر بخش",
+        default=DEFAULT_CHUNK_SIZE,
+    )
+
+    total_count = fields.Integer(
+        string="تعداد کل",
+        readonly=True,
+    )
+
+    processed_count = fields.Integer(
+        string="پردازش‌شده",
+        readonly=True,
+    )
+
+    failed_count = fields.Integer(
+        string="ناموفق",
+        readonly=True,
+    )
+
+    retry_count = fields.Integer(
+        string="تعداد تکرار به علت تداخل",
+        readonly=True,
+    )
+
+    chunk_retry_count = fields.Integer(
+        string="تکرارهای chunk جاری",
+        readonly=True,
+    )
+
+    retry_at = fields.Datetime(
+        string="تکرار بعدی",
+        readonly=True,
+        help="chunk جاری به تداخل خورده و تا این زمان دوباره اجرا نمی‌شود.",
+    )
+
+    progress = fields.Float(
+        string="پیشرفت (%)",
+        compute="_compute_progress",
+    )
+
+    error_log = fields.Text(
+        string="خطاها",
+        readonly=True,
+    )
+
+    user_id = fields.Many2one(
+        "res.users",
+        string="درخواست‌دهنده",
+        required=True,
+        default=lambda self: self.env.user,
+    )
+
+    company_id = fields.Many2one(
+        "res.company",
+        string="شرکت",
+        required=True,
+        default=lambda self: self.env.company,
+    )
+
+    date_start = fields.Datetime(string="شروع", readonly=True)
+    date_end = fields.Datetime(string="پایان", readonly=True)
+
+    @api.depends("processed_count", "total_count")
+    def _compute_progress(self):
+        for job in self:
+            job.progress = (
+                100.0 * job.processed_count / job.total_count
+                if job.total_count
+                else 0.0
+            )
+
+    # -----------------------------------------------------
+    #   صف
+    # -----------------------------------------------------
+    @api.model
+    def _enqueue(self, records, method, chunk_size=DEFAULT_CHUNK_SIZE):
+        if method not in dict(self._fields["method"].selection):
+            raise UserError(
+                _("اکشن «%s» برای اجرای پس‌زمینه پشتیبانی نمی‌شود.", method)
+            )
+        if method in PARTNER_GROUPED_METHODS:
+            # استعلام‌های هر مشتری پشت سر هم، تا chunkها در مرز مشتری بریده شوند
+            records = records.sorted(lambda r: (r.partner_id.id, r.id))
+        job = self.create(
+            {
+                "name": _(
+                    "%(action)s برای %(count)s استعلام",
+                    action=dict(self._fields["method"].selection)[method],
+                    count=len(records),
+                ),
+                "method": method,
+                "res_ids": records.ids,
+                "total_count": len(records),
+                "chunk_size": chunk_size,
+            }
+        )
+        self._get_cron().sudo()._trigger()
+        return job
+
+    @api.model
+    def _get_cron(self):
+        return self.env.ref("cm_carton_pricing.ir_cron_cm_carton_job")
+
+    def action_open(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("کار پس‌زمینه"),
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "current",
+        }
+
+    # -----------------------------------------------------
+    #   اجرا در کرون
+    # -----------------------------------------------------
+    @api.model
+    def _cron_process_jobs(self):
+        deadline = time.monotonic() + CRON_TIME_BUDGET_S
+        now = fields.Datetime.now()
+        jobs = self.search(
+            [
+                ("state", "in", ("pending", "running")),
+                "|",
+                ("retry_at", "=", False),
+                ("retry_at", "<=", now),
+            ],
+            order="id",
+        )
+        for job in jobs:
+            if not job._process(deadline):
+                # وقت این اجرا تمام شد؛ ادامه در اجرای بعدی کرون
+                self._get_cron().sudo()._trigger()
+                return
+
+    def _process(self, deadline):
+        """
+        chunkها را تا پایان کار یا رسیدن به ``deadline`` اجرا می‌کند.
+
+        اگر chunkی به تداخل بخورد، کار با ``retry_at`` برای بعد زمان‌بندی
+        می‌شود و کرون بدون انتظار سراغ کار بعدی می‌رود.
+        """
+        self.ensure_one()
+        if self.state == "pending":
+            self.write({"state": "running", "date_start": fields.Datetime.now()})
+            self.env.cr.commit()
+
+        ids = self.res_ids or []
+        chunk_size = max(self.chunk_size or DEFAULT_CHUNK_SIZE, 1)
+        partner_of = self._get_partner_map(ids[self.processed_count :])
+        while self.processed_count < len(ids):
+            if time.monotonic() > deadline:
+                return False
+            start = self.processed_count
+            end = start + chunk_size
+            if partner_of:
+                # chunk تا آخرین استعلام همان مشتری ادامه پیدا می‌کند
+                while end < len(ids) and partner_of.get(ids[end]) == partner_of.get(
+                    ids[end - 1]
+                ):
+                    end += 1
+            chunk = ids[start:end]
+            failures = self._run_chunk(
+                chunk,
+                per_unit=self.chunk_retry_count >= MAX_CHUNK_RETRIES,
+                partner_of=partner_of,
+            )
+            if failures is None:
+                self._schedule_retry()
+                return True
+
+            vals = {
+                "processed_count": start + len(chunk),
+                "failed_count": self.failed_count + len(failures),
+                "chunk_retry_count": 0,
+                "retry_at": False,
+            }
+            if failures:
+                lines = [f"#{res_id}: {message}" for res_id, message in failures]
+                vals["error_log"] = "\n".join(filter(None, [self.error_log] + lines))
+            self.write(vals)
+            self.env.cr.commit()
+
+        self.write(
+            {
+                "state": "failed" if self.failed_count else "done",
+                "date_end": fields.Datetime.now(),
+            }
+        )
+        self.env.cr.commit()
+        return True
+
+    def _schedule_retry(self):
+        """
+        chunk جاری به تداخل خورده و rollback شده: تکرار بعدی با فاصله‌ی
+        نمایی به کرون سپرده می‌شود تا worker و قفل کار آزاد بمانند.
+        """
+        retries = self.chunk_retry_count + 1
+        retry_at = fields.Datetime.add(
+            fields.Datetime.now(), seconds=min(2**retries, MAX_RETRY_DELAY_S)
+        )
+        self.write(
+            {
+                "retry_count": self.retry_count + 1,
+                "chunk_retry_count": retries,
+                "retry_at": retry_at,
+            }
+        )
+        self.env.cr.commit()
+        self._get_cron().sudo()._trigger(at=retry_at)
+
+    def _get_partner_map(self, ids):
+        """
+        dict استعلام ← مشتری برای اکشن‌های ``PARTNER_GROUPED_METHODS``؛
+        برای بقیه‌ی اکشن‌ها dict خالی (chunkهای ثابت).
+        """
+        if self.method not in PARTNER_GROUPED_METHODS or not ids:
+            return {}
+        inquiries = self._job_records(ids)
+        inquiries.fetch(["partner_id"])
+        return {rec.id: rec.partner_id.id for rec in inquiries}
+
+    def _job_records(self, ids):
+        return (
+            self.env["cm.carton.price_inquiry"]
+            .with_user(self.user_id)
+            .with_company(self.company_id)
+            .with_context(cm_carton_job_id=self.id)
+            .browse(ids)
+            .exists()
+        )
+
+    def _run_chunk(self, ids, per_unit=False, partner_of=None):
+        """
+        یک chunk را اجرا می‌کند. خروجی: لیست (id، پیام خطا)، یا None اگر
+        chunk به خطای هم‌زمانی (serialization/deadlock/lock) خورده و rollback
+        شده تا بعداً تکرار شود.
+
+        خطای دیگر (یا ``per_unit`` بعد از تمام شدن تکرارها) باعث اجرای جداگانه
+        هر واحد با savepoint می‌شود تا فقط واحدهای مشکل‌دار کنار گذاشته شوند.
+        واحد برای اکشن‌های ``PARTNER_GROUPED_METHODS`` همه استعلام‌های یک
+        مشتری است (یک سفارش برای هر مشتری)، و برای بقیه تک رکورد.
+        """
+        cr = self.env.cr
+        if not per_unit:
+            records = self._job_records(ids)
+            try:
+                getattr(records, self.method)()
+                records.env.flush_all()
+                return []
+            except CONCURRENCY_ERRORS:
+                cr.rollback()
+                self.env.invalidate_all()
+                return None
+            except Exception:
+                cr.rollback()
+                self.env.invalidate_all()
+
+        failures = []
+        for unit_ids in self._split_units(ids, partner_of or {}):
+            records = self._job_records(unit_ids)
+            try:
+                with cr.savepoint():
+                    getattr(records, self.method)()
+                    records.env.flush_all()
+            except Exception as e:
+                _logger.info(
+                    "cm.carton.job %s: records %s failed: %s", self.id, records.ids, e
+                )
+                failures.extend((res_id, str(e)) for res_id in records.ids)
+        return failures
+
+    def _split_units(self, ids, partner_of):
+        """شناسه‌های chunk، گروه‌بندی‌شده به واحدهای اجرای جداگانه."""
+        if not partner_of:
+            return [[res_id] for res_id in ids]
+        units = {}
+        for res_id in ids:
+            units.setdefault(partner_of.get(res_id), []).append(res_id)
+        return list(units.values())
@@ -1,8 +1,45 @@
 # cm_carton_pricing/models/carton_models.py
-from math import floor, ceil
+import logging
+from collections import defaultdict
+from math import ceil
 
-from odoo import api, fields, models, _
+from markupsafe import escape
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+
+from ..engine import batch as batch_engine
+from ..engine import pricing as pricing_engine
+
+_logger = logging.getLogger(__name__)
+
+# بیش از این تعداد رکورد، اکشن‌ها در صف کرون اجرا می‌شوند
+QUEUE_THRESHOLD = 100
+
+SUB_QUOTE_TYPES = ("design", "print", "staple", "punch", "pallet", "shipping")
+SUB_QUOTE_READY_STATES = ("received", "approved")
+
+# تیراژ استعلام وقتی محصول تیراژ پیش‌فرض ندارد
+DEFAULT_QUANTITY = 1000
+
+# کلیدهای پاسخ تخمین قیمت عمومی (بدون داده‌های هزینه)
+PUBLIC_ESTIMATE_KEYS = (
+    "flat_length_mm",
+    "flat_width_mm",
+    "sale_price_cash",
+    "sale_price_credit",
+    "unit_price_with_tax",
+    "total_price_with_tax",
+    "currency",
+)
+PUBLIC_ESTIMATE_LAYOUT_KEYS = (
+    "industrial_width_cm",
+    "orientation",
+    "carton_per_row",
+    "rotated_per_row",
+    "total_length_cm",
+)
 
 
 # =========================================================
@@ -68,6 +105,13 @@ class CartonCustomerProduct(models.Model):
         string="گام فلوت پیشنهادی",
     )
 
+    board_grade_id = fields.Many2one(
+        "cm.carton.board_grade",
+        string="گرید ورق",
+        domain="[('layer_count', '=', layer_count), ('flute_step', '=', flute_step)]",
+        help="ترکیب کاغذهای ورق؛ قیمت هر مترمربع در استعلام از روی آن محاسبه می‌شود.",
+    )
+
     # ----------------- ساختار و درب -----------------
     piece_type = fields.Selection(
         [
@@ -133,6 +177,14 @@ class CartonCustomerProduct(models.Model):
         ondelete="set null",
     )
 
+    suggested_die_ids = fields.Many2many(
+        "cm.carton.die",
+        string="قالب‌های موجود با ابعاد نزدیک",
+        compute="_compute_suggested_die_ids",
+        help="برای محصول دایکاتی/لمینتی بدون قالب، قالب‌های موجود با ابعاد بلنک "
+        "نزدیک پیشنهاد می‌شوند تا به جای ساخت قالب جدید استفاده شوند.",
+    )
+
     cliche_ids = fields.One2many(
         comodel_name="cm.carton.cliche",
         inverse_name="customer_product_id",
@@ -148,6 +200,44 @@ class CartonCustomerProduct(models.Model):
         store=True,
     )
 
+    def _estimate_blank_dims_mm(self):
+        """
+        ابعاد تقریبی بلنک (طول، عرض) از ابعاد کارتن، با همان فرمول ابعاد
+        خوابیده‌ی کارتن معمولی و بدون حاشیه‌ی شیت.
+        """
+        self.ensure_one()
+        return pricing_engine.compute_flat_dimensions(
+            pricing_engine.PricingInput(
+                carton_type="normal",
+                length_cm=self.length or 0.0,
+                width_cm=self.width or 0.0,
+                height_cm=self.height or 0.0,
+                side_margin_mm=0.0,
+            )
+        )
+
+    @api.depends("carton_type", "length", "width", "height", "die_id")
+    def _compute_suggested_die_ids(self):
+        Die = self.env["cm.carton.die"]
+        for rec in self:
+            if (
+                rec.die_id
+                or rec.carton_type not in ("diecut", "laminated")
+                or not (rec.length and rec.width and rec.height)
+            ):
+                rec.suggested_die_ids = False
+                continue
+            length_mm, width_mm = rec._estimate_blank_dims_mm()
+            rec.suggested_die_ids = Die._find_fitting_dies(length_mm, width_mm)
+
+    def _get_draft_inquiries(self):
+        """استعلام‌های پیش‌نویس این محصولات."""
+        if not self:
+            return self.env["cm.carton.price_inquiry"]
+        return self.env["cm.carton.price_inquiry"].search(
+            [("customer_product_id", "in", self.ids), ("state", "=", "draft")]
+        )
+
     @api.depends("partner_id", "name", "code")
     def _compute_display_name(self):
         for rec in self:
@@ -180,6 +270,9 @@ class CartonPriceInquiry(models.Model):
         ("rejected", "رد شده"),
     ]
 
+    # وضعیت‌هایی که هنوز نیاز به پیگیری دارند (داشبورد «در انتظار»)
+    PENDING_STATES = ("draft", "waiting_quotes", "calculated", "sent")
+
     FLOW_MODE_SELECTION = [
         ("quick", "مسیر سریع (محاسبه مستقیم)"),
         ("full", "مسیر کامل با استعلام طراحی/چاپ/منگنه/حمل/پالت"),
@@ -197,6 +290,7 @@ class CartonPriceInquiry(models.Model):
         "cm.carton.customer_product",
         string="محصول اختصاصی مشتری",
         domain="[('partner_id', '=', partner_id)]",
+        index=True,
         tracking=True,
     )
 
@@ -211,14 +305,20 @@ class CartonPriceInquiry(models.Model):
     quantity = fields.Integer(
         string="تیراژ (تعداد کارتن)",
         required=True,
-        default=1000,
+        compute="_compute_quantity",
+        store=True,
+        readonly=False,
+        precompute=True,
         tracking=True,
     )
 
     flow_mode = fields.Selection(
         FLOW_MODE_SELECTION,
         string="نوع فرآیند استعلام",
-        default="quick",
+        compute="_compute_flow_mode",
+        store=True,
+        readonly=False,
+        precompute=True,
         tracking=True,
         help=(
             "مسیر سریع: برای کارهای ورق و کارتن معمولی ساده یا کارهایی که قبلاً تولید شده‌اند و "
@@ -241,12 +341,48 @@ class CartonPriceInquiry(models.Model):
     )
 
     # ----------------- نیاز به استعلام‌های جزئی -----------------
-    need_design_quote = fields.Boolean(string="نیاز به استعلام طراحی/کلیشه؟")
-    need_print_quote = fields.Boolean(string="نیاز به استعلام چاپ؟")
-    need_staple_quote = fields.Boolean(string="نیاز به استعلام منگنه؟")
-    need_punch_quote = fields.Boolean(string="نیاز به استعلام پانچ؟")
-    need_pallet_quote = fields.Boolean(string="نیاز به استعلام پالت‌کشی؟")
-    need_shipping_quote = fields.Boolean(string="نیاز به استعلام حمل؟")
+    need_design_quote = fields.Boolean(
+        string="نیاز به استعلام طراحی/کلیشه؟",
+        compute="_compute_need_quotes",
+        store=True,
+        readonly=False,
+        precompute=True,
+    )
+    need_print_quote = fields.Boolean(
+        string="نیاز به استعلام چاپ؟",
+        compute="_compute_need_quotes",
+        store=True,
+        readonly=False,
+        precompute=True,
+    )
+    need_staple_quote = fields.Boolean(
+        string="نیاز به استعلام منگنه؟",
+        compute="_compute_need_quotes",
+        store=True,
+        readonly=False,
+        precompute=True,
+    )
+    need_punch_quote = fields.Boolean(
+        string="نیاز به استعلام پانچ؟",
+        compute="_compute_need_quotes",
+        store=True,
+        readonly=False,
+        precompute=True,
+    )
+    need_pallet_quote = fields.Boolean(
+        string="نیاز به استعلام پالت‌کشی؟",
+        compute="_compute_need_quotes",
+        store=True,
+        readonly=False,
+        precompute=True,
+    )
+    need_shipping_quote = fields.Boolean(
+        string="نیاز به استعلام حمل؟",
+        compute="_compute_need_quotes",
+        store=True,
+        readonly=False,
+        precompute=True,
+    )
 
     sub_quote_ids = fields.One2many(
         comodel_name="cm.carton.sub_quote",
@@ -254,6 +390,58 @@ class CartonPriceInquiry(models.Model):
         string="استعلامات جزئی",
     )
 
+    # ----------------- جمع استعلام‌های جزئی (ذخیره‌شده) -----------------
+    sub_quotes_ready = fields.Boolean(
+        string="استعلام‌های جزئی کامل؟",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+        index=True,
+        help="در مسیر سریع همیشه بله؛ در مسیر کامل وقتی همه‌ی استعلام‌های اجباری "
+        "هزینه دارند و دریافت/تأیید شده‌اند.",
+    )
+
+    sub_quote_design_cost = fields.Monetary(
+        string="هزینه استعلام طراحی",
+        currency_field="currency_id",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+    )
+
+    sub_quote_print_cost = fields.Monetary(
+        string="هزینه استعلام چاپ",
+        currency_field="currency_id",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+    )
+
+    sub_quote_staple_cost = fields.Monetary(
+        string="هزینه استعلام منگنه",
+        currency_field="currency_id",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+    )
+
+    sub_quote_punch_cost = fields.Monetary(
+        string="هزینه استعلام پانچ",
+        currency_field="currency_id",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+    )
+
+    sub_quote_pallet_cost = fields.Monetary(
+        string="هزینه استعلام پالت‌کشی",
+        currency_field="currency_id",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+    )
+
+    sub_quote_shipping_cost = fields.Monetary(
+        string="هزینه استعلام حمل",
+        currency_field="currency_id",
+        compute="_compute_sub_quote_aggregates",
+        store=True,
+    )
+
     # ----------------- ابعاد شیت / قالب -----------------
     flat_width_mm = fields.Float(
         string="عرض خوابیده روی ورق (mm)",
@@ -281,16 +469,48 @@ class CartonPriceInquiry(models.Model):
         tracking=True,
     )
 
+    corrugator_id = fields.Many2one(
+        "cm.carton.corrugator",
+        string="کروگیتور انتخاب‌شده",
+        help="دستگاهی که ارزان‌ترین ترکیب دستگاه/عرض را دارد یا اپراتور انتخاب می‌کند.",
+        tracking=True,
+    )
+
     suggestion_ids = fields.One2many(
         comodel_name="cm.carton.sheet_suggestion",
         inverse_name="price_inquiry_id",
         string="پیشنهادهای عرض ورق",
     )
 
+    suggestion_input_key = fields.Char(
+        string="کلید ورودی پیشنهادها",
+        readonly=True,
+        copy=False,
+        help="اثر انگشت ابعاد/تیراژ/عرض‌ها در آخرین ساخت پیشنهادها؛ "
+        "اگر تغییر نکند، پیشنهادها دوباره ساخته نمی‌شوند.",
+    )
+
+    pricing_fingerprint = fields.Char(
+        string="اثر انگشت ورودی‌های قیمت‌گذاری",
+        readonly=True,
+        copy=False,
+        help="هش همه‌ی ورودی‌های آخرین محاسبه؛ اگر تغییر نکند، محاسبه تکرار نمی‌شود.",
+    )
+
     # ----------------- هزینه‌ها -----------------
+    board_grade_id = fields.Many2one(
+        "cm.carton.board_grade",
+        string="گرید ورق",
+        compute="_compute_board_grade_id",
+        store=True,
+        readonly=False,
+        help="پیش‌فرض از محصول مشتری؛ اگر تعیین شود قیمت هر مترمربع ورق از روی آن محاسبه می‌شود.",
+    )
+
     paper_price_per_m2 = fields.Float(
         string="قیمت هر مترمربع ورق (ترکیب کاغذها)",
-        help="در نسخه‌ی پیشرفته می‌توانی از BOM و قیمت کاغذ استفاده کنی.",
+        help="اگر گرید ورق انتخاب شده باشد، هنگام محاسبه از قیمت روز کاغذها پر می‌شود؛ "
+        "در غیر این صورت دستی وارد کنید.",
     )
 
     material_cost_total = fields.Monetary(
@@ -313,6 +533,13 @@ class CartonPriceInquiry(models.Model):
         string="هزینه کلیشه",
         currency_field="currency_id",
     )
+    print_cost_total = fields.Monetary(
+        string="هزینه چاپ (از کلیشه‌ها)",
+        currency_field="currency_id",
+        compute="_compute_print_cost_total",
+        help="تیراژ × هزینه چاپ هر ۱۰۰۰ کارتن کلیشه‌های فعال محصول؛ "
+        "در قیمت نهایی لحاظ می‌شود.",
+    )
     design_cost = fields.Monetary(
         string="هزینه طراحی",
         currency_field="currency_id",
@@ -380,6 +607,19 @@ class CartonPriceInquiry(models.Model):
         readonly=True,
     )
 
+    # ----------------- پلکان قیمت -----------------
+    price_break_quantities = fields.Char(
+        string="تیراژهای پلکان قیمت",
+        default="1000,3000,5000,10000,20000",
+        help="تیراژها را با کاما جدا کنید؛ قیمت همه در یک محاسبه به دست می‌آید.",
+    )
+
+    price_break_ids = fields.One2many(
+        comodel_name="cm.carton.price_break",
+        inverse_name="price_inquiry_id",
+        string="پلکان قیمت",
+    )
+
     currency_id = fields.Many2one(
         "res.currency",
         string="ارز",
@@ -396,7 +636,8 @@ class CartonPriceInquiry(models.Model):
     is_pending = fields.Boolean(
         string="در انتظار اقدام؟",
         compute="_compute_is_pending",
-        store=False,
+        store=True,
+        index=True,
     )
 
     sale_order_id = fields.Many2one(
@@ -420,37 +661,93 @@ class CartonPriceInquiry(models.Model):
     # =====================================================
     #   کمکی‌ها
     # =====================================================
+    def init(self):
+        """
+        ایندکس‌های لیست و داشبورد استعلام‌ها:
+          - (state, create_date) برای فیلتر وضعیت با ترتیب پیش‌فرض مدل
+          - (partner_id, customer_product_id) برای استعلام‌های یک مشتری/محصول
+          - ایندکس جزئی روی create_date فقط برای وضعیت‌های باز
+          - write_date برای به‌روزرسانی تدریجی گزارش تحلیل قیمت‌گذاری
+        """
+        super().init()
+        create_index(
+            self.env.cr,
+            "cm_carton_price_inquiry_state_create_date_idx",
+            self._table,
+            ["state", "create_date DESC"],
+        )
+        create_index(
+            self.env.cr,
+            "cm_carton_price_inquiry_partner_product_idx",
+            self._table,
+            ["partner_id", "customer_product_id"],
+        )
+        create_index(
+            self.env.cr,
+            "cm_carton_price_inquiry_pending_create_date_idx",
+            self._table,
+            ["create_date DESC"],
+            where="state IN ({})".format(
+                ", ".join("'%s'" % state for state in self.PENDING_STATES)
+            ),
+        )
+        create_index(
+            self.env.cr,
+            "cm_carton_price_inquiry_write_date_idx",
+            self._table,
+            ["write_date"],
+        )
+
     @api.depends("state")
     def _compute_is_pending(self):
         for rec in self:
-            rec.is_pending = rec.state in (
-                "draft",
-                "waiting_quotes",
-                "calculated",
-                "sent",
-            )
+            rec.is_pending = rec.state in self.PENDING_STATES
 
-    @api.onchange("customer_product_id")
-    def _onchange_customer_product_id(self):
-        """براساس محصول، مسیر سریع/کامل و نیاز به استعلامات را حدس می‌زند."""
+    # ----------------- پیش‌فرض‌ها از روی محصول -----------------
+    # فقط پیش‌نویس‌ها دنبال محصول می‌روند؛ تغییر محصول (مثلاً «قبلاً تولید
+    # شده» هنگام تأیید) استعلام‌های قیمت‌خورده را بازنویسی نمی‌کند
+    @api.depends("customer_product_id")
+    def _compute_quantity(self):
+        """
+        تیراژ پیشنهادی محصول هنگام انتخاب/تغییر محصول. ``default_quantity``
+        عمداً در depends نیست تا ویرایش محصول تیراژ استعلام‌های باز را عوض
+        نکند.
+        """
         for rec in self:
-            product = rec.customer_product_id
-            if not product:
-                rec.flow_mode = "quick"
-                rec.need_design_quote = False
-                rec.need_print_quote = False
-                rec.need_staple_quote = False
-                rec.need_punch_quote = False
-                rec.need_pallet_quote = False
-                rec.need_shipping_quote = False
+            if rec.id and rec.state != "draft":
                 continue
+            if rec.customer_product_id.default_quantity:
+                rec.quantity = rec.customer_product_id.default_quantity
+            elif not rec.quantity:
+                rec.quantity = DEFAULT_QUANTITY
+
+    @api.depends(
+        "customer_product_id.has_print",
+        "customer_product_id.has_new_cliche_default",
+        "customer_product_id.has_mankan_default",
+        "customer_product_id.has_punch_default",
+        "customer_product_id.has_pallet_wrap_default",
+        "carton_type",
+    )
+    def _compute_need_quotes(self):
+        """
+        نیاز به استعلام‌های جزئی از روی خدمات پیش‌فرض محصول.
+        استعلام چاپ فقط وقتی لازم نیست که همه‌ی کلیشه‌های به کار رفته در
+        این کارتن (``cm.carton.cliche._is_used_for``) هزینه چاپ داشته باشند.
 
-            # تیراژ پیشنهادی
-            if product.default_quantity:
-                rec.quantity = product.default_quantity
-
-            # نیازها از روی محصول
-            rec.need_print_quote = bool(product.has_print)
+        کلیشه‌ها در depends نیستند تا ویرایش یک کلیشه همه‌ی استعلام‌های محصول
+        را علامت نزند؛ خود کلیشه فقط پیش‌نویس‌ها را دوباره محاسبه می‌کند
+        (``_recompute_need_quotes``).
+        """
+        for rec in self:
+            if rec.id and rec.state != "draft":
+                continue
+            product = rec.customer_product_id
+            cliches = product.cliche_ids._is_used_for(rec.carton_type)
+            print_priced = bool(cliches) and all(
+                cliches.mapped("print_cost_per_1000")
+            )
+            rec.need_print_quote = bool(product.has_print) and not print_priced
             rec.need_design_quote = bool(
                 product.has_print and product.has_new_cliche_default
             )
@@ -459,6 +756,33 @@ class CartonPriceInquiry(models.Model):
             rec.need_pallet_quote = bool(product.has_pallet_wrap_default)
             rec.need_shipping_quote = False
 
+    def _recompute_need_quotes(self):
+        """نیاز به استعلام‌ها (و به تبع آن مسیر) را برای این رکوردها دوباره حساب می‌کند."""
+        need_fields = [
+            field
+            for field in self._fields.values()
+            if field.compute == "_compute_need_quotes"
+        ]
+        for field in need_fields:
+            self.env.add_to_compute(field, self)
+        self.modified([field.name for field in need_fields])
+
+    @api.depends(
+        "customer_product_id.carton_type",
+        "customer_product_id.has_been_produced",
+        "need_design_quote",
+        "need_print_quote",
+        "need_staple_quote",
+        "need_punch_quote",
+        "need_pallet_quote",
+        "need_shipping_quote",
+    )
+    def _compute_flow_mode(self):
+        """مسیر سریع/کامل: کار ساده یا تولیدشده بدون خدمات جانبی، سریع است."""
+        for rec in self:
+            if rec.id and rec.state != "draft":
+                continue
+            product = rec.customer_product_id
             extra_services_needed = any(
                 [
                     rec.need_design_quote,
@@ -469,15 +793,24 @@ class CartonPriceInquiry(models.Model):
                     rec.need_shipping_quote,
                 ]
             )
-
             simple_type = product.carton_type in ("sheet", "normal")
-            already_produced = product.has_been_produced
-
-            if (simple_type or already_produced) and not extra_services_needed:
+            if not product or (
+                (simple_type or product.has_been_produced)
+                and not extra_services_needed
+            ):
                 rec.flow_mode = "quick"
             else:
                 rec.flow_mode = "full"
 
+    @api.depends("customer_product_id", "carton_type", "quantity")
+    def _compute_print_cost_total(self):
+        Cliche = self.env["cm.carton.cliche"]
+        for rec in self:
+            cliche = Cliche._get_cliche_summary(
+                rec.customer_product_id._origin.id, rec.carton_type
+            )
+            rec.print_cost_total = cliche.print_cost(rec.quantity) if cliche else 0.0
+
     @api.model
     def action_open_pending_inquiries(self):
         """اکشن لیست استعلام‌های انجام‌نشده."""
@@ -486,68 +819,131 @@ class CartonPriceInquiry(models.Model):
             "name": _("استعلام‌های در انتظار"),
             "res_model": "cm.carton.price_inquiry",
             "view_mode": "list,form",
-            "domain": [
-                ("state", "in", ["draft", "waiting_quotes", "calculated", "sent"])
-            ],
+            "domain": [("is_pending", "=", True)],
             "target": "current",
         }
 
-    def _notify_state_change(self, body, activity_summary=None):
+    @api.model
+    @tools.ormcache()
+    def _get_notify_ref_ids(self):
         """
-        پیام + اکتیویتی TODO به روش سازگار با Odoo 18.
+        (شناسه نوع فعالیت TODO، شناسه ir.model این مدل، شناسه زیرنوع
+        «comment»)؛ یک‌بار در هر پروسس resolve و در ormcache نگه داشته می‌شود.
         """
-        Activity = self.env["mail.activity"]
-        IrModel = self.env["ir.model"]
+        todo_type = self.env.ref(
+            "mail.mail_activity_data_todo", raise_if_not_found=False
+        )
+        model_id = self.env["ir.model"]._get_id(self._name)
+        comment_id = self.env["ir.model.data"]._xmlid_to_res_id("mail.mt_comment")
+        return (
+            todo_type.id if todo_type else False,
+            model_id or False,
+            comment_id or False,
+        )
 
-        try:
-            todo_type = self.env.ref("mail.mail_activity_data_todo")
-        except ValueError:
-            todo_type = False
+    def _notify_state_change(self, body, activity_summary=None, create_activity=True):
+        """
+        پیام + اکتیویتی TODO به روش سازگار با Odoo 18.
 
-        try:
-            model_rec = IrModel._get(self._name)
-        except ValueError:
-            model_rec = False
+        پیام همه‌ی رکوردها با زیرنوع ``mail.mt_comment`` و یک create ساخته
+        می‌شود، چه یک رکورد انتخاب شده باشد چه چند رکورد؛ دنبال‌کننده‌ها هم
+        یک‌بار برای کل رکوردها خوانده می‌شوند و فقط رکوردهایی که گیرنده‌ای
+        غیر از نویسنده دارند اعلان (``_notify_thread``) می‌گیرند. اکتیویتی‌ها
+        با یک create لیستی ساخته می‌شوند. با ``create_activity=False`` یا
+        context ``cm_carton_skip_activity`` برای عملیات انبوه، اکتیویتی
+        ساخته نمی‌شود.
+        """
+        if not self:
+            return
 
-        for rec in self:
-            rec.message_post(body=body, subtype_xmlid="mail.mt_comment")
+        todo_type_id, model_id, comment_subtype_id = self._get_notify_ref_ids()
+        self._post_comment_batch(escape(body), comment_subtype_id)
 
-            if not todo_type or not model_rec:
-                continue
+        if not create_activity or self.env.context.get("cm_carton_skip_activity"):
+            return
 
-            Activity.create(
+        if not todo_type_id or not model_id:
+            return
+
+        summary = activity_summary or _("پیگیری استعلام قیمت")
+        self.env["mail.activity"].create(
+            [
                 {
-                    "res_model_id": model_rec.id,
+                    "res_model_id": model_id,
                     "res_id": rec.id,
-                    "activity_type_id": todo_type.id,
+                    "activity_type_id": todo_type_id,
                     "user_id": self.env.user.id,
-                    "summary": activity_summary or _("پیگیری استعلام قیمت"),
+                    "summary": summary,
                 }
-            )
+                for rec in self
+            ]
+        )
+
+    def _post_comment_batch(self, body, subtype_id):
+        """
+        معادل ``message_post`` روی همه‌ی رکوردها: پیام‌ها با یک create و
+        گیرنده‌های دنبال‌کننده با یک کوئری (``_get_recipient_data``).
+        """
+        author_id, email_from = self._message_compute_author()
+        reply_to = self._notify_get_reply_to(default=email_from)
+        vals_list = [
+            {
+                "model": self._name,
+                "res_id": rec.id,
+                "body": body,
+                "message_type": "comment",
+                "subtype_id": subtype_id,
+                "author_id": author_id,
+                "email_from": email_from,
+                "reply_to": reply_to.get(rec.id),
+                "record_name": rec.display_name,
+            }
+            for rec in self
+        ]
+        messages = self.env["mail.message"].sudo().create(vals_list)
+
+        recipients = self.env["mail.followers"]._get_recipient_data(
+            self, "comment", subtype_id
+        )
+        for rec, message, msg_vals in zip(self, messages, vals_list):
+            if any(pid != author_id for pid in recipients.get(rec.id, {})):
+                rec._notify_thread(message, msg_vals=msg_vals)
+        return messages
 
     # =====================================================
     #   لاجیک اصلی
     # =====================================================
+    @api.model
+    def _get_basic_input_error(self, quantity, carton_type, length, width, height):
+        """
+        پیام خطای تیراژ/ابعاد یا False؛ مشترک بین محاسبه و ورود از اکسل.
+        """
+        if not quantity or quantity <= 0:
+            return _("تیراژ باید بزرگ‌تر از صفر باشد.")
+        if carton_type in ("normal", "sheet") and not (length and width and height):
+            return _(
+                "برای محصول اختصاصی مشتری، ابعاد طول/عرض/ارتفاع تکمیل نشده است.\n"
+                "لطفاً در فرم محصول، ابعاد را وارد کنید."
+            )
+        return False
+
     def _check_basic_inputs(self):
         for rec in self:
             if not rec.partner_id:
                 raise UserError(_("لطفاً مشتری را انتخاب کنید."))
             if not rec.customer_product_id:
                 raise UserError(_("لطفاً محصول اختصاصی مشتری را انتخاب کنید."))
-            if not rec.quantity or rec.quantity <= 0:
-                raise UserError(_("تیراژ باید بزرگ‌تر از صفر باشد."))
 
             product = rec.customer_product_id
-            if (
-                product.carton_type in ("normal", "sheet")
-                and not (product.length and product.width and product.height)
-            ):
-                raise UserError(
-                    _(
-                        "برای محصول اختصاصی مشتری، ابعاد طول/عرض/ارتفاع تکمیل نشده است.\n"
-                        "لطفاً در فرم محصول، ابعاد را وارد کنید."
-                    )
-                )
+            error = rec._get_basic_input_error(
+                rec.quantity,
+                product.carton_type,
+                product.length,
+                product.width,
+                product.height,
+            )
+            if error:
+                raise UserError(error)
 
     def _ensure_sub_quotes(self):
         """در حالت full، استعلام‌های جزئی لازم را می‌سازد."""
@@ -588,316 +984,493 @@ class CartonPriceInquiry(models.Model):
                     activity_summary=_("هزینه‌های استعلام‌های جزئی را تکمیل کنید."),
                 )
 
-    def _all_required_sub_quotes_ready(self):
+    @api.depends(
+        "flow_mode",
+        "sub_quote_ids.type",
+        "sub_quote_ids.state",
+        "sub_quote_ids.required",
+        "sub_quote_ids.estimated_cost",
+    )
+    def _compute_sub_quote_aggregates(self):
         """
-        آیا تمامی استعلام‌های لازم، هزینه دارند و در وضعیت «received» یا «approved» هستند؟
+        جمع هزینه هر نوع و آماده بودن استعلام‌های جزئی همه‌ی رکوردها
+        با یک ``_read_group`` روی (استعلام، نوع، وضعیت، اجباری).
         """
-        for rec in self:
-            if rec.flow_mode != "full":
-                return True
+        costs = defaultdict(float)
+        # استعلام ← [آیا حداقل یک استعلام اجباری دارد، آیا همه‌ی اجباری‌ها کامل‌اند]
+        readiness = defaultdict(lambda: [False, True])
+        groups = self.env["cm.carton.sub_quote"]._read_group(
+            [("price_inquiry_id", "in", self._origin.ids)],
+            groupby=["price_inquiry_id", "type", "state", "required"],
+            aggregates=["estimated_cost:sum", "estimated_cost:min"],
+        )
+        for inquiry, quote_type, state, required, cost_sum, cost_min in groups:
+            costs[inquiry.id, quote_type] += cost_sum
+            if required:
+                ready = readiness[inquiry.id]
+                ready[0] = True
+                if state not in SUB_QUOTE_READY_STATES or cost_min <= 0.0:
+                    ready[1] = False
 
-            required_quotes = rec.sub_quote_ids.filtered(lambda q: q.required)
-            if not required_quotes:
-                return False
+        for rec in self:
+            inquiry_id = rec._origin.id
+            for quote_type in SUB_QUOTE_TYPES:
+                rec["sub_quote_%s_cost" % quote_type] = costs[inquiry_id, quote_type]
+            rec.sub_quotes_ready = rec.flow_mode != "full" or all(
+                readiness[inquiry_id]
+            )
 
-            for q in required_quotes:
-                if q.state not in ("received", "approved") or q.estimated_cost <= 0.0:
-                    return False
-        return True
+    def _all_required_sub_quotes_ready(self):
+        """
+        آیا تمامی استعلام‌های لازم همه‌ی رکوردها، هزینه دارند و در وضعیت
+        «received» یا «approved» هستند؟ (از فیلد ذخیره‌شده ``sub_quotes_ready``)
+        """
+        return all(self.mapped("sub_quotes_ready"))
 
-    def _apply_sub_quote_costs(self):
+    def _get_sub_quote_cost_vals(self):
         """
-        هزینه‌های استعلام جزئی را روی فیلدهای هزینه اعمال می‌کند.
+        هزینه‌های استعلام جزئی به صورت dict از فیلدهای هزینه.
         فعلاً طراحی/کلیشه/قالب در type=design جمع شده‌اند.
         """
+        self.ensure_one()
+        if self.flow_mode != "full":
+            return {}
 
-        for rec in self:
-            if rec.flow_mode != "full":
-                continue
-
-            def sum_type(t):
-                return sum(
-                    rec.sub_quote_ids.filtered(lambda q: q.type == t).mapped(
-                        "estimated_cost"
-                    )
-                )
+        design = self.sub_quote_design_cost
+        return {
+            "design_cost": design,
+            "cliche_cost": design,
+            "die_cost": design,
+            "punch_cost_total": self.sub_quote_punch_cost,
+            "pallet_wrap_cost_total": self.sub_quote_pallet_cost,
+            "shipping_cost": self.sub_quote_shipping_cost,
+        }
 
-            rec.design_cost = sum_type("design")
-            rec.cliche_cost = sum_type("design")
-            rec.die_cost = sum_type("design")
-            rec.punch_cost_total = sum_type("punch")
-            rec.pallet_wrap_cost_total = sum_type("pallet")
-            rec.shipping_cost = sum_type("shipping")
+    @api.depends("customer_product_id")
+    def _compute_board_grade_id(self):
+        for rec in self:
+            rec.board_grade_id = rec.customer_product_id.board_grade_id
 
-    def _compute_flat_dimensions(self):
+    def _get_board_price_vals(self):
         """
-        محاسبه طول و عرض خوابیده روی ورق
+        قیمت هر مترمربع ورق از گرید انتخاب‌شده، به قیمت کاغذ در تاریخ امروز.
+        از کش (گرید، تاریخ) خوانده می‌شود و برای هر رکورد کوئری نمی‌زند.
         """
-        side_margin_mm = 20.0  # حاشیه ۲ سانت از هر طرف
+        self.ensure_one()
+        if not self.board_grade_id:
+            return {}
+        today = fields.Date.to_string(fields.Date.context_today(self))
+        return {
+            "paper_price_per_m2": self.env["cm.carton.board_grade"]._get_price_per_m2(
+                self.board_grade_id.id, today
+            ),
+        }
 
+    def _apply_sub_quote_costs(self):
+        """
+        هزینه‌های استعلام جزئی را روی فیلدهای هزینه اعمال می‌کند.
+        """
         for rec in self:
-            product = rec.customer_product_id
-            if not product:
-                rec.flat_length_mm = 0.0
-                rec.flat_width_mm = 0.0
-                continue
-
-            carton_type = product.carton_type or "normal"
-
-            # --- دایکاتی / لمینتی ---
-            if carton_type in ("diecut", "laminated"):
-                die = rec.die_id or product.die_id
+            vals = rec._get_sub_quote_cost_vals()
+            if vals:
+                rec.write(vals)
 
-                if die and die.blade_length_mm and die.blade_width_mm:
-                    base_L = die.blade_length_mm
-                    base_W = die.blade_width_mm
-                elif rec.die_length_mm and rec.die_width_mm:
-                    base_L = rec.die_length_mm
-                    base_W = rec.die_width_mm
-                else:
-                    if rec.flow_mode == "full":
-                        raise UserError(
-                            _(
-                                "برای کارتن‌های دایکاتی/لمینتی باید ابتدا قالب با ابعاد تیغه به تیغ "
-                                "یا ابعاد بلنک (طول/عرض) تعریف شود."
-                            )
-                        )
-                    if not (product.length and product.width and product.height):
-                        rec.flat_length_mm = 0.0
-                        rec.flat_width_mm = 0.0
-                        continue
-                    base_L = (product.length or 0.0) * 10.0
-                    base_W = (product.width or 0.0) * 10.0
-
-                rec.flat_length_mm = base_L + 2 * side_margin_mm
-                rec.flat_width_mm = base_W + 2 * side_margin_mm
-                continue
+    # =====================================================
+    #   اتصال به موتور قیمت‌گذاری (engine/pricing.py)
+    # =====================================================
+    def _pricing_error_message(self, code):
+        messages = {
+            "die_dims_required": _(
+                "برای کارتن‌های دایکاتی/لمینتی باید ابتدا قالب با ابعاد تیغه به تیغ "
+                "یا ابعاد بلنک (طول/عرض) تعریف شود."
+            ),
+            "diecut_die_required": _("برای دایکاتی، قالب با ابعاد تیغه به تیغ الزامی است."),
+            "laminated_die_required": _("برای لمینتی، قالب با ابعاد تیغه به تیغ الزامی است."),
+        }
+        return messages.get(code, code)
 
-            # --- کارتن معمولی ---
-            if carton_type == "normal":
-                L = (product.length or 0.0) * 10.0
-                W = (product.width or 0.0) * 10.0
-                H = (product.height or 0.0) * 10.0
+    # -----------------------------------------------------
+    #   تخمین قیمت بدون رکورد (API فروش / وب‌سایت)
+    # -----------------------------------------------------
+    @api.model
+    def _prepare_estimate_input(self, params):
+        """
+        ``PricingInput`` از پارامترهای درخواست، فقط با داده‌های کش‌شده
+        (پارک کروگیتور و قیمت گرید ورق)؛ هیچ رکوردی ساخته نمی‌شود.
+        مقدار نامعتبر ValueError/TypeError می‌دهد.
+        """
+        carton_type = params.get("carton_type") or "normal"
+        if carton_type not in dict(
+            self.env["cm.carton.customer_product"]._fields["carton_type"].selection
+        ):
+            raise ValueError(carton_type)
+
+        grade_id = int(params.get("board_grade_id") or 0)
+        if not grade_id and params.get("layer_count") and params.get("flute_step"):
+            grade_id = self.env["cm.carton.board_grade"]._get_grade_for(
+                str(params["layer_count"]), params["flute_step"]
+            )
+        if grade_id:
+            today = fields.Date.to_string(fields.Date.context_today(self))
+            paper_price = self.env["cm.carton.board_grade"]._get_price_per_m2(
+                grade_id, today
+            )
+        else:
+            paper_price = float(params.get("paper_price_per_m2") or 0.0)
+
+        die = None
+        if params.get("blade_length_mm") and params.get("blade_width_mm"):
+            die_cost = float(params.get("die_cost") or 0.0)
+            lifetime = int(params.get("die_lifetime_sheets") or 0)
+            die = pricing_engine.DieSpec(
+                blade_length_mm=float(params["blade_length_mm"]),
+                blade_width_mm=float(params["blade_width_mm"]),
+                cavities_per_sheet=int(params.get("cavities_per_sheet") or 1),
+                book_value=die_cost,
+                cost_per_sheet=die_cost / lifetime if lifetime > 0 else 0.0,
+            )
 
-                if not (L and W and H):
-                    rec.flat_length_mm = 0.0
-                    rec.flat_width_mm = 0.0
-                    continue
+        defaults = self.default_get(
+            ["margin_cash_percent", "margin_credit_percent", "tax_percent"]
+        )
+        machines, (side_margin_mm, glue_allowance_mm) = self.env[
+            "cm.carton.corrugator"
+        ]._get_machine_park(self.env.company.id)
+        payment_type = params.get("payment_type") or "cash"
+        if payment_type not in ("cash", "credit"):
+            raise ValueError(payment_type)
+
+        return pricing_engine.PricingInput(
+            carton_type=carton_type,
+            flow_mode="quick",
+            quantity=int(params.get("quantity") or 0),
+            length_cm=float(params.get("length_cm") or 0.0),
+            width_cm=float(params.get("width_cm") or 0.0),
+            height_cm=float(params.get("height_cm") or 0.0),
+            die=die,
+            paper_price_per_m2=paper_price,
+            lamination_price_per_m2=float(
+                params.get("lamination_price_per_m2") or 0.0
+            ),
+            margin_cash_percent=defaults.get("margin_cash_percent") or 0.0,
+            margin_credit_percent=defaults.get("margin_credit_percent") or 0.0,
+            tax_percent=defaults.get("tax_percent") or 0.0,
+            payment_type=payment_type,
+            machines=machines,
+            side_margin_mm=side_margin_mm,
+            glue_allowance_mm=glue_allowance_mm,
+        )
 
-                glue_allowance_mm = 40.0
+    @api.model
+    def _estimate_price(self, params):
+        """
+        قیمت و بهترین چیدمان ورق برای پارامترهای داده‌شده، بدون نوشتن در دیتابیس.
+        خطاها به صورت {"error": کد، "message": پیام} برگردانده می‌شوند.
+        """
+        try:
+            inp = self._prepare_estimate_input(params)
+        except (TypeError, ValueError):
+            return {
+                "error": "invalid_input",
+                "message": _("پارامترهای درخواست تخمین قیمت معتبر نیستند."),
+            }
+        if inp.quantity <= 0:
+            return {
+                "error": "quantity_required",
+                "message": _("تیراژ باید بزرگ‌تر از صفر باشد."),
+            }
 
-                flat_length = 2 * (L + W) + glue_allowance_mm + 2 * side_margin_mm
-                flap_up_mm = W / 2 + 10.0
-                flap_down_mm = W / 2 + 10.0
-                flat_width = H + flap_up_mm + flap_down_mm + 2 * side_margin_mm
+        try:
+            result = pricing_engine.price_cached(inp)
+        except pricing_engine.PricingError as e:
+            return {"error": e.code, "message": self._pricing_error_message(e.code)}
 
-                rec.flat_length_mm = flat_length
-                rec.flat_width_mm = flat_width
-                continue
+        selected = (result.corrugator_id or 0, float(result.industrial_width_cm))
+        layout = next((s for s in result.suggestions if s.key == selected), None)
+        prices = result.prices or pricing_engine.PriceBreakdown()
+        return {
+            "flat_length_mm": result.flat_length_mm,
+            "flat_width_mm": result.flat_width_mm,
+            "paper_price_per_m2": inp.paper_price_per_m2,
+            "material_cost_total": result.material_cost_total,
+            "overhead_cost_total": result.overhead_cost_total,
+            "base_cost_per_carton": prices.base_cost_per_carton,
+            "sale_price_cash": prices.sale_price_cash,
+            "sale_price_credit": prices.sale_price_credit,
+            "unit_price_with_tax": prices.unit_price_with_tax,
+            "total_price_with_tax": prices.total_price_with_tax,
+            "currency": self.env.company.currency_id.name,
+            "layout": layout and {
+                "industrial_width_cm": layout.industrial_width_cm,
+                "corrugator_id": layout.corrugator_id or None,
+                "orientation": layout.orientation,
+                "carton_per_row": layout.carton_per_row,
+                "rotated_per_row": layout.rotated_per_row,
+                "waste_percent": layout.waste_percent,
+                "total_length_cm": layout.total_length_cm,
+                "board_area_m2": layout.board_area_m2,
+            },
+        }
 
-            # --- ورق ساده ---
-            if carton_type == "sheet":
-                L = (product.length or 0.0) * 10.0
-                W = (product.width or 0.0) * 10.0
-                if not (L and W):
-                    rec.flat_length_mm = 0.0
-                    rec.flat_width_mm = 0.0
-                    continue
+    @api.model
+    def _estimate_price_public(self, params):
+        """
+        خروجی تخمین برای کاربر ناشناس: فقط قیمت فروش و چیدمان انتخاب‌شده.
+        مایه‌کاری، سربار و قیمت خرید ورق بیرون داده نمی‌شوند.
+        """
+        result = self._estimate_price(params)
+        if "error" in result:
+            return result
+        layout = result["layout"]
+        return dict(
+            {key: result[key] for key in PUBLIC_ESTIMATE_KEYS},
+            layout=layout
+            and {key: layout[key] for key in PUBLIC_ESTIMATE_LAYOUT_KEYS},
+        )
 
-                rec.flat_length_mm = L + 2 * side_margin_mm
-                rec.flat_width_mm = W + 2 * side_margin_mm
-                continue
+    def _call_pricing_engine(self, func, *args):
+        """اجرای یک تابع موتور و تبدیل PricingError به UserError."""
+        try:
+            return func(*args)
+        except pricing_engine.PricingError as e:
+            raise UserError(self._pricing_error_message(e.code)) from None
 
-            # --- حالت‌های احتیاطی ---
-            L = (product.length or 0.0) * 10.0
-            W = (product.width or 0.0) * 10.0
-            H = (product.height or 0.0) * 10.0
-            if not (L and W and H):
-                rec.flat_length_mm = 0.0
-                rec.flat_width_mm = 0.0
-                continue
+    def _get_die_spec(self):
+        self.ensure_one()
+        die = self.die_id or self.customer_product_id.die_id
+        if not die:
+            return None
+        return pricing_engine.DieSpec(
+            blade_length_mm=die.blade_length_mm or 0.0,
+            blade_width_mm=die.blade_width_mm or 0.0,
+            cavities_per_sheet=die.cavities_per_sheet or 1,
+            book_value=die.book_value or 0.0,
+            cost_per_sheet=die.cost_per_sheet or 0.0,
+        )
 
-            rec.flat_length_mm = 2 * (L + W) + 2 * side_margin_mm
-            rec.flat_width_mm = H + W + 2 * side_margin_mm
+    def _prepare_pricing_input(self, **overrides):
+        """
+        ساخت ورودی موتور قیمت‌گذاری از روی رکورد.
+        ``overrides`` با نام فیلدهای همین مدل، مقادیر رکورد را جایگزین می‌کند
+        (مثلاً هزینه‌های استعلام جزئی که هنوز نوشته نشده‌اند).
+        """
+        self.ensure_one()
+        product = self.customer_product_id
+        machines, (side_margin_mm, glue_allowance_mm) = self.env[
+            "cm.carton.corrugator"
+        ]._get_machine_park(self.env.company.id)
+        vals = {
+            "carton_type": self.carton_type or "normal",
+            "flow_mode": self.flow_mode or "quick",
+            "quantity": self.quantity or 0,
+            "length_cm": product.length or 0.0,
+            "width_cm": product.width or 0.0,
+            "height_cm": product.height or 0.0,
+            "die": self._get_die_spec(),
+            "die_length_mm": self.die_length_mm or 0.0,
+            "die_width_mm": self.die_width_mm or 0.0,
+            "paper_price_per_m2": self.paper_price_per_m2 or 0.0,
+            "lamination_price_per_m2": self.lamination_price_per_m2 or 0.0,
+            "die_cost": self.die_cost or 0.0,
+            "cliche_cost": self.cliche_cost or 0.0,
+            "design_cost": self.design_cost or 0.0,
+            "punch_cost_total": self.punch_cost_total or 0.0,
+            "pallet_wrap_cost_total": self.pallet_wrap_cost_total or 0.0,
+            "shipping_cost": self.shipping_cost or 0.0,
+            "margin_cash_percent": self.margin_cash_percent or 0.0,
+            "margin_credit_percent": self.margin_credit_percent or 0.0,
+            "tax_percent": self.tax_percent or 0.0,
+            "payment_type": self.payment_type or "cash",
+            "industrial_width_cm": self.industrial_width_mm or 0.0,
+            "corrugator_id": self.corrugator_id.id or 0,
+            "machines": machines,
+            "side_margin_mm": side_margin_mm,
+            "glue_allowance_mm": glue_allowance_mm,
+        }
+        cliche = self._get_cliche_summary()
+        if cliche is not None:
+            vals["print_cost_per_1000"] = cliche.print_cost_per_1000
+        vals.update(overrides)
+        return pricing_engine.PricingInput(**vals)
+
+    def _get_cliche_summary(self):
+        self.ensure_one()
+        return self.env["cm.carton.cliche"]._get_cliche_summary(
+            self.customer_product_id.id, self.carton_type
+        )
 
-    def _generate_sheet_suggestions(self):
+    def _get_cliche_cost_vals(self):
         """
-        از روی ابعاد شیت و تیراژ، پیشنهاد عرض‌های صنعتی مختلف را تولید می‌کند.
+        با کلیشه‌های ثبت‌شده، هزینه کلیشه همان هزینه ساخت کلیشه‌های هنوز
+        ساخته‌نشده است (نه مبلغ استعلام جزئی طراحی)؛ مثل ``_get_board_price_vals``
+        هم در ورودی موتور و هم روی رکورد نوشته می‌شود.
         """
-        industrial_widths_cm = [
-            80,
-            90,
-            95,
-            100,
-            105,
-            110,
-            115,
-            120,
-            125,
-            130,
-            135,
-            140,
-        ]
-        side_margin_cm = 2.0
+        self.ensure_one()
+        cliche = self._get_cliche_summary()
+        if cliche is None:
+            return {}
+        return {"cliche_cost": cliche.new_cliche_cost}
 
-        for rec in self:
-            rec.suggestion_ids.unlink()
+    def _sync_sheet_suggestions(self, entries):
+        """
+        همگام‌سازی پیشنهادهای عرض ورق بدون حذف و ساخت دوباره.
 
-            flat_w_cm = rec.flat_width_mm / 10.0
-            flat_l_cm = rec.flat_length_mm / 10.0
+        ``entries`` لیستی از (رکورد، پیشنهادها، کلید ورودی) است. اگر کلید
+        ورودی با ``suggestion_input_key`` رکورد برابر باشد، کاری انجام نمی‌شود؛
+        در غیر این صورت ردیف‌ها بر اساس (کروگیتور، عرض صنعتی) به‌روزرسانی و فقط
+        ردیف‌های اضافه/کم‌شده ساخته یا حذف می‌شوند (یک create و یک unlink برای کل دسته).
+        """
+        Suggestion = self.env["cm.carton.sheet_suggestion"]
+        to_create, to_unlink = [], []
 
-            if flat_w_cm <= 0 or flat_l_cm <= 0:
+        for rec, suggestions, key in entries:
+            if key and rec.suggestion_input_key == key:
                 continue
 
-            suggestions_vals = []
-
-            for width_cm in industrial_widths_cm:
-                usable_width = width_cm - 2 * side_margin_cm
-                if usable_width <= 0:
-                    continue
+            existing = {}
+            for line in rec.suggestion_ids:
+                line_key = (line.corrugator_id.id or 0, line.industrial_width_cm)
+                if line_key in existing:
+                    to_unlink.append(line.id)
+                else:
+                    existing[line_key] = line
 
-                carton_per_row = floor(usable_width / flat_w_cm)
-                if carton_per_row <= 0:
+            for sug in suggestions:
+                vals = sug.to_vals()
+                line = existing.pop(sug.key, None)
+                if line is None:
+                    to_create.append(dict(vals, price_inquiry_id=rec.id))
                     continue
+                # کروگیتور و عرض همان کلید تطبیق هستند و مقایسه نمی‌شوند
+                changed = {
+                    k: v
+                    for k, v in vals.items()
+                    if k not in ("corrugator_id", "industrial_width_cm")
+                    and line[k] != v
+                }
+                if changed:
+                    line.write(changed)
 
-                used_width = carton_per_row * flat_w_cm
-                waste_width = usable_width - used_width
-                waste_percent = (waste_width / width_cm) * 100.0
+            to_unlink.extend(line.id for line in existing.values())
 
-                row_count = ceil(rec.quantity / carton_per_row)
-                total_length = row_count * flat_l_cm  # cm
+        if to_unlink:
+            Suggestion.browse(to_unlink).unlink()
+        if to_create:
+            Suggestion.create(to_create)
 
-                suggestions_vals.append(
-                    {
-                        "price_inquiry_id": rec.id,
-                        "industrial_width_cm": width_cm,
-                        "carton_per_row": carton_per_row,
-                        "waste_cm": waste_width,
-                        "waste_percent": waste_percent,
-                        "total_length_cm": total_length,
-                    }
-                )
+    # -----------------------------------------------------
+    #   مراحل جداگانه (سازگاری با فراخوانی‌های قبلی)
+    # -----------------------------------------------------
+    def _compute_flat_dimensions(self):
+        """
+        محاسبه طول و عرض خوابیده روی ورق
+        """
+        for rec in self:
+            flat_length, flat_width = rec._call_pricing_engine(
+                pricing_engine.compute_flat_dimensions, rec._prepare_pricing_input()
+            )
+            rec.write({"flat_length_mm": flat_length, "flat_width_mm": flat_width})
 
-            if suggestions_vals:
-                self.env["cm.carton.sheet_suggestion"].create(suggestions_vals)
-                if not rec.industrial_width_mm:
-                    best = min(suggestions_vals, key=lambda v: v["waste_percent"])
-                    rec.industrial_width_mm = best["industrial_width_cm"]
+    def _generate_sheet_suggestions(self):
+        """
+        از روی ابعاد شیت و تیراژ، پیشنهاد عرض‌های صنعتی مختلف را تولید می‌کند.
+        """
+        for rec in self:
+            inp = rec._prepare_pricing_input()
+            suggestions = pricing_engine.suggestions_for(
+                inp, rec.flat_length_mm, rec.flat_width_mm
+            )
+            key = pricing_engine.suggestion_key(
+                inp, rec.flat_length_mm, rec.flat_width_mm
+            )
+            rec._sync_sheet_suggestions([(rec, suggestions, key)])
+            vals = {"suggestion_input_key": key}
+            if suggestions and not rec.industrial_width_mm:
+                best = pricing_engine.best_suggestion(suggestions)
+                vals["industrial_width_mm"] = best.industrial_width_cm
+                vals["corrugator_id"] = best.corrugator_id or False
+            rec.write(vals)
 
     def _compute_costs_from_excel_logic_placeholder(self):
         """
         فعلاً منطق ساده جایگزین اکسل.
         """
         for rec in self:
-            ct = rec.carton_type
-            if ct == "normal":
-                material, overhead = rec._compute_normal_carton_from_excel()
-            elif ct == "diecut":
-                material, overhead = rec._compute_diecut_carton_from_excel()
-            elif ct == "laminated":
-                material, overhead = rec._compute_laminated_carton_from_excel()
-            elif ct == "sheet":
-                material, overhead = rec._compute_sheet_from_excel()
-            else:
-                material, overhead = 0.0, 0.0
+            material, overhead = rec._call_pricing_engine(
+                pricing_engine.compute_costs,
+                rec._prepare_pricing_input(),
+                rec.flat_length_mm,
+                rec.flat_width_mm,
+            )
+            rec.write(
+                {"material_cost_total": material, "overhead_cost_total": overhead}
+            )
 
-            rec.material_cost_total = material
-            rec.overhead_cost_total = overhead
+    def _compute_cost_with(self, func):
+        self.ensure_one()
+        return self._call_pricing_engine(
+            func, self._prepare_pricing_input(), self.flat_length_mm, self.flat_width_mm
+        )
 
     def _compute_normal_carton_from_excel(self):
-        area_m2 = (self.flat_width_mm / 1000.0) * (self.flat_length_mm / 1000.0)
-        total_area_m2 = area_m2 * (self.quantity or 0.0)
-        material = total_area_m2 * (self.paper_price_per_m2 or 0.0)
-        overhead = material * 0.10
-        return material, overhead
+        return self._compute_cost_with(pricing_engine.compute_normal_carton)
 
     def _compute_diecut_carton_from_excel(self):
-        """
-        مایه‌کاری دایکاتی (ساده‌شده از فایل دایکاتی.xlsx).
-        """
-        die = self.die_id or self.customer_product_id.die_id
-        if not die or not die.blade_length_mm or not die.blade_width_mm:
-            raise UserError(_("برای دایکاتی، قالب با ابعاد تیغه به تیغ الزامی است."))
-
-        cavities = die.cavities_per_sheet or 1
-        qty = self.quantity or 0
-
-        sheet_area_m2 = (die.blade_length_mm / 1000.0) * (
-            die.blade_width_mm / 1000.0
-        )
-        sheets_needed = ceil(qty / cavities) if cavities > 0 else 0
-        total_area_m2 = sheet_area_m2 * sheets_needed
-
-        material = total_area_m2 * (self.paper_price_per_m2 or 0.0)
-        material += die.die_cost or 0.0
-
-        overhead = material * 0.15
-        return material, overhead
+        return self._compute_cost_with(pricing_engine.compute_diecut_carton)
 
     def _compute_laminated_carton_from_excel(self):
-        """
-        مایه‌کاری لمینتی (ساده‌شده از فایل لمینتی.xlsx).
-        """
-        die = self.die_id or self.customer_product_id.die_id
-        if not die or not die.blade_length_mm or not die.blade_width_mm:
-            raise UserError(_("برای لمینتی، قالب با ابعاد تیغه به تیغ الزامی است."))
-
-        cavities = die.cavities_per_sheet or 1
-        qty = self.quantity or 0
-
-        sheet_area_m2 = (die.blade_length_mm / 1000.0) * (
-            die.blade_width_mm / 1000.0
-        )
-        sheets_needed = ceil(qty / cavities) if cavities > 0 else 0
-        total_area_m2 = sheet_area_m2 * sheets_needed
-
-        material = total_area_m2 * (self.paper_price_per_m2 or 0.0)
-        lam_cost = total_area_m2 * (self.lamination_price_per_m2 or 0.0)
-        material = material + lam_cost + (die.die_cost or 0.0)
-
-        overhead = material * 0.15
-        return material, overhead
+        return self._compute_cost_with(pricing_engine.compute_laminated_carton)
 
     def _compute_sheet_from_excel(self):
-        return self._compute_normal_carton_from_excel()
+        return self._compute_cost_with(pricing_engine.compute_sheet)
 
     def _compute_prices(self):
         for rec in self:
-            if rec.quantity <= 0:
+            prices = pricing_engine.compute_prices(
+                rec._prepare_pricing_input(),
+                rec.material_cost_total,
+                rec.overhead_cost_total,
+            )
+            if prices is None:
                 continue
-
-            total_cost = (
-                rec.material_cost_total
-                + rec.overhead_cost_total
-                + rec.die_cost
-                + rec.cliche_cost
-                + rec.design_cost
-                + rec.punch_cost_total
-                + rec.pallet_wrap_cost_total
-                + rec.shipping_cost
+            rec.write(
+                {
+                    "base_cost_per_carton": prices.base_cost_per_carton,
+                    "sale_price_cash": prices.sale_price_cash,
+                    "sale_price_credit": prices.sale_price_credit,
+                    "unit_price_with_tax": prices.unit_price_with_tax,
+                    "total_price_with_tax": prices.total_price_with_tax,
+                }
             )
 
-            rec.base_cost_per_carton = (
-                total_cost / rec.quantity if rec.quantity else 0.0
-            )
+    # -----------------------------------------------------
+    #   اجرای پس‌زمینه (cm.carton.job)
+    # -----------------------------------------------------
+    def _should_queue(self):
+        """
+        انتخاب‌های بزرگ‌تر از پارامتر سیستمی ``cm_carton_pricing.queue_threshold``
+        به جای اجرای داخل درخواست HTTP در صف کرون اجرا می‌شوند.
+        """
+        if self.env.context.get("cm_carton_job_id"):
+            return False
+        threshold = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("cm_carton_pricing.queue_threshold", QUEUE_THRESHOLD)
+        )
+        return len(self) > max(threshold, 1)
 
-            rec.sale_price_cash = rec.base_cost_per_carton * (
-                1.0 + (rec.margin_cash_percent or 0.0) / 100.0
-            )
-            rec.sale_price_credit = rec.base_cost_per_carton * (
-                1.0 + (rec.margin_credit_percent or 0.0) / 100.0
-            )
+    def _enqueue_job(self, method):
+        return self.env["cm.carton.job"]._enqueue(self, method).action_open()
 
-            unit_price = (
-                rec.sale_price_cash
-                if rec.payment_type == "cash"
-                else rec.sale_price_credit
-            )
+    def action_compute_queued(self):
+        return self._enqueue_job("action_compute")
 
-            rec.unit_price_with_tax = unit_price * (
-                1.0 + (rec.tax_percent or 0.0) / 100.0
-            )
-            rec.total_price_with_tax = rec.unit_price_with_tax * rec.quantity
+    def action_mark_sent_queued(self):
+        return self._enqueue_job("action_mark_sent")
+
+    def action_accept_queued(self):
+        return self._enqueue_job("action_accept")
 
     # -----------------------------------------------------
     #   دکمه‌ها
@@ -905,12 +1478,23 @@ class CartonPriceInquiry(models.Model):
     def action_compute(self):
         """
         دکمه «محاسبه».
+
+        اگر اثر انگشت ورودی‌ها با آخرین محاسبه برابر باشد، محاسبه و نوشتن
+        تکرار نمی‌شود.
         """
+        if self._should_queue():
+            return self._enqueue_job("action_compute")
+
+        profiler = self.env["cm.carton.perf_log"]._profiler("action_compute")
+        notify_ids = []
         for rec in self:
-            rec._check_basic_inputs()
+            with profiler.stage("check_inputs", rec):
+                rec._check_basic_inputs()
+            vals = {}
 
             if rec.flow_mode == "full":
-                rec._ensure_sub_quotes()
+                with profiler.stage("ensure_sub_quotes", rec):
+                    rec._ensure_sub_quotes()
 
                 if rec.carton_type in ("diecut", "laminated"):
                     die = rec.die_id or rec.customer_product_id.die_id
@@ -927,28 +1511,252 @@ class CartonPriceInquiry(models.Model):
                             )
                         )
 
-                if not rec._all_required_sub_quotes_ready():
-                    raise UserError(
-                        _(
-                            "تمامی استعلام‌های جزئی لازم (طراحی/چاپ/منگنه/پالت/حمل) هنوز پاسخ کامل ندارند.\n"
-                            "لطفاً هزینه‌ها را در فرم استعلام‌های جزئی تکمیل و تأیید کنید."
+                with profiler.stage("sub_quote_costs", rec):
+                    if not rec._all_required_sub_quotes_ready():
+                        raise UserError(
+                            _(
+                                "تمامی استعلام‌های جزئی لازم (طراحی/چاپ/منگنه/پالت/حمل) هنوز پاسخ کامل ندارند.\n"
+                                "لطفاً هزینه‌ها را در فرم استعلام‌های جزئی تکمیل و تأیید کنید."
+                            )
                         )
-                    )
+                    vals.update(rec._get_sub_quote_cost_vals())
+
+            with profiler.stage("prepare_input", rec):
+                vals.update(rec._get_board_price_vals())
+                vals.update(rec._get_cliche_cost_vals())
+                inp = rec._prepare_pricing_input(**vals)
+                unchanged = rec.pricing_fingerprint == pricing_engine.fingerprint(inp)
+
+            # ورودی‌ها از آخرین محاسبه تغییر نکرده‌اند: فقط وضعیت برگردانده می‌شود
+            if unchanged:
+                if rec.state != "calculated":
+                    rec.state = "calculated"
+                    notify_ids.append(rec.id)
+                continue
+
+            # همه‌ی مراحل در موتور بدون ORM اجرا و نتیجه با یک write نوشته می‌شود
+            with profiler.stage("pricing", rec):
+                result = rec._call_pricing_engine(pricing_engine.price_cached, inp)
+            with profiler.stage("sheet_suggestions", rec):
+                rec._sync_sheet_suggestions(
+                    [(rec, result.suggestions, result.suggestion_key)]
+                )
+            with profiler.stage("write", rec):
+                vals.update(result.to_vals())
+                vals["state"] = "calculated"
+                rec.write(vals)
+            notify_ids.append(rec.id)
+
+        with profiler.stage("notify"):
+            self.browse(notify_ids)._notify_state_change(
+                body=_("محاسبه استعلام قیمت انجام شد."),
+                activity_summary=_("نتیجه استعلام را بررسی کنید."),
+            )
+        profiler.flush()
+
+    def action_compute_batch(self):
+        """
+        محاسبه مجدد دسته‌ای (مثلاً بعد از تغییر قیمت کاغذ).
+
+        محصولات و قالب‌ها یک‌بار پیش‌واکشی می‌شوند و همه‌ی رکوردها با
+        engine/batch.py به صورت برداری محاسبه می‌شوند. مقادیر مشترک (وضعیت و
+        ورودی‌های جایگزین مثل قیمت ورق گرید) با یک write برای هر گروه و
+        نتیجه‌ی محاسبه‌ی هر رکورد با write همان رکورد نوشته می‌شود.
+        رکوردهایی که اثر انگشت ورودی‌شان تغییر نکرده، اصلاً دست نمی‌خورند.
+        رکوردهایی که ورودی ناقص دارند، استعلام‌های جزئی‌شان کامل نیست یا
+        موتور خطا می‌دهد، کنار گذاشته می‌شوند و علت در چتر هر کدام ثبت
+        می‌شود. خروجی: اعلان خلاصه برای کاربر.
+        """
+        profiler = self.env["cm.carton.perf_log"]._profiler("action_compute_batch")
+        products = self.customer_product_id
+        products.fetch(["carton_type", "length", "width", "height", "die_id"])
+        self.fetch(["board_grade_id"])
+        (self.die_id | products.die_id).fetch(
+            [
+                "blade_length_mm",
+                "blade_width_mm",
+                "cavities_per_sheet",
+                "book_value",
+                "cost_per_sheet",
+            ]
+        )
 
-                rec._apply_sub_quote_costs()
+        records, inputs, overrides_list = [], [], []
+        # استعلام ← علت کنار گذاشتن
+        skipped = {}
+        unchanged_ids = []
+        with profiler.stage("prepare_input"):
+            for rec in self:
+                try:
+                    rec._check_basic_inputs()
+                except UserError as e:
+                    skipped[rec.id] = e.args[0]
+                    continue
 
-            rec._compute_flat_dimensions()
-            rec._generate_sheet_suggestions()
-            rec._compute_costs_from_excel_logic_placeholder()
-            rec._compute_prices()
-            rec.state = "calculated"
+                overrides = {}
+                if rec.flow_mode == "full":
+                    if not rec._all_required_sub_quotes_ready():
+                        skipped[rec.id] = _(
+                            "استعلام‌های جزئی لازم هنوز پاسخ کامل ندارند."
+                        )
+                        continue
+                    overrides = rec._get_sub_quote_cost_vals()
 
-        self._notify_state_change(
-            body=_("محاسبه استعلام قیمت انجام شد."),
-            activity_summary=_("نتیجه استعلام را بررسی کنید."),
+                overrides.update(rec._get_board_price_vals())
+                overrides.update(rec._get_cliche_cost_vals())
+                inp = rec._prepare_pricing_input(**overrides)
+                if rec.pricing_fingerprint == pricing_engine.fingerprint(inp):
+                    unchanged_ids.append(rec.id)
+                    continue
+
+                records.append(rec)
+                overrides_list.append(overrides)
+                inputs.append(inp)
+
+        with profiler.stage("pricing"):
+            results, errors = batch_engine.price_many(inputs)
+
+        # مقادیر مشترک ← استعلام‌ها؛ نتیجه‌ی هر استعلام جدا نوشته می‌شود
+        shared_groups = defaultdict(list)
+        result_vals = []
+        suggestion_entries = []
+        priced_ids = []
+        for i, (rec, result) in enumerate(zip(records, results)):
+            if i in errors:
+                skipped[rec.id] = self._pricing_error_message(errors[i])
+                continue
+            priced_ids.append(rec.id)
+            shared = dict(overrides_list[i], state="calculated")
+            shared_groups[tuple(sorted(shared.items()))].append(rec.id)
+            result_vals.append((rec, result.to_vals()))
+            suggestion_entries.append(
+                (rec, result.suggestions, result.suggestion_key)
+            )
+
+        priced = self.browse(priced_ids)
+        with profiler.stage("sheet_suggestions"):
+            self._sync_sheet_suggestions(suggestion_entries)
+        with profiler.stage("write"):
+            for key, ids in shared_groups.items():
+                self.browse(ids).write(dict(key))
+            for rec, vals in result_vals:
+                rec.write(vals)
+
+        if skipped:
+            _logger.info(
+                "cm.carton.price_inquiry batch compute skipped %d record(s): %s",
+                len(skipped),
+                list(skipped)[:50],
+            )
+            # علت کنار گذاشتن در چتر هر استعلام (یادداشت داخلی، یک create)
+            with profiler.stage("notify_skipped"):
+                self.browse(list(skipped))._message_log_batch(
+                    bodies={
+                        res_id: _("محاسبه مجدد دسته‌ای انجام نشد: %s", message)
+                        for res_id, message in skipped.items()
+                    }
+                )
+        _logger.info(
+            "cm.carton.price_inquiry batch compute: %d priced, %d unchanged",
+            len(priced_ids),
+            len(unchanged_ids),
         )
 
+        if priced:
+            # محاسبه مجدد انبوه: فقط پیام، بدون اکتیویتی برای هر رکورد
+            with profiler.stage("notify"):
+                priced._notify_state_change(
+                    body=_("محاسبه استعلام قیمت انجام شد."),
+                    create_activity=False,
+                )
+        profiler.flush()
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("محاسبه مجدد دسته‌ای"),
+                "message": _(
+                    "%(priced)s استعلام محاسبه شد، %(unchanged)s بدون تغییر و "
+                    "%(skipped)s کنار گذاشته شد (علت در چتر هر استعلام).",
+                    priced=len(priced_ids),
+                    unchanged=len(unchanged_ids),
+                    skipped=len(skipped),
+                ),
+                "type": "warning" if skipped else "success",
+                "sticky": bool(skipped),
+            },
+        }
+
+    def _parse_price_break_quantities(self):
+        self.ensure_one()
+        quantities = set()
+        for part in (self.price_break_quantities or "").replace("،", ",").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                qty = int(float(part))
+            except ValueError:
+                raise UserError(
+                    _("تیراژ «%s» در پلکان قیمت معتبر نیست.", part)
+                ) from None
+            if qty <= 0:
+                raise UserError(_("تیراژهای پلکان قیمت باید بزرگ‌تر از صفر باشند."))
+            quantities.add(qty)
+        if not quantities:
+            raise UserError(_("لطفاً حداقل یک تیراژ برای پلکان قیمت وارد کنید."))
+        return sorted(quantities)
+
+    def action_compute_price_breaks(self):
+        """
+        دکمه «محاسبه پلکان قیمت».
+
+        قیمت همه‌ی تیراژها در یک گذر برداری روی همان منطق مایه‌کاری محاسبه
+        و ردیف‌های پلکان بر اساس تیراژ به‌روزرسانی می‌شوند؛ بدون تغییر تیراژ
+        اصلی، پیشنهادهای عرض ورق یا ارسال پیام.
+        """
+        Break = self.env["cm.carton.price_break"]
+        to_create, to_unlink = [], []
+
+        for rec in self:
+            rec._check_basic_inputs()
+            quantities = rec._parse_price_break_quantities()
+            overrides = rec._get_sub_quote_cost_vals()
+            overrides.update(rec._get_board_price_vals())
+            overrides.update(rec._get_cliche_cost_vals())
+            ladder = rec._call_pricing_engine(
+                batch_engine.price_ladder,
+                rec._prepare_pricing_input(**overrides),
+                quantities,
+            )
+
+            existing = {line.quantity: line for line in rec.price_break_ids}
+            for qty, prices in zip(quantities, ladder):
+                vals = {
+                    "base_cost_per_carton": prices.base_cost_per_carton,
+                    "sale_price_cash": prices.sale_price_cash,
+                    "sale_price_credit": prices.sale_price_credit,
+                    "unit_price_with_tax": prices.unit_price_with_tax,
+                    "total_price_with_tax": prices.total_price_with_tax,
+                }
+                line = existing.pop(qty, None)
+                if line:
+                    line.write(vals)
+                else:
+                    to_create.append(
+                        dict(vals, price_inquiry_id=rec.id, quantity=qty)
+                    )
+            to_unlink.extend(line.id for line in existing.values())
+
+        if to_unlink:
+            Break.browse(to_unlink).unlink()
+        if to_create:
+            Break.create(to_create)
+
     def action_mark_sent(self):
+        if self._should_queue():
+            return self._enqueue_job("action_mark_sent")
+
         self.write({"state": "sent"})
         self._notify_state_change(
             body=_("استعلام قیمت برای مشتری ارسال شد."),
@@ -956,50 +1764,132 @@ class CartonPriceInquiry(models.Model):
         )
 
     def action_accept(self):
-        for rec in self:
-            rec._create_sale_order_on_accept()
-            rec.state = "accepted"
+        """
+        تأیید مشتری برای یک یا چند استعلام.
 
-            if rec.customer_product_id and not rec.customer_product_id.has_been_produced:
-                rec.customer_product_id.has_been_produced = True
+        سفارش‌های فروش با یک create ساخته می‌شوند؛ با context
+        ``cm_carton_merge_sale_orders`` استعلام‌های یک مشتری در یک سفارش
+        چندسطری جمع می‌شوند.
+        """
+        merge = bool(self.env.context.get("cm_carton_merge_sale_orders"))
+        if self._should_queue():
+            return self._enqueue_job(
+                "action_accept_merged" if merge else "action_accept"
+            )
 
-        self._notify_state_change(
-            body=_("استعلام قیمت توسط مشتری تأیید شد و سفارش فروش ایجاد گردید."),
-            activity_summary=_("پیگیری اجرای سفارش فروش مربوط به این استعلام."),
-        )
+        profiler = self.env["cm.carton.perf_log"]._profiler("action_accept")
+        with profiler.stage("sale_order"):
+            self._create_sale_order_on_accept(merge_by_partner=merge)
+        with profiler.stage("die_usage"):
+            self._record_die_usage()
+        with profiler.stage("write"):
+            self.write({"state": "accepted"})
+            self.customer_product_id.filtered(
+                lambda p: not p.has_been_produced
+            ).write({"has_been_produced": True})
+            # کلیشه‌ها با اولین سفارش ساخته می‌شوند و دیگر هزینه ساخت ندارند
+            cliches = self.env["cm.carton.cliche"].union(
+                *(
+                    rec.customer_product_id.cliche_ids._is_used_for(rec.carton_type)
+                    for rec in self
+                )
+            ).filtered(lambda c: not c.is_made)
+            if cliches:
+                cliches.write({"is_made": True})
+
+        with profiler.stage("notify"):
+            self._notify_state_change(
+                body=_("استعلام قیمت توسط مشتری تأیید شد و سفارش فروش ایجاد گردید."),
+                activity_summary=_("پیگیری اجرای سفارش فروش مربوط به این استعلام."),
+            )
+        profiler.flush()
 
-    def _create_sale_order_on_accept(self):
+    def action_accept_merged(self):
+        return self.with_context(cm_carton_merge_sale_orders=True).action_accept()
+
+    def _record_die_usage(self):
+        """
+        ثبت ورق‌های هر استعلام دایکاتی/لمینتی در دفتر مصرف قالب (یک create).
+        ارزش دفتری قالب از جمع همین دفتر کم می‌شود تا سفارش‌های تکراری
+        دوباره کل هزینه قالب را نپردازند. استعلامی که قبلاً ثبت شده، تکرار نمی‌شود.
+        """
+        Usage = self.env["cm.carton.die.usage"].sudo()
+        recorded = {
+            inquiry.id
+            for [inquiry] in Usage._read_group(
+                [("price_inquiry_id", "in", self.ids)], ["price_inquiry_id"]
+            )
+        }
+        vals_list = []
         for rec in self:
-            if rec.sale_order_id:
+            die = rec.die_id or rec.customer_product_id.die_id
+            if (
+                rec.id in recorded
+                or rec.carton_type not in pricing_engine.DIE_PRICED_TYPES
+                or not die
+                or not rec.quantity
+            ):
                 continue
+            vals_list.append(
+                {
+                    "die_id": die.id,
+                    "sheets": ceil(rec.quantity / (die.cavities_per_sheet or 1)),
+                    "price_inquiry_id": rec.id,
+                    "sale_order_id": rec.sale_order_id.id,
+                }
+            )
+        if vals_list:
+            Usage.create(vals_list)
 
-            product = rec.customer_product_id.sale_product_id
-            if not product:
-                raise UserError(
-                    _(
-                        "برای محصول اختصاصی مشتری، محصول فروش (product) تعریف نشده است.\n"
-                        "لطفاً در فرم محصول اختصاصی، محصول فروش را مشخص کنید."
-                    )
+    def _prepare_sale_order_line_vals(self):
+        self.ensure_one()
+        product = self.customer_product_id.sale_product_id
+        return {
+            "product_id": product.id,
+            "product_uom_qty": self.quantity,
+            "price_unit": self.unit_price_with_tax,
+            "name": product.display_name,
+        }
+
+    def _create_sale_order_on_accept(self, merge_by_partner=False):
+        """
+        سفارش فروش استعلام‌هایی که هنوز سفارش ندارند، همه با یک create.
+        با ``merge_by_partner`` برای هر مشتری یک سفارش با یک سطر به ازای هر استعلام.
+        """
+        to_order = self.filtered(lambda r: not r.sale_order_id)
+        if not to_order:
+            return
+
+        if to_order.filtered(lambda r: not r.customer_product_id.sale_product_id):
+            raise UserError(
+                _(
+                    "برای محصول اختصاصی مشتری، محصول فروش (product) تعریف نشده است.\n"
+                    "لطفاً در فرم محصول اختصاصی، محصول فروش را مشخص کنید."
                 )
+            )
 
-            order_vals = {
-                "partner_id": rec.partner_id.id,
-                "origin": f"Carton PI #{rec.id}",
-                "order_line": [
-                    (
-                        0,
-                        0,
-                        {
-                            "product_id": product.id,
-                            "product_uom_qty": rec.quantity,
-                            "price_unit": rec.unit_price_with_tax,
-                            "name": product.display_name,
-                        },
-                    )
-                ],
-            }
-            sale = self.env["sale.order"].create(order_vals)
-            rec.sale_order_id = sale.id
+        if merge_by_partner:
+            groups = defaultdict(lambda: self.browse())
+            for rec in to_order:
+                groups[rec.partner_id] |= rec
+            groups = list(groups.values())
+        else:
+            groups = list(to_order)
+
+        orders = self.env["sale.order"].create(
+            [
+                {
+                    "partner_id": group.partner_id.id,
+                    "origin": ", ".join(f"Carton PI #{rec.id}" for rec in group),
+                    "order_line": [
+                        (0, 0, rec._prepare_sale_order_line_vals()) for rec in group
+                    ],
+                }
+                for group in groups
+            ]
+        )
+        for group, order in zip(groups, orders):
+            group.sale_order_id = order
 
     def action_reject(self):
         self.write({"state": "rejected"})
@@ -1009,57 +1899,6 @@ class CartonPriceInquiry(models.Model):
         )
 
 
-# =========================================================
-#   قالب دایکات / لمینتی
-# =========================================================
-class CartonDie(models.Model):
-    _name = "cm.carton.die"
-    _description = "قالب دایکات / لمینتی"
-
-    name = fields.Char(string="نام قالب", required=True)
-    code = fields.Char(string="کد قالب")
-
-    partner_id = fields.Many2one(
-        "res.partner",
-        string="سازنده / چاپخانه",
-    )
-
-    product_id = fields.Many2one(
-        "cm.carton.customer_product",
-        string="محصول اختصاصی مشتری",
-        ondelete="set null",
-    )
-
-    blade_length_mm = fields.Float(string="طول تیغه به تیغ (mm)")
-    blade_width_mm = fields.Float(string="عرض تیغه به تیغ (mm)")
-
-    cavities_per_sheet = fields.Integer(
-        string="تعداد قالب در هر ورق",
-        default=1,
-        help="اگر روی یک ورق چند ضرب قالب داریم، اینجا تعداد را وارد کن.",
-    )
-
-    has_lamination = fields.Boolean(string="برای لمینت استفاده می‌شود؟")
-
-    die_cost = fields.Monetary(
-        string="هزینه ساخت قالب",
-        currency_field="currency_id",
-    )
-
-    is_active = fields.Boolean(string="فعال؟", default=True)
-
-    design_attachment_ids = fields.Many2many(
-        "ir.attachment",
-        string="فایل‌های طرح قالب",
-    )
-
-    currency_id = fields.Many2one(
-        "res.currency",
-        string="ارز",
-        default=lambda self: self.env.company.currency_id.id,
-    )
-
-
 # =========================================================
 #   پیشنهاد چیدمان روی عرض‌های مختلف ورق
 # =========================================================
@@ -1073,14 +1912,44 @@ class CartonSheetSuggestion(models.Model):
         string="استعلام قیمت",
         ondelete="cascade",
         required=True,
+        index=True,
     )
 
+    corrugator_id = fields.Many2one(
+        "cm.carton.corrugator",
+        string="کروگیتور",
+        ondelete="cascade",
+    )
     industrial_width_cm = fields.Float(string="عرض صنعتی (cm)")
     carton_per_row = fields.Integer(string="تعداد کارتن در هر ردیف")
     waste_cm = fields.Float(string="ضایعات عرضی (cm)")
     waste_percent = fields.Float(string="درصد ضایعات عرضی")
     total_length_cm = fields.Float(string="طول صنعتی کل (cm)")
 
+    orientation = fields.Selection(
+        [
+            ("normal", "عادی"),
+            ("rotated", "چرخیده"),
+            ("mixed", "ترکیبی"),
+        ],
+        string="جهت چیدمان",
+        default="normal",
+    )
+    rotated_per_row = fields.Integer(string="تعداد چرخیده در هر ردیف")
+    board_area_m2 = fields.Float(
+        string="مصرف ورق (m²)",
+        help="عرض صنعتی × طول کل؛ مصرف واقعی ورق روی کروگیتور.",
+    )
+    is_pareto_optimal = fields.Boolean(
+        string="بهینه پارتو؟",
+        help="هیچ ترکیب دستگاه/عرض دیگری هم ضایعات کمتر و هم طول کمتر ندارد.",
+    )
+    estimated_cost = fields.Float(
+        string="هزینه برآوردی",
+        help="هزینه هر متر طول دستگاه × طول کل + مصرف ورق × قیمت هر مترمربع.",
+    )
+    run_time_min = fields.Float(string="زمان اجرا (دقیقه)")
+
 
 # =========================================================
 #   استعلام‌های جزئی (طراحی / چاپ / منگنه / پالت / حمل)
@@ -1094,6 +1963,7 @@ class CartonSubQuote(models.Model):
         string="استعلام اصلی",
         ondelete="cascade",
         required=True,
+        index=True,
     )
 
     type = fields.Selection(
@@ -1136,70 +2006,3 @@ class CartonSubQuote(models.Model):
         string="ارز",
         default=lambda self: self.env.company.currency_id.id,
     )
-
-
-# =========================================================
-#   کلیشه چاپ
-# =========================================================
-class CartonCliche(models.Model):
-    _name = "cm.carton.cliche"
-    _description = "کلیشه چاپ برای محصول اختصاصی مشتری"
-
-    customer_product_id = fields.Many2one(
-        "cm.carton.customer_product",
-        string="محصول اختصاصی",
-        required=True,
-        ondelete="cascade",
-    )
-
-    name = fields.Char(
-        string="نام کلیشه",
-        required=True,
-        help="مثلاً: کلیشه لوگو، کلیشه وجه A و ...",
-    )
-
-    color = fields.Char(
-        string="رنگ / رنگ‌ها",
-        help="مثلاً: قرمز + مشکی",
-    )
-
-    side = fields.Selection(
-        [
-            ("front", "رو"),
-            ("back", "پشت"),
-            ("both", "دو رو"),
-        ],
-        string="سمت چاپ",
-    )
-
-    cliche_cost = fields.Monetary(
-        string="هزینه ساخت کلیشه",
-        currency_field="currency_id",
-    )
-
-    print_cost_per_1000 = fields.Monetary(
-        string="هزینه چاپ هر ۱۰۰۰ عدد",
-        currency_field="currency_id",
-    )
-
-    design_file_id = fields.Many2one(
-        "ir.attachment",
-        string="فایل طرح",
-        help="فایل طرح نهایی برای استفاده در سفارش‌های بعدی",
-    )
-
-    is_laminate = fields.Boolean(
-        string="چاپ لمینتی؟",
-        help="اگر True باشد، این کلیشه/طرح برای چاپ لمینتی استفاده می‌شود.",
-    )
-
-    active = fields.Boolean(  # این با ویو «active» هماهنگ است
-        string="فعال؟",
-        default=True,
-    )
-
-    currency_id = fields.Many2one(
-        "res.currency",
-        string="ارز",
-        default=lambda self: self.env.company.currency_id.id,
-    )
@@ -0,0 +1,143 @@
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+PROFILING_PARAM = "cm_carton_pricing.profiling"
+PERF_LOG_RETENTION_DAYS = 30
+
+
+class StageProfiler:
+    """
+    زمان و تعداد کوئری هر مرحله‌ی یک اکشن؛ در پایان با یک create ثبت می‌شود.
+    اگر پروفایل غیرفعال باشد، ``stage`` هیچ کاری نمی‌کند. مرحله‌ای که خطا بدهد
+    ثبت نمی‌شود (تراکنش به هر حال rollback می‌شود).
+    """
+
+    def __init__(self, env, method, enabled):
+        self.env = env
+        self.method = method
+        self.enabled = enabled
+        self.entries = []
+
+    @contextmanager
+    def stage(self, name, inquiry=None):
+        if not self.enabled:
+            yield
+            return
+        cr = self.env.cr
+        self.env.flush_all()
+        queries_before = cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        # کوئری‌های معوق ORM به همان مرحله‌ای نسبت داده شوند که آن‌ها را ساخته
+        self.env.flush_all()
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        query_count = cr.sql_log_count - queries_before
+        self.entries.append(
+            {
+                "method": self.method,
+                "stage": name,
+                "price_inquiry_id": inquiry.id if inquiry else False,
+                "carton_type": inquiry.carton_type if inquiry else False,
+                "duration_ms": duration_ms,
+                "query_count": query_count,
+            }
+        )
+
+    def flush(self):
+        if self.entries:
+            self.env["cm.carton.perf_log"].sudo().create(self.entries)
+            self.entries = []
+
+
+class CartonPerfLog(models.Model):
+    _name = "cm.carton.perf_log"
+    _description = "لاگ زمان مراحل محاسبه استعلام"
+    _order = "id desc"
+    _log_access = False
+
+    date = fields.Datetime(
+        string="زمان",
+        default=fields.Datetime.now,
+        index=True,
+    )
+
+    method = fields.Char(
+        string="اکشن",
+        index=True,
+    )
+
+    stage = fields.Char(string="مرحله")
+
+    price_inquiry_id = fields.Many2one(
+        "cm.carton.price_inquiry",
+        string="استعلام قیمت",
+        ondelete="set null",
+    )
+
+    carton_type = fields.Char(string="نوع کارتن")
+
+    duration_ms = fields.Float(
+        string="زمان (ms)",
+        digits=(16, 3),
+    )
+
+    query_count = fields.Integer(string="تعداد کوئری")
+
+    @api.model
+    def _is_profiling_enabled(self):
+        return tools.str2bool(
+            self.env["ir.config_parameter"].sudo().get_param(PROFILING_PARAM, "False")
+        )
+
+    @api.model
+    def _profiler(self, method):
+        return StageProfiler(self.env, method, self._is_profiling_enabled())
+
+    @api.autovacuum
+    def _gc_perf_log(self):
+        limit = fields.Datetime.now() - timedelta(days=PERF_LOG_RETENTION_DAYS)
+        self.sudo().search([("date", "<", limit)]).unlink()
+
+
+class CartonPerfLogReport(models.Model):
+    """
+    صدک ۵۰ و ۹۵ زمان و تعداد کوئری هر مرحله، به تفکیک اکشن و نوع کارتن.
+    """
+
+    _name = "cm.carton.perf_log.report"
+    _description = "گزارش صدک زمان مراحل محاسبه"
+    _auto = False
+    _order = "method, stage, carton_type"
+
+    method = fields.Char(string="اکشن", readonly=True)
+    stage = fields.Char(string="مرحله", readonly=True)
+    carton_type = fields.Char(string="نوع کارتن", readonly=True)
+    sample_count = fields.Integer(string="تعداد نمونه", readonly=True)
+    p50_ms = fields.Float(string="p50 (ms)", digits=(16, 3), readonly=True)
+    p95_ms = fields.Float(string="p95 (ms)", digits=(16, 3), readonly=True)
+    avg_queries = fields.Float(string="میانگین کوئری", digits=(16, 1), readonly=True)
+    p95_queries = fields.Float(string="p95 کوئری", digits=(16, 1), readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(
+            """
+            CREATE OR REPLACE VIEW {table} AS (
+                SELECT
+                    row_number() OVER () AS id,
+                    method,
+                    stage,
+                    COALESCE(carton_type, '') AS carton_type,
+                    count(*) AS sample_count,
+                    percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                    percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                    avg(query_count) AS avg_queries,
+                    percentile_cont(0.95) WITHIN GROUP (ORDER BY query_count) AS p95_queries
+                FROM cm_carton_perf_log
+                GROUP BY method, stage, COALESCE(carton_type, '')
+            )
+            """.format(table=self._table)
+        )
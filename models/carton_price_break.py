@@ -0,0 +1,46 @@
+from odoo import fields, models
+
+
+class CartonPriceBreak(models.Model):
+    _name = "cm.carton.price_break"
+    _description = "پلکان قیمت بر اساس تیراژ"
+    _order = "quantity asc"
+
+    price_inquiry_id = fields.Many2one(
+        "cm.carton.price_inquiry",
+        string="استعلام قیمت",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    quantity = fields.Integer(
+        string="تیراژ",
+        required=True,
+    )
+
+    base_cost_per_carton = fields.Monetary(
+        string="مایه کار هر کارتن",
+        currency_field="currency_id",
+    )
+    sale_price_cash = fields.Monetary(
+        string="قیمت واحد نقدی",
+        currency_field="currency_id",
+    )
+    sale_price_credit = fields.Monetary(
+        string="قیمت واحد مدت‌دار",
+        currency_field="currency_id",
+    )
+    unit_price_with_tax = fields.Monetary(
+        string="قیمت واحد با مالیات",
+        currency_field="currency_id",
+    )
+    total_price_with_tax = fields.Monetary(
+        string="قیمت کل با مالیات",
+        currency_field="currency_id",
+    )
+
+    currency_id = fields.Many2one(
+        related="price_inquiry_id.currency_id",
+        string="ارز",
+    )
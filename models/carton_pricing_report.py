@@ -0,0 +1,286 @@
+from odoo import api, fields, models, tools
+from odoo.tools.sql import create_index, table_exists
+
+REFRESH_PARAM = "cm_carton_pricing.report_refreshed_at"
+
+# همپوشانی بازه‌ی تغییرات با آخرین به‌روزرسانی، برای تراکنش‌هایی که قبل از
+# به‌روزرسانی شروع و بعد از آن commit شده‌اند (write_date آن‌ها عقب‌تر است)
+REFRESH_OVERLAP = "10 minutes"
+
+# استعلام‌هایی که قیمت دارند
+REPORT_STATES = ("calculated", "sent", "accepted", "rejected")
+
+SUMMARY_TABLE = "cm_carton_pricing_summary"
+
+# نسبت‌ها در گروه‌ها از جمع اجزا حساب می‌شوند، نه میانگین نسبت ردیف‌ها:
+# فیلد ← (صورت، مخرج، ضریب)
+RATIO_FIELDS = {
+    "margin_percent": ("margin_amount", "revenue", 100.0),
+    "price_per_m2": ("revenue", "board_area_m2", 1.0),
+    "waste_percent": ("waste_area_m2", "board_area_m2", 100.0),
+}
+
+
+class CartonPricingReport(models.Model):
+    """
+    تحلیل قیمت‌گذاری: حاشیه سود، قیمت هر مترمربع و ضایعات به تفکیک مشتری،
+    نوع کارتن و ماه.
+
+    جمع‌ها در جدول خلاصه ``cm_carton_pricing_summary`` (یک ردیف به ازای
+    ماه/مشتری/نوع) نگه داشته می‌شوند و کرون فقط ماه‌هایی را که استعلامشان
+    از آخرین به‌روزرسانی تغییر کرده دوباره می‌سازد. این مدل یک view ساده
+    روی همان جدول است؛ pivot و graph مستقیماً روی چند صد ردیف اجرا می‌شوند.
+
+    درصد حاشیه سود، قیمت هر مترمربع و درصد ضایعات در ``read_group`` از
+    جمع اجزا (``RATIO_FIELDS``) محاسبه می‌شوند.
+    """
+
+    _name = "cm.carton.pricing.report"
+    _description = "تحلیل قیمت‌گذاری کارتن"
+    _auto = False
+    _order = "date desc, partner_id, carton_type"
+    _rec_name = "date"
+
+    date = fields.Date(string="ماه", readonly=True)
+    partner_id = fields.Many2one("res.partner", string="مشتری", readonly=True)
+    carton_type = fields.Selection(
+        selection=lambda self: self.env["cm.carton.customer_product"]
+        ._fields["carton_type"]
+        .selection,
+        string="نوع کارتن",
+        readonly=True,
+    )
+    inquiry_count = fields.Integer(string="تعداد استعلام", readonly=True)
+    accepted_count = fields.Integer(string="تعداد تأییدشده", readonly=True)
+    quantity = fields.Float(string="تیراژ کل", readonly=True)
+    revenue = fields.Float(string="مبلغ فروش (بدون مالیات)", readonly=True)
+    cost = fields.Float(string="مایه‌کاری کل", readonly=True)
+    margin_amount = fields.Float(string="حاشیه سود", readonly=True)
+    board_area_m2 = fields.Float(string="مصرف ورق (m²)", readonly=True)
+    waste_area_m2 = fields.Float(string="ضایعات عرضی (m²)", readonly=True)
+    # aggregator فقط برای نمایش در pivot است؛ مقدار گروه در read_group
+    # از جمع اجزا جایگزین می‌شود
+    margin_percent = fields.Float(
+        string="درصد حاشیه سود",
+        aggregator="avg",
+        readonly=True,
+    )
+    price_per_m2 = fields.Float(
+        string="قیمت هر مترمربع",
+        aggregator="avg",
+        readonly=True,
+    )
+    waste_percent = fields.Float(
+        string="درصد ضایعات",
+        aggregator="avg",
+        readonly=True,
+    )
+
+    @api.model
+    def read_group(
+        self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True
+    ):
+        requested = {spec.split(":")[0].strip() for spec in fields}
+        ratios = [name for name in RATIO_FIELDS if name in requested]
+        if not ratios:
+            return super().read_group(
+                domain, fields, groupby, offset, limit, orderby, lazy
+            )
+
+        components = {part for name in ratios for part in RATIO_FIELDS[name][:2]}
+        extra = [f"ratio_{part}:sum({part})" for part in sorted(components)]
+        result = super().read_group(
+            domain, fields + extra, groupby, offset, limit, orderby, lazy
+        )
+        for row in result:
+            # ستون‌های جدول خلاصه NUMERIC هستند
+            sums = {
+                part: float(row.pop(f"ratio_{part}") or 0.0) for part in components
+            }
+            for name in ratios:
+                numerator, denominator, factor = RATIO_FIELDS[name]
+                row[name] = (
+                    sums[numerator] * factor / sums[denominator]
+                    if sums[denominator]
+                    else 0.0
+                )
+        return result
+
+    def init(self):
+        cr = self.env.cr
+        created = not table_exists(cr, SUMMARY_TABLE)
+        if created:
+            cr.execute(
+                """
+                CREATE TABLE {summary} (
+                    id SERIAL PRIMARY KEY,
+                    month DATE NOT NULL,
+                    partner_id INTEGER,
+                    carton_type VARCHAR,
+                    inquiry_count INTEGER NOT NULL DEFAULT 0,
+                    accepted_count INTEGER NOT NULL DEFAULT 0,
+                    quantity NUMERIC NOT NULL DEFAULT 0,
+                    revenue NUMERIC NOT NULL DEFAULT 0,
+                    cost NUMERIC NOT NULL DEFAULT 0,
+                    board_area_m2 NUMERIC NOT NULL DEFAULT 0,
+                    waste_area_m2 NUMERIC NOT NULL DEFAULT 0
+                )
+                """.format(summary=SUMMARY_TABLE)
+            )
+            create_index(
+                cr, "%s_month_idx" % SUMMARY_TABLE, SUMMARY_TABLE, ["month"]
+            )
+
+        tools.drop_view_if_exists(cr, self._table)
+        cr.execute(
+            """
+            CREATE OR REPLACE VIEW {table} AS (
+                SELECT
+                    id,
+                    month AS date,
+                    partner_id,
+                    carton_type,
+                    inquiry_count,
+                    accepted_count,
+                    quantity,
+                    revenue,
+                    cost,
+                    revenue - cost AS margin_amount,
+                    board_area_m2,
+                    waste_area_m2,
+                    CASE WHEN revenue > 0
+                         THEN (revenue - cost) * 100.0 / revenue ELSE 0 END
+                        AS margin_percent,
+                    CASE WHEN board_area_m2 > 0
+                         THEN revenue / board_area_m2 ELSE 0 END AS price_per_m2,
+                    CASE WHEN board_area_m2 > 0
+                         THEN waste_area_m2 * 100.0 / board_area_m2 ELSE 0 END
+                        AS waste_percent
+                FROM {summary}
+            )
+            """.format(table=self._table, summary=SUMMARY_TABLE)
+        )
+
+        if created:
+            self._refresh_summary(full=True)
+
+    # ----------------- به‌روزرسانی جدول خلاصه -----------------
+    @api.model
+    def _refresh_summary(self, full=False):
+        """
+        بازسازی ردیف‌های خلاصه.
+
+        بدون ``full`` فقط این ماه‌ها دوباره محاسبه می‌شوند:
+          - ماه‌هایی که استعلامی در آن‌ها بعد از آخرین به‌روزرسانی نوشته شده
+            (ایندکس write_date)؛
+          - ماه‌هایی که تعداد استعلامشان با جدول خلاصه نمی‌خواند، یعنی
+            استعلامی از آن‌ها حذف شده (از جمله حذف cascade در دیتابیس).
+        """
+        cr = self.env.cr
+        ICP = self.env["ir.config_parameter"].sudo()
+        self.env.flush_all()
+        cr.execute("SELECT now() AT TIME ZONE 'UTC'")
+        started_at = cr.fetchone()[0]
+
+        refreshed_at = ICP.get_param(REFRESH_PARAM)
+        months = None
+        if not full and refreshed_at:
+            cr.execute(
+                """
+                SELECT DISTINCT date_trunc('month', create_date)::date
+                  FROM cm_carton_price_inquiry
+                 WHERE write_date >= %s::timestamp - interval %s
+                """,
+                [refreshed_at, REFRESH_OVERLAP],
+            )
+            months = {row[0] for row in cr.fetchall()}
+            months.update(self._get_stale_months())
+            months = sorted(months)
+            if not months:
+                ICP.set_param(REFRESH_PARAM, fields.Datetime.to_string(started_at))
+                return
+
+        if months is None:
+            cr.execute("DELETE FROM {summary}".format(summary=SUMMARY_TABLE))
+            month_clause, params = "", [REPORT_STATES]
+        else:
+            cr.execute(
+                "DELETE FROM {summary} WHERE month = ANY(%s)".format(
+                    summary=SUMMARY_TABLE
+                ),
+                [months],
+            )
+            # بازه‌ی create_date از ایندکس (state, create_date) استفاده می‌کند
+            month_clause = (
+                "AND i.create_date >= %s"
+                " AND i.create_date < %s::date + interval '1 month'"
+                " AND date_trunc('month', i.create_date)::date = ANY(%s)"
+            )
+            params = [REPORT_STATES, min(months), max(months), months]
+
+        # پیشنهاد انتخاب‌شده همان ترکیب کروگیتور/عرض ثبت‌شده روی استعلام است
+        cr.execute(
+            """
+            INSERT INTO {summary} (
+                month, partner_id, carton_type, inquiry_count, accepted_count,
+                quantity, revenue, cost, board_area_m2, waste_area_m2
+            )
+            SELECT
+                date_trunc('month', i.create_date)::date,
+                i.partner_id,
+                i.carton_type,
+                count(*),
+                count(*) FILTER (WHERE i.state = 'accepted'),
+                sum(i.quantity),
+                sum(i.quantity * COALESCE(
+                    CASE WHEN i.payment_type = 'credit'
+                         THEN i.sale_price_credit ELSE i.sale_price_cash END, 0)),
+                sum(i.quantity * COALESCE(i.base_cost_per_carton, 0)),
+                sum(COALESCE(s.board_area_m2, 0)),
+                sum(COALESCE(s.board_area_m2 * s.waste_percent / 100.0, 0))
+            FROM cm_carton_price_inquiry i
+            LEFT JOIN LATERAL (
+                SELECT board_area_m2, waste_percent
+                  FROM cm_carton_sheet_suggestion s
+                 WHERE s.price_inquiry_id = i.id
+                   AND s.industrial_width_cm = i.industrial_width_mm
+                   AND s.corrugator_id IS NOT DISTINCT FROM i.corrugator_id
+                 LIMIT 1
+            ) s ON TRUE
+            WHERE i.state IN %s
+              AND i.quantity > 0
+              {month_clause}
+            GROUP BY 1, 2, 3
+            """.format(summary=SUMMARY_TABLE, month_clause=month_clause),
+            params,
+        )
+        ICP.set_param(REFRESH_PARAM, fields.Datetime.to_string(started_at))
+
+    @api.model
+    def _get_stale_months(self):
+        """ماه‌هایی که تعداد استعلام‌های جدول خلاصه با خود استعلام‌ها فرق دارد."""
+        self.env.cr.execute(
+            """
+            SELECT month
+              FROM (
+                    SELECT date_trunc('month', create_date)::date AS month,
+                           count(*) AS inquiry_count
+                      FROM cm_carton_price_inquiry
+                     WHERE state IN %s
+                       AND quantity > 0
+                     GROUP BY 1
+                   ) actual
+              FULL JOIN (
+                    SELECT month, sum(inquiry_count) AS inquiry_count
+                      FROM {summary}
+                     GROUP BY 1
+                   ) summary USING (month)
+             WHERE actual.inquiry_count IS DISTINCT FROM summary.inquiry_count
+            """.format(summary=SUMMARY_TABLE),
+            [REPORT_STATES],
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _cron_refresh_summary(self):
+        self._refresh_summary()
@@ -0,0 +1,256 @@
+from collections import defaultdict
+from math import ceil
+
+from odoo import Command, api, fields, models, _
+
+from ..engine import planning as planning_engine
+from ..engine import pricing as pricing_engine
+
+# استعلام‌های قیمت‌خورده‌ای که در برنامه‌ی اجرا شرکت می‌کنند
+PLAN_STATES = ("calculated", "sent", "accepted")
+
+
+class CartonRunPlan(models.Model):
+    """
+    برنامه‌ی اجرای مشترک کروگیتور برای یک گرید ورق (تعداد لایه / گام فلوت).
+    محاسبه در engine/planning.py انجام و نتیجه با یک create ثبت می‌شود.
+    """
+
+    _name = "cm.carton.run_plan"
+    _description = "برنامه اجرای مشترک کروگیتور"
+    _order = "id desc"
+
+    name = fields.Char(
+        string="عنوان",
+        required=True,
+    )
+
+    layer_count = fields.Selection(
+        selection=lambda self: self.env["cm.carton.customer_product"]
+        ._fields["layer_count"]
+        .selection,
+        string="تعداد لایه",
+        readonly=True,
+    )
+
+    flute_step = fields.Selection(
+        selection=lambda self: self.env["cm.carton.customer_product"]
+        ._fields["flute_step"]
+        .selection,
+        string="گام فلوت",
+        readonly=True,
+    )
+
+    pattern_ids = fields.One2many(
+        "cm.carton.run_plan.pattern",
+        "plan_id",
+        string="مراحل اجرا",
+        readonly=True,
+    )
+
+    line_ids = fields.One2many(
+        "cm.carton.run_plan.line",
+        "plan_id",
+        string="سهم هر استعلام",
+        readonly=True,
+    )
+
+    unplanned_inquiry_ids = fields.Many2many(
+        "cm.carton.price_inquiry",
+        "cm_carton_run_plan_unplanned_rel",
+        "plan_id",
+        "price_inquiry_id",
+        string="استعلام‌های بدون عرض مناسب",
+        readonly=True,
+    )
+
+    run_length_m = fields.Float(string="طول کل اجرا (m)", readonly=True)
+    waste_m2 = fields.Float(string="دورریز کل (m²)", readonly=True)
+    waste_percent = fields.Float(string="درصد دورریز", readonly=True)
+
+    # ----------------- ساخت برنامه -----------------
+    @api.model
+    def _collect_jobs(self):
+        """
+        سفارش‌های هر گرید: dict (تعداد لایه، گام فلوت) ← لیست ``RunJob``
+        و نام محصول هر استعلام برای شرح لاین‌ها.
+        """
+        inquiries = self.env["cm.carton.price_inquiry"].search_fetch(
+            [
+                ("state", "in", PLAN_STATES),
+                ("quantity", ">", 0),
+                ("flat_width_mm", ">", 0),
+                ("flat_length_mm", ">", 0),
+            ],
+            [
+                "customer_product_id",
+                "carton_type",
+                "quantity",
+                "flat_width_mm",
+                "flat_length_mm",
+                "die_id",
+            ],
+        )
+        products = inquiries.customer_product_id
+        products.fetch(["name", "layer_count", "flute_step", "die_id"])
+        (inquiries.die_id | products.die_id).fetch(["cavities_per_sheet"])
+
+        groups = defaultdict(list)
+        names = {}
+        for rec in inquiries:
+            product = rec.customer_product_id
+            if not (product.layer_count and product.flute_step):
+                continue
+            # در دایکاتی/لمینتی ابعاد خوابیده همان ورق قالب است
+            cavities = 1
+            if rec.carton_type in pricing_engine.DIE_PRICED_TYPES:
+                die = rec.die_id or product.die_id
+                cavities = die.cavities_per_sheet or 1
+            groups[product.layer_count, product.flute_step].append(
+                planning_engine.RunJob(
+                    job_id=rec.id,
+                    flat_width_mm=rec.flat_width_mm,
+                    flat_length_mm=rec.flat_length_mm,
+                    blank_count=ceil(rec.quantity / cavities),
+                )
+            )
+            names[rec.id] = product.name
+        return groups, names
+
+    @api.model
+    def _prepare_plan_vals(self, layer_count, flute_step, plan, names):
+        return {
+            "name": _(
+                "%(layers)s لایه %(flute)s - %(date)s",
+                layers=layer_count,
+                flute=flute_step,
+                date=fields.Date.context_today(self),
+            ),
+            "layer_count": layer_count,
+            "flute_step": flute_step,
+            "run_length_m": plan.run_length_m,
+            "waste_m2": plan.waste_m2,
+            "waste_percent": plan.waste_percent,
+            "unplanned_inquiry_ids": [
+                Command.set(list(plan.unplanned_job_ids))
+            ],
+            "pattern_ids": [
+                Command.create(
+                    {
+                        "sequence": index,
+                        "corrugator_id": pattern.corrugator_id or False,
+                        "industrial_width_cm": pattern.industrial_width_cm,
+                        "lanes_description": " + ".join(
+                            "%s ×%s" % (names[job_id], lanes)
+                            for job_id, lanes in pattern.lanes
+                        ),
+                        "used_width_mm": pattern.used_width_mm,
+                        "run_length_m": pattern.run_length_m,
+                        "waste_m2": pattern.waste_m2,
+                        "waste_percent": pattern.waste_percent,
+                    }
+                )
+                for index, pattern in enumerate(plan.patterns, start=1)
+            ],
+            "line_ids": [
+                Command.create(
+                    {
+                        "price_inquiry_id": job.job_id,
+                        "run_length_m": job.run_length_m,
+                        "board_area_m2": job.board_area_m2,
+                        "waste_m2": job.waste_m2,
+                        "waste_percent": job.waste_percent,
+                    }
+                )
+                for job in plan.jobs
+            ],
+        }
+
+    @api.model
+    def _generate_run_plans(self):
+        """یک برنامه برای هر گرید، از روی استعلام‌های قیمت‌خورده و تأییدشده."""
+        groups, names = self._collect_jobs()
+        machines, __ = self.env["cm.carton.corrugator"]._get_machine_park(
+            self.env.company.id
+        )
+        return self.create(
+            [
+                self._prepare_plan_vals(
+                    layer_count,
+                    flute_step,
+                    planning_engine.plan_runs(jobs, machines),
+                    names,
+                )
+                for (layer_count, flute_step), jobs in sorted(groups.items())
+            ]
+        )
+
+    @api.model
+    def action_generate(self):
+        plans = self._generate_run_plans()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("برنامه‌های اجرای کروگیتور"),
+            "res_model": self._name,
+            "view_mode": "list,form",
+            "domain": [("id", "in", plans.ids)],
+        }
+
+
+class CartonRunPlanPattern(models.Model):
+    _name = "cm.carton.run_plan.pattern"
+    _description = "مرحله اجرای مشترک کروگیتور"
+    _order = "plan_id, sequence"
+
+    plan_id = fields.Many2one(
+        "cm.carton.run_plan",
+        string="برنامه",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    sequence = fields.Integer(string="ترتیب")
+
+    corrugator_id = fields.Many2one(
+        "cm.carton.corrugator",
+        string="کروگیتور",
+    )
+
+    industrial_width_cm = fields.Float(string="عرض صنعتی (cm)")
+    lanes_description = fields.Char(string="لاین‌ها")
+    used_width_mm = fields.Float(string="عرض استفاده‌شده (mm)")
+    run_length_m = fields.Float(string="طول اجرا (m)")
+    waste_m2 = fields.Float(string="دورریز (m²)")
+    waste_percent = fields.Float(string="درصد دورریز عرضی")
+
+
+class CartonRunPlanLine(models.Model):
+    _name = "cm.carton.run_plan.line"
+    _description = "سهم استعلام از اجرای مشترک"
+    _order = "plan_id, waste_percent desc"
+
+    plan_id = fields.Many2one(
+        "cm.carton.run_plan",
+        string="برنامه",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    price_inquiry_id = fields.Many2one(
+        "cm.carton.price_inquiry",
+        string="استعلام قیمت",
+        required=True,
+        ondelete="cascade",
+    )
+
+    partner_id = fields.Many2one(
+        related="price_inquiry_id.partner_id",
+        string="مشتری",
+    )
+
+    run_length_m = fields.Float(string="طول اجرا (m)")
+    board_area_m2 = fields.Float(string="مصرف ورق (m²)")
+    waste_m2 = fields.Float(string="سهم دورریز (m²)")
+    waste_percent = fields.Float(string="درصد دورریز")
@@ -0,0 +1,5 @@
+# cm_carton_pricing/tests/__init__.py
+from . import test_benchmark_pending
+from . import test_benchmark_pricing
+from . import test_pricing
+from . import test_wizards
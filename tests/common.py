@@ -0,0 +1,180 @@
+# cm_carton_pricing/tests/common.py
+"""
+پایه‌ی بنچمارک‌ها: تولید داده‌ی مصنوعی و اندازه‌گیری زمان، تعداد کوئری و حافظه.
+
+متغیرهای محیطی:
+  - CM_CARTON_BENCH_SIZE: تعداد استعلام‌ها (پیش‌فرض هر کلاس در ``DEFAULT_SIZE``)
+  - CM_CARTON_BENCH_PARTNERS: تعداد مشتری‌ها
+  - CM_CARTON_BENCH_DIR: اگر تعیین شود، نتیجه هر کلاس در <dir>/<کلاس>.json نوشته می‌شود
+"""
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from odoo.modules.module import get_manifest
+from odoo.tests import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+CARTON_TYPES = ("normal", "diecut", "laminated", "sheet")
+
+
+class CartonBenchmarkCase(TransactionCase):
+    DEFAULT_SIZE = 1000
+    DEFAULT_PARTNERS = 20
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(
+            context=dict(
+                cls.env.context,
+                tracking_disable=True,
+                mail_create_nolog=True,
+                mail_notrack=True,
+            )
+        )
+        cls.bench_size = int(os.environ.get("CM_CARTON_BENCH_SIZE", cls.DEFAULT_SIZE))
+        cls.bench_partners = int(
+            os.environ.get("CM_CARTON_BENCH_PARTNERS", cls.DEFAULT_PARTNERS)
+        )
+        cls.bench_results = {}
+        # بنچمارک‌ها اجرای داخل درخواست را اندازه می‌گیرند، نه صف کرون
+        cls.env["ir.config_parameter"].sudo().set_param(
+            "cm_carton_pricing.queue_threshold", 10**9
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        report = {
+            "benchmark": cls.__name__,
+            "module_version": get_manifest("cm_carton_pricing").get("version"),
+            "size": cls.bench_size,
+            "partners": cls.bench_partners,
+            "results": cls.bench_results,
+        }
+        payload = json.dumps(report, ensure_ascii=False, sort_keys=True)
+        _logger.info("cm_carton_pricing benchmark: %s", payload)
+
+        out_dir = os.environ.get("CM_CARTON_BENCH_DIR")
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, "%s.json" % cls.__name__), "w") as f:
+                f.write(payload)
+        super().tearDownClass()
+
+    # -----------------------------------------------------
+    #   داده‌ی مصنوعی
+    # -----------------------------------------------------
+    @classmethod
+    def generate_data(cls, size=None, partners=None, states=None):
+        """
+        مشتری‌ها، محصول فروش، برای هر مشتری یک محصول از هر ``carton_type``
+        (دایکاتی/لمینتی با قالب) و ``size`` استعلام مسیر سریع می‌سازد.
+        ``states`` اگر داده شود، به صورت چرخشی روی استعلام‌ها نوشته می‌شود.
+        """
+        size = cls.bench_size if size is None else size
+        partners = cls.bench_partners if partners is None else partners
+
+        partner_recs = cls.env["res.partner"].create(
+            [{"name": "Bench partner %s" % i} for i in range(partners)]
+        )
+        sale_product = cls.env["product.product"].create(
+            {"name": "Bench carton", "type": "consu"}
+        )
+
+        product_vals, die_vals = [], []
+        for p_index, partner in enumerate(partner_recs):
+            for t_index, carton_type in enumerate(CARTON_TYPES):
+                # ابعاد متنوع تا کش چیدمان همه‌ی ورودی‌ها را یکسان نبیند
+                length = 20.0 + (p_index * 7 + t_index * 3) % 40
+                width = 15.0 + (p_index * 5 + t_index) % 30
+                height = 10.0 + (p_index * 3 + t_index * 2) % 35
+                product_vals.append(
+                    {
+                        "partner_id": partner.id,
+                        "name": "Bench %s %s" % (carton_type, p_index),
+                        "carton_type": carton_type,
+                        "length": length,
+                        "width": width,
+                        "height": height,
+                        "sale_product_id": sale_product.id,
+                    }
+                )
+                if carton_type in ("diecut", "laminated"):
+                    die_vals.append(
+                        {
+                            "name": "Bench die %s %s" % (carton_type, p_index),
+                            "blade_length_mm": (2 * (length + width)) * 10 + 40,
+                            "blade_width_mm": (height + width) * 10,
+                            "cavities_per_sheet": 1 + p_index % 3,
+                            "die_cost": 5000000.0,
+                            "lifetime_sheets": 200000,
+                        }
+                    )
+
+        products = cls.env["cm.carton.customer_product"].create(product_vals)
+        dies = iter(cls.env["cm.carton.die"].create(die_vals))
+        for product in products:
+            if product.carton_type in ("diecut", "laminated"):
+                product.die_id = next(dies)
+
+        inquiry_vals = []
+        for i in range(size):
+            product = products[i % len(products)]
+            vals = {
+                "partner_id": product.partner_id.id,
+                "customer_product_id": product.id,
+                "flow_mode": "quick",
+                "quantity": 1000 * (1 + i % 20),
+                "paper_price_per_m2": 25000.0 + (i % 7) * 1000,
+                "margin_cash_percent": 15.0,
+                "margin_credit_percent": 25.0,
+            }
+            if states:
+                vals["state"] = states[i % len(states)]
+            inquiry_vals.append(vals)
+
+        Inquiry = cls.env["cm.carton.price_inquiry"]
+        inquiries = Inquiry.browse()
+        for start in range(0, size, 1000):
+            inquiries |= Inquiry.create(inquiry_vals[start : start + 1000])
+
+        cls.env.flush_all()
+        cls.env.cr.execute("ANALYZE cm_carton_price_inquiry")
+        return partner_recs, products, inquiries
+
+    # -----------------------------------------------------
+    #   اندازه‌گیری
+    # -----------------------------------------------------
+    @contextmanager
+    def measure(self, name, count=1):
+        """
+        زمان دیوار، تعداد کوئری SQL و اوج حافظه‌ی پایتون یک بلوک را ثبت می‌کند.
+        ``count`` تعداد رکورد/عملیات است تا میانگین هر واحد هم گزارش شود.
+        """
+        self.env.flush_all()
+        self.env.invalidate_all()
+        cr = self.env.cr
+        queries_before = cr.sql_log_count
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+            self.env.flush_all()
+        finally:
+            wall_ms = (time.perf_counter() - start) * 1000.0
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            queries = cr.sql_log_count - queries_before
+            self.bench_results[name] = {
+                "count": count,
+                "wall_ms": round(wall_ms, 3),
+                "wall_ms_per_item": round(wall_ms / count, 3) if count else None,
+                "queries": queries,
+                "queries_per_item": round(queries / count, 3) if count else None,
+                "peak_memory_kb": round(peak / 1024.0, 1),
+            }
@@ -0,0 +1,50 @@
+# cm_carton_pricing/tests/test_benchmark_pending.py
+"""
+بنچمارک لیست «استعلام‌های در انتظار» قبل و بعد از ایندکس‌ها.
+
+در اجرای عادی تست‌ها اجرا نمی‌شود؛ برای اجرا:
+    odoo-bin -d <db> -i cm_carton_pricing --test-tags benchmark
+"""
+from odoo.tests import tagged
+
+from .common import CartonBenchmarkCase
+
+INDEX_NAMES = (
+    "cm_carton_price_inquiry_state_create_date_idx",
+    "cm_carton_price_inquiry_partner_product_idx",
+    "cm_carton_price_inquiry_pending_create_date_idx",
+    "cm_carton_price_inquiry__is_pending_index",
+)
+
+
+@tagged("post_install", "-at_install", "benchmark", "-standard")
+class TestPendingInquiriesBenchmark(CartonBenchmarkCase):
+    DEFAULT_SIZE = 20000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Inquiry = cls.env["cm.carton.price_inquiry"]
+        cls.partners, _products, _inquiries = cls.generate_data(
+            states=[state for state, _label in Inquiry.STATE_SELECTION]
+        )
+
+    def _run_scenarios(self, suffix):
+        Inquiry = self.env["cm.carton.price_inquiry"]
+        pending_states = list(Inquiry.PENDING_STATES)
+        scenarios = {
+            "pending_list": [("is_pending", "=", True)],
+            "pending_by_state": [("state", "in", pending_states)],
+            "partner_inquiries": [("partner_id", "=", self.partners[0].id)],
+        }
+        for name, domain in scenarios.items():
+            with self.measure("%s_%s" % (name, suffix)):
+                Inquiry.search(domain, limit=80)
+
+    def test_pending_list_latency(self):
+        self._run_scenarios("with_indexes")
+
+        # ایندکس‌ها داخل تراکنش تست حذف می‌شوند و در rollback برمی‌گردند
+        for name in INDEX_NAMES:
+            self.env.cr.execute('DROP INDEX IF EXISTS "%s"' % name)
+        self._run_scenarios("without_indexes")
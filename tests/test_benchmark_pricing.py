@@ -0,0 +1,101 @@
+# cm_carton_pricing/tests/test_benchmark_pricing.py
+"""
+بنچمارک خط قیمت‌گذاری: محاسبه تکی و دسته‌ای، پیشنهاد عرض ورق، تأیید و جستجوی لیست.
+
+در اجرای عادی تست‌ها اجرا نمی‌شود؛ برای اجرا:
+    odoo-bin -d <db> -i cm_carton_pricing --test-tags benchmark
+"""
+from odoo.tests import tagged
+
+from ..engine.cache import RESULT_CACHE
+from .common import CartonBenchmarkCase
+
+# تعداد رکورد برای سناریوهای تکی (دکمه روی هر رکورد)
+SINGLE_SAMPLE = 200
+
+
+@tagged("post_install", "-at_install", "benchmark", "-standard")
+class TestPricingBenchmark(CartonBenchmarkCase):
+    DEFAULT_SIZE = 2000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partners, cls.products, cls.inquiries = cls.generate_data()
+
+    def _reset_pricing(self, inquiries):
+        """شروع از حالت محاسبه‌نشده؛ خارج از بازه‌ی اندازه‌گیری."""
+        RESULT_CACHE.clear()
+        inquiries.suggestion_ids.unlink()
+        inquiries.write(
+            {
+                "pricing_fingerprint": False,
+                "suggestion_input_key": False,
+                "industrial_width_mm": 0.0,
+                "corrugator_id": False,
+                "state": "draft",
+            }
+        )
+
+    def test_01_single_compute(self):
+        sample = self.inquiries[:SINGLE_SAMPLE]
+        self._reset_pricing(sample)
+        with self.measure("single_compute", count=len(sample)):
+            for inquiry in sample:
+                inquiry.action_compute()
+
+        # کلیک دوم با ورودی‌های بدون تغییر
+        with self.measure("single_compute_unchanged", count=len(sample)):
+            for inquiry in sample:
+                inquiry.action_compute()
+
+    def test_02_batch_compute(self):
+        self._reset_pricing(self.inquiries)
+        with self.measure("batch_compute", count=len(self.inquiries)):
+            self.inquiries.action_compute_batch()
+
+        with self.measure("batch_compute_unchanged", count=len(self.inquiries)):
+            self.inquiries.action_compute_batch()
+
+    def test_03_sheet_suggestions(self):
+        sample = self.inquiries[:SINGLE_SAMPLE]
+        sample.action_compute_batch()
+        sample.suggestion_ids.unlink()
+        sample.write({"suggestion_input_key": False})
+        with self.measure("generate_sheet_suggestions", count=len(sample)):
+            sample._generate_sheet_suggestions()
+
+    def test_04_accept(self):
+        sample = self.inquiries[:SINGLE_SAMPLE]
+        merged = self.inquiries[SINGLE_SAMPLE : 2 * SINGLE_SAMPLE]
+        (sample | merged).action_compute_batch()
+        with self.measure("accept", count=len(sample)):
+            sample.action_accept()
+        with self.measure("accept_merged_by_partner", count=len(merged)):
+            merged.action_accept_merged()
+
+    def test_05_list_search(self):
+        self.inquiries.action_compute_batch()
+        Inquiry = self.env["cm.carton.price_inquiry"]
+        list_fields = [
+            "create_date",
+            "partner_id",
+            "customer_product_id",
+            "carton_type",
+            "quantity",
+            "flow_mode",
+            "industrial_width_mm",
+            "base_cost_per_carton",
+            "unit_price_with_tax",
+            "state",
+        ]
+        with self.measure("list_search_read"):
+            Inquiry.search_read([], list_fields, limit=80)
+        with self.measure("pending_search_read"):
+            Inquiry.search_read([("is_pending", "=", True)], list_fields, limit=80)
+        with self.measure("partner_search_read"):
+            Inquiry.search_read(
+                [("partner_id", "=", self.partners[0].id)], list_fields, limit=80
+            )
+        with self.measure("read_group_state"):
+            Inquiry.read_group([], ["state"], ["state"])
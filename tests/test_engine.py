@@ -0,0 +1,273 @@
+# cm_carton_pricing/tests/test_engine.py
+"""
+تست‌های موتور قیمت‌گذاری مستقل از ORM (بدون odoo).
+
+پکیج ``engine`` به odoo وابسته نیست، پس این تست‌ها unittest ساده‌اند و
+بدون رجیستری اجرا می‌شوند:
+    python -m unittest discover -s tests -p "test_engine.py"
+"""
+import os
+import random
+import sys
+import unittest
+from dataclasses import replace
+from math import floor
+
+try:
+    from ..engine import batch, nesting, planning, pricing
+    from ..engine.cache import LRUCache
+except ImportError:
+    # اجرای مستقل: ریشه‌ی ماژول به جای پکیج odoo روی مسیر
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from engine import batch, nesting, planning, pricing
+    from engine.cache import LRUCache
+
+
+def _inputs():
+    """ورودی‌های نمونه از هر نوع کارتن، با و بدون قالب."""
+    die = pricing.DieSpec(
+        blade_length_mm=820.0,
+        blade_width_mm=540.0,
+        cavities_per_sheet=2,
+        book_value=4000000.0,
+        cost_per_sheet=25.0,
+    )
+    base = pricing.PricingInput(
+        quantity=3000,
+        length_cm=40.0,
+        width_cm=30.0,
+        height_cm=25.0,
+        paper_price_per_m2=30000.0,
+        lamination_price_per_m2=4000.0,
+        cliche_cost=2500000.0,
+        print_cost_per_1000=180000.0,
+        margin_cash_percent=15.0,
+        margin_credit_percent=25.0,
+        tax_percent=10.0,
+    )
+    return [
+        base,
+        replace(base, carton_type="sheet", height_cm=0.0),
+        replace(base, carton_type="diecut", die=die),
+        replace(base, carton_type="laminated", die=die, payment_type="credit"),
+        replace(base, flow_mode="full", quantity=750, industrial_width_cm=120.0),
+        # قالب دایکاتی تعریف نشده: خطای ورودی
+        replace(base, carton_type="diecut"),
+    ]
+
+
+class TestBatchPricing(unittest.TestCase):
+    def assertResultsEqual(self, left, right):
+        left_vals, right_vals = left.to_vals(), right.to_vals()
+        self.assertEqual(set(left_vals), set(right_vals))
+        for key, value in left_vals.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.assertAlmostEqual(value, right_vals[key], places=6, msg=key)
+            else:
+                self.assertEqual(value, right_vals[key], key)
+        self.assertEqual(
+            [s.to_vals() for s in left.suggestions],
+            [s.to_vals() for s in right.suggestions],
+        )
+
+    def test_price_many_matches_scalar_price(self):
+        inputs = _inputs()
+        results, errors = batch.price_many(inputs, cache=LRUCache(1))
+
+        self.assertEqual(len(results), len(inputs))
+        for i, inp in enumerate(inputs):
+            try:
+                expected = pricing.price(inp)
+            except pricing.PricingError as e:
+                self.assertEqual(errors.get(i), e.code)
+                self.assertIsNone(results[i])
+                continue
+            self.assertNotIn(i, errors)
+            self.assertResultsEqual(results[i], expected)
+        self.assertEqual(len(errors), 1)
+
+    def test_price_many_reuses_cache(self):
+        cache = LRUCache()
+        inputs = _inputs()[:2]
+        first, __ = batch.price_many(inputs, cache=cache)
+        second, __ = batch.price_many(inputs, cache=cache)
+        for a, b in zip(first, second):
+            self.assertIs(a, b)
+
+    def test_price_ladder_matches_scalar_prices(self):
+        inp = _inputs()[2]
+        quantities = [500, 1000, 3000, 10000]
+
+        ladder = batch.price_ladder(inp, quantities)
+
+        self.assertEqual(len(ladder), len(quantities))
+        for quantity, breakdown in zip(quantities, ladder):
+            expected = pricing.price(replace(inp, quantity=quantity)).prices
+            for field in (
+                "base_cost_per_carton",
+                "sale_price_cash",
+                "sale_price_credit",
+                "unit_price_with_tax",
+                "total_price_with_tax",
+            ):
+                self.assertAlmostEqual(
+                    getattr(breakdown, field), getattr(expected, field), places=6
+                )
+
+    def test_price_ladder_raises_on_invalid_input(self):
+        with self.assertRaises(pricing.PricingError):
+            batch.price_ladder(_inputs()[-1], [1000, 2000])
+
+    def test_fingerprint_is_stable_after_settle(self):
+        inp = _inputs()[0]
+        result = pricing.price(inp)
+        settled = pricing.settle(inp, result.industrial_width_cm, result.corrugator_id)
+
+        self.assertEqual(result.input_fingerprint, pricing.fingerprint(settled))
+        self.assertEqual(
+            pricing.price(settled).input_fingerprint, result.input_fingerprint
+        )
+        self.assertNotEqual(
+            pricing.fingerprint(replace(settled, quantity=settled.quantity + 1)),
+            result.input_fingerprint,
+        )
+
+
+class TestNesting(unittest.TestCase):
+    def _best(self, flat_w_cm, flat_l_cm, width_cm=100.0, allow_rotation=True):
+        [layout] = nesting.best_layouts(
+            flat_w_cm, flat_l_cm, (width_cm,), 0.0, allow_rotation
+        )
+        return layout
+
+    def test_normal_layout(self):
+        layout = self._best(30.0, 100.0, allow_rotation=False)
+        self.assertEqual(layout.orientation, "normal")
+        self.assertEqual((layout.normal_count, layout.rotated_count), (3, 0))
+        self.assertAlmostEqual(layout.waste_cm, 10.0)
+
+    def test_rotated_layout(self):
+        # عادی: یک بلنک ۶۰ سانتی؛ چرخیده: دو بلنک ۵۰ سانتی بدون ضایعات
+        layout = self._best(60.0, 50.0)
+        self.assertEqual(layout.orientation, "rotated")
+        self.assertEqual((layout.normal_count, layout.rotated_count), (0, 2))
+        self.assertAlmostEqual(layout.waste_cm, 0.0)
+
+    def test_mixed_layout(self):
+        # دو لاین عادی ۳۰ + یک لاین چرخیده ۴۰ = ۱۰۰ بدون ضایعات
+        layout = self._best(30.0, 40.0)
+        self.assertEqual(layout.orientation, "mixed")
+        self.assertEqual((layout.normal_count, layout.rotated_count), (2, 1))
+        self.assertAlmostEqual(layout.waste_cm, 0.0)
+
+    def test_widths_without_fit_are_skipped(self):
+        layouts = nesting.best_layouts(120.0, 150.0, (100.0, 140.0), 2.0, False)
+        self.assertEqual([l.industrial_width_cm for l in layouts], [140.0])
+
+    def test_pareto_flag(self):
+        rows = nesting.nest(
+            flat_width_mm=370.0,
+            flat_length_mm=1450.0,
+            quantity=5000,
+            industrial_widths_cm=(80.0, 90.0, 100.0, 110.0, 120.0, 130.0, 140.0),
+            side_margin_cm=2.0,
+        )
+        self.assertTrue(any(r["is_pareto_optimal"] for r in rows))
+        for row in rows:
+            dominated = any(
+                other["waste_percent"] <= row["waste_percent"]
+                and other["total_length_cm"] <= row["total_length_cm"]
+                and (
+                    other["waste_percent"] < row["waste_percent"]
+                    or other["total_length_cm"] < row["total_length_cm"]
+                )
+                for other in rows
+            )
+            self.assertEqual(row["is_pareto_optimal"], not dominated)
+
+    def test_pareto_flag_on_suggestions(self):
+        result = pricing.price(_inputs()[0])
+        front = nesting.pareto_front(result.suggestions)
+        self.assertEqual(
+            [s.is_pareto_optimal for s in result.suggestions],
+            [s in front for s in result.suggestions],
+        )
+
+
+class TestDieSpec(unittest.TestCase):
+    def test_charge_is_amortized_per_sheet(self):
+        die = pricing.DieSpec(book_value=1000.0, cost_per_sheet=10.0)
+        self.assertAlmostEqual(die.charge_for(50), 500.0)
+
+    def test_charge_is_capped_at_book_value(self):
+        die = pricing.DieSpec(book_value=1000.0, cost_per_sheet=10.0)
+        self.assertAlmostEqual(die.charge_for(500), 1000.0)
+
+    def test_charge_without_lifetime_is_book_value(self):
+        die = pricing.DieSpec(book_value=1000.0)
+        self.assertAlmostEqual(die.charge_for(1), 1000.0)
+
+    def test_fully_depreciated_die_is_free(self):
+        die = pricing.DieSpec(book_value=-5.0, cost_per_sheet=10.0)
+        self.assertEqual(die.charge_for(100), 0.0)
+
+
+class TestRunPlanning(unittest.TestCase):
+    MACHINES = (
+        pricing.MachineSpec(1, (80.0, 90.0, 100.0, 110.0, 120.0, 140.0), 2.0),
+        pricing.MachineSpec(2, (160.0, 200.0, 250.0), 2.0),
+    )
+
+    def _produced_blanks(self, plan, jobs):
+        """بلنک‌های کامل هر سفارش: فقط برش‌های کامل هر لاین."""
+        by_id = {job.job_id: job for job in jobs}
+        produced = {}
+        for pattern in plan.patterns:
+            for job_id, lanes in pattern.lanes:
+                blanks = floor(
+                    pattern.run_length_m * 1000.0 / by_id[job_id].flat_length_mm + 1e-6
+                )
+                produced[job_id] = produced.get(job_id, 0) + lanes * blanks
+        return produced
+
+    def test_never_underproduces(self):
+        rng = random.Random(7)
+        for max_orders in (2, 3):
+            jobs = [
+                planning.RunJob(
+                    job_id=i,
+                    flat_width_mm=rng.uniform(150.0, 1300.0),
+                    flat_length_mm=rng.uniform(300.0, 1800.0),
+                    blank_count=rng.randint(1, 5000),
+                )
+                for i in range(40)
+            ]
+            plan = planning.plan_runs(jobs, self.MACHINES, max_orders=max_orders)
+            produced = self._produced_blanks(plan, jobs)
+            for job in jobs:
+                self.assertGreaterEqual(produced.get(job.job_id, 0), job.blank_count)
+
+    def test_patterns_fit_usable_width(self):
+        jobs = [
+            planning.RunJob(i, 200.0 + 97.0 * i, 600.0, 1000 + 10 * i)
+            for i in range(10)
+        ]
+        plan = planning.plan_runs(jobs, self.MACHINES)
+        for pattern in plan.patterns:
+            self.assertLessEqual(
+                pattern.used_width_mm, pattern.industrial_width_cm * 10.0 - 40.0 + 1e-6
+            )
+            self.assertLessEqual(len(pattern.lanes), planning.MAX_ORDERS)
+
+    def test_too_wide_job_is_unplanned(self):
+        jobs = [
+            planning.RunJob(1, 500.0, 800.0, 100),
+            planning.RunJob(2, 2600.0, 800.0, 100),
+        ]
+        plan = planning.plan_runs(jobs, self.MACHINES)
+        self.assertEqual(plan.unplanned_job_ids, (2,))
+        self.assertEqual([job.job_id for job in plan.jobs], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,280 @@
+# cm_carton_pricing/tests/test_pricing.py
+"""تست‌های عملکردی خط قیمت‌گذاری استعلام."""
+from odoo import Command, fields
+from odoo.tests import HttpCase, TransactionCase, tagged
+
+from ..models.carton_models import PUBLIC_ESTIMATE_KEYS, PUBLIC_ESTIMATE_LAYOUT_KEYS
+from ..models.carton_pricing_report import SUMMARY_TABLE
+
+
+@tagged("post_install", "-at_install")
+class TestInquiryPricing(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.partner = cls.env["res.partner"].create({"name": "Pricing customer"})
+        liner, flute = cls.env["cm.carton.paper"].create(
+            [
+                {"name": "Test liner 140", "grammage_gsm": 140.0},
+                {"name": "Test fluting 127", "grammage_gsm": 127.0},
+            ]
+        )
+        cls.env["cm.carton.paper.price"].create(
+            [
+                {
+                    "paper_id": paper.id,
+                    "date_from": fields.Date.today(),
+                    "price_per_kg": 30000.0,
+                }
+                for paper in (liner, flute)
+            ]
+        )
+        cls.grade = cls.env["cm.carton.board_grade"].create(
+            {
+                "name": "Test 3 layer B",
+                "layer_count": "3",
+                "flute_step": "B",
+                "layer_ids": [
+                    Command.create({"role": "liner", "paper_id": liner.id}),
+                    Command.create(
+                        {
+                            "role": "flute",
+                            "flute_profile": "B",
+                            "paper_id": flute.id,
+                        }
+                    ),
+                    Command.create({"role": "liner", "paper_id": liner.id}),
+                ],
+            }
+        )
+        cls.product = cls.env["cm.carton.customer_product"].create(
+            {
+                "partner_id": cls.partner.id,
+                "name": "Test normal carton",
+                "carton_type": "normal",
+                "layer_count": "3",
+                "flute_step": "B",
+                "board_grade_id": cls.grade.id,
+                "length": 30.0,
+                "width": 20.0,
+                "height": 15.0,
+            }
+        )
+
+    def test_compute_with_board_grade(self):
+        inquiry = self.env["cm.carton.price_inquiry"].create(
+            {
+                "partner_id": self.partner.id,
+                "customer_product_id": self.product.id,
+                "flow_mode": "quick",
+                "quantity": 2000,
+            }
+        )
+        self.assertEqual(inquiry.board_grade_id, self.grade)
+
+        inquiry.action_compute()
+
+        self.assertEqual(inquiry.state, "calculated")
+        self.assertAlmostEqual(
+            inquiry.paper_price_per_m2, self.grade.price_per_m2_today
+        )
+        self.assertGreater(inquiry.paper_price_per_m2, 0.0)
+        self.assertGreater(inquiry.material_cost_total, 0.0)
+        self.assertGreater(inquiry.sale_price_cash, 0.0)
+
+    def _create_inquiry(self, product=None, **vals):
+        return self.env["cm.carton.price_inquiry"].create(
+            dict(
+                {
+                    "partner_id": self.partner.id,
+                    "customer_product_id": (product or self.product).id,
+                    "flow_mode": "quick",
+                    "quantity": 2000,
+                },
+                **vals,
+            )
+        )
+
+    def test_unchanged_inputs_skip_compute(self):
+        inquiry = self._create_inquiry()
+        inquiry.action_compute()
+        fingerprint = inquiry.pricing_fingerprint
+        self.assertTrue(fingerprint)
+
+        # نتیجه‌ی دست‌خورده نشان می‌دهد محاسبه و write تکرار نشده است
+        inquiry.sale_price_cash = 1.0
+        inquiry.action_compute()
+        self.assertEqual(inquiry.sale_price_cash, 1.0)
+        self.assertEqual(inquiry.pricing_fingerprint, fingerprint)
+
+        inquiry.quantity = 3000
+        inquiry.action_compute()
+        self.assertNotEqual(inquiry.sale_price_cash, 1.0)
+        self.assertNotEqual(inquiry.pricing_fingerprint, fingerprint)
+
+    def test_suggestions_are_updated_in_place(self):
+        inquiry = self._create_inquiry()
+        inquiry.action_compute()
+        suggestions = inquiry.suggestion_ids
+        self.assertTrue(suggestions)
+        lengths = suggestions.mapped("total_length_cm")
+
+        # عرض‌ها همان‌اند و فقط طول کل با تیراژ عوض می‌شود
+        inquiry.quantity = 6000
+        inquiry.action_compute()
+
+        self.assertEqual(inquiry.suggestion_ids, suggestions)
+        self.assertNotEqual(suggestions.mapped("total_length_cm"), lengths)
+
+    def test_cliche_costs_are_scoped_to_carton_type(self):
+        product = self.product.copy({"name": "Test printed carton", "has_print": True})
+        Cliche = self.env["cm.carton.cliche"]
+        normal, laminate = Cliche.create(
+            [
+                {
+                    "customer_product_id": product.id,
+                    "name": "Flexo logo",
+                    "cliche_cost": 2000000.0,
+                    "print_cost_per_1000": 150000.0,
+                },
+                {
+                    "customer_product_id": product.id,
+                    "name": "Laminate print",
+                    "cliche_cost": 9000000.0,
+                    "print_cost_per_1000": 700000.0,
+                    "is_laminate": True,
+                },
+            ]
+        )
+
+        summary = Cliche._get_cliche_summary(product.id, "normal")
+        self.assertEqual(summary.new_cliche_cost, normal.cliche_cost)
+        self.assertEqual(summary.print_cost_per_1000, normal.print_cost_per_1000)
+        summary = Cliche._get_cliche_summary(product.id, "laminated")
+        self.assertEqual(summary.new_cliche_cost, laminate.cliche_cost)
+
+        inquiry = self._create_inquiry(product)
+        self.assertFalse(inquiry.need_print_quote)
+        inquiry.action_compute()
+        self.assertEqual(inquiry.cliche_cost, normal.cliche_cost)
+        self.assertAlmostEqual(inquiry.print_cost_total, 2000 * 150000.0 / 1000.0)
+
+        # کلیشه‌ی ساخته‌شده دوباره در قیمت نمی‌آید (کش کاتالوگ به‌روز می‌شود)
+        normal.is_made = True
+        self.assertEqual(
+            Cliche._get_cliche_summary(product.id, "normal").new_cliche_cost, 0.0
+        )
+
+    def test_cliche_edit_recomputes_draft_inquiries_only(self):
+        product = self.product.copy({"name": "Test print quote", "has_print": True})
+        cliche = self.env["cm.carton.cliche"].create(
+            {
+                "customer_product_id": product.id,
+                "name": "Flexo logo",
+                "print_cost_per_1000": 150000.0,
+            }
+        )
+        draft = self._create_inquiry(product)
+        calculated = self._create_inquiry(product)
+        calculated.action_compute()
+        self.assertFalse(draft.need_print_quote)
+
+        cliche.print_cost_per_1000 = 0.0
+
+        self.assertTrue(draft.need_print_quote)
+        self.assertEqual(draft.flow_mode, "full")
+        self.assertFalse(calculated.need_print_quote)
+        self.assertEqual(calculated.flow_mode, "quick")
+
+
+@tagged("post_install", "-at_install")
+class TestPricingApi(HttpCase):
+    # داده‌های هزینه‌ای که نباید به کاربر ناشناس برسند
+    COST_KEYS = {
+        "paper_price_per_m2",
+        "material_cost_total",
+        "overhead_cost_total",
+        "base_cost_per_carton",
+    }
+
+    def test_public_estimate_has_no_costs(self):
+        result = self.make_jsonrpc_request(
+            "/cm_carton_pricing/api/estimate",
+            {
+                "carton_type": "normal",
+                "length_cm": 40,
+                "width_cm": 30,
+                "height_cm": 25,
+                "quantity": 3000,
+                "paper_price_per_m2": 30000,
+            },
+        )
+        self.assertNotIn("error", result)
+        self.assertGreater(result["sale_price_cash"], 0.0)
+        self.assertFalse(self.COST_KEYS & set(result))
+
+    def test_public_estimate_returns_whitelisted_keys_only(self):
+        result = self.make_jsonrpc_request(
+            "/cm_carton_pricing/api/estimate",
+            {
+                "carton_type": "normal",
+                "length_cm": 40,
+                "width_cm": 30,
+                "height_cm": 25,
+                "quantity": 3000,
+                "paper_price_per_m2": 30000,
+            },
+        )
+        self.assertEqual(set(result), set(PUBLIC_ESTIMATE_KEYS) | {"layout"})
+        self.assertTrue(result["layout"])
+        self.assertEqual(set(result["layout"]), set(PUBLIC_ESTIMATE_LAYOUT_KEYS))
+
+
+@tagged("post_install", "-at_install")
+class TestPricingReport(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Report = cls.env["cm.carton.pricing.report"]
+        cls.partner = cls.env["res.partner"].create({"name": "Report customer"})
+
+    def _insert_summary(self, month, revenue, cost, board_area, waste_area):
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {SUMMARY_TABLE} (
+                month, partner_id, carton_type, inquiry_count,
+                revenue, cost, board_area_m2, waste_area_m2
+            )
+            VALUES (%s, %s, 'normal', 1, %s, %s, %s, %s)
+            """,
+            [month, self.partner.id, revenue, cost, board_area, waste_area],
+        )
+
+    def test_group_ratios_come_from_sums(self):
+        self._insert_summary("2001-01-01", 1000.0, 900.0, 10.0, 1.0)
+        self._insert_summary("2001-02-01", 100.0, 0.0, 90.0, 0.0)
+
+        [row] = self.Report.read_group(
+            [("partner_id", "=", self.partner.id)],
+            ["margin_percent", "price_per_m2", "waste_percent", "revenue:sum"],
+            ["partner_id"],
+        )
+
+        self.assertAlmostEqual(row["margin_percent"], 200.0 * 100.0 / 1100.0)
+        self.assertAlmostEqual(row["price_per_m2"], 1100.0 / 100.0)
+        self.assertAlmostEqual(row["waste_percent"], 1.0)
+        self.assertAlmostEqual(row["revenue"], 1100.0)
+        self.assertNotIn("ratio_revenue", row)
+
+    def test_incremental_refresh_drops_deleted_months(self):
+        self.Report._refresh_summary(full=True)
+        # ردیف ماهی که استعلام‌هایش حذف شده‌اند
+        self._insert_summary("2001-01-01", 1000.0, 900.0, 10.0, 1.0)
+
+        self.Report._refresh_summary()
+
+        self.env.cr.execute(
+            f"SELECT count(*) FROM {SUMMARY_TABLE} WHERE month = '2001-01-01'"
+        )
+        self.assertEqual(self.env.cr.fetchone()[0], 0)
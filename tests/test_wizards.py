@@ -0,0 +1,158 @@
+# cm_carton_pricing/tests/test_wizards.py
+"""تست‌های ورود از اکسل و خروجی قیمت و چیدمان."""
+import base64
+import csv
+import io
+
+from odoo.tests import TransactionCase, tagged
+
+from ..wizard.carton_export_wizard import EXPORT_COLUMNS, SELECTION_COLUMNS
+
+DIMENSIONS = {"length": 40, "width": 30, "height": 25}
+
+
+@tagged("post_install", "-at_install")
+class TestImportWizard(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.partner = cls.env["res.partner"].create(
+            {"name": "Import customer", "ref": "IMP-1"}
+        )
+        cls.wizard = cls.env["cm.carton.import.wizard"].create(
+            {
+                "file": base64.b64encode(b"unused"),
+                "partner_id": cls.partner.id,
+            }
+        )
+
+    def _import(self, rows):
+        errors = []
+        inquiry_ids = self.wizard._import_chunk(
+            list(enumerate(rows, start=2)),
+            {},
+            self.wizard._get_selections(),
+            errors,
+        )
+        return self.env["cm.carton.price_inquiry"].browse(inquiry_ids), dict(errors)
+
+    def test_rows_are_validated_like_compute(self):
+        Inquiry = self.env["cm.carton.price_inquiry"]
+        inquiries, errors = self._import(
+            [
+                dict(DIMENSIONS, name="Valid", quantity=3000),
+                dict(DIMENSIONS, name="No quantity", quantity=0),
+                dict(DIMENSIONS, name="No height", height=None, quantity=1000),
+                {"name": "Bad type", "carton_type": "box", "quantity": 1000},
+            ]
+        )
+
+        self.assertEqual(inquiries.customer_product_id.mapped("name"), ["Valid"])
+        self.assertEqual(inquiries.quantity, 3000)
+        self.assertEqual(sorted(errors), [3, 4, 5])
+        self.assertEqual(
+            errors[3], Inquiry._get_basic_input_error(0, "normal", 40, 30, 25)
+        )
+        self.assertEqual(
+            errors[4], Inquiry._get_basic_input_error(1000, "normal", 40, 30, 0.0)
+        )
+
+    def test_persian_digits_and_labels(self):
+        inquiries, errors = self._import(
+            [
+                {
+                    "partner": "IMP-1",
+                    "name": "Persian row",
+                    "carton_type": "ورق",
+                    "length": "۱۲۰",
+                    "width": "۸۰٫۵",
+                    "height": "۱",
+                    "quantity": "۲,۵۰۰",
+                }
+            ]
+        )
+        self.assertFalse(errors)
+        product = inquiries.customer_product_id
+        self.assertEqual(product.carton_type, "sheet")
+        self.assertAlmostEqual(product.width, 80.5)
+        self.assertEqual(inquiries.quantity, 2500)
+
+
+@tagged("post_install", "-at_install")
+class TestExportWizard(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        partner = cls.env["res.partner"].create({"name": "Export customer"})
+        product = cls.env["cm.carton.customer_product"].create(
+            {
+                "partner_id": partner.id,
+                "name": "Export carton",
+                "code": "EXP-1",
+                "carton_type": "normal",
+                "length": 40.0,
+                "width": 30.0,
+                "height": 25.0,
+            }
+        )
+        cls.inquiries = cls.env["cm.carton.price_inquiry"].create(
+            [
+                {
+                    "partner_id": partner.id,
+                    "customer_product_id": product.id,
+                    "flow_mode": "quick",
+                    "quantity": quantity,
+                    "paper_price_per_m2": 30000.0,
+                }
+                for quantity in (3000, 1000)
+            ]
+        )
+        cls.inquiries.action_compute()
+        cls.wizard = cls.env["cm.carton.export.wizard"].create(
+            {"inquiry_ids": [(6, 0, cls.inquiries.ids)], "file_format": "csv"}
+        )
+
+    def _column(self, row, key):
+        return row[[k for k, __ in EXPORT_COLUMNS].index(key)]
+
+    def test_rows_follow_column_order(self):
+        rows = list(self.wizard._iter_export_rows())
+
+        self.assertEqual([row[0] for row in rows], sorted(self.inquiries.ids))
+        for row in rows:
+            self.assertEqual(len(row), len(EXPORT_COLUMNS))
+            inquiry = self.inquiries.browse(row[0])
+            self.assertEqual(self._column(row, "product_code"), "EXP-1")
+            self.assertEqual(self._column(row, "quantity"), inquiry.quantity)
+            # ستون‌های پولی از SQL به صورت Decimal می‌آیند
+            self.assertAlmostEqual(
+                float(self._column(row, "sale_price_cash")), inquiry.sale_price_cash
+            )
+            self.assertAlmostEqual(
+                float(self._column(row, "industrial_width_cm")),
+                inquiry.industrial_width_mm,
+            )
+
+    def test_selection_columns_use_labels(self):
+        [row, __] = self.wizard._iter_export_rows()
+        for key, (model, field) in SELECTION_COLUMNS.items():
+            labels = dict(
+                self.env[model]._fields[field]._description_selection(self.env)
+            )
+            self.assertIn(self._column(row, key), labels.values(), key)
+        self.assertEqual(
+            self._column(row, "state"),
+            dict(self.inquiries._fields["state"]._description_selection(self.env))[
+                "calculated"
+            ],
+        )
+
+    def test_csv_header(self):
+        buffer = io.BytesIO()
+        self.wizard._write_export(buffer)
+        lines = list(csv.reader(io.StringIO(buffer.getvalue().decode("utf-8-sig"))))
+
+        self.assertEqual(lines[0], [title for __, title in EXPORT_COLUMNS])
+        self.assertEqual(len(lines), len(self.inquiries) + 1)
@@ -0,0 +1,3 @@
+# cm_carton_pricing/wizard/__init__.py
+from . import carton_import_wizard
+from . import carton_export_wizard
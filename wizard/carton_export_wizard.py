@@ -0,0 +1,232 @@
+import csv
+import io
+
+from odoo import Command, api, fields, models, _
+from odoo.exceptions import UserError
+
+from ..engine import pricing as pricing_engine
+
+try:
+    import xlsxwriter
+except ImportError:  # pragma: no cover - xlsxwriter اختیاری است
+    xlsxwriter = None
+
+# تعداد استعلام در هر خواندن از دیتابیس
+EXPORT_CHUNK_SIZE = 1000
+
+# (کلید، عنوان ستون)؛ ترتیب همان ترتیب SELECT در ``_fetch_chunk`` است
+EXPORT_COLUMNS = [
+    ("id", "شماره استعلام"),
+    ("partner", "مشتری"),
+    ("product", "محصول"),
+    ("product_code", "کد محصول"),
+    ("carton_type", "نوع کارتن"),
+    ("quantity", "تیراژ"),
+    ("payment_type", "نوع پرداخت"),
+    ("state", "وضعیت"),
+    ("flat_length_mm", "طول خوابیده (mm)"),
+    ("flat_width_mm", "عرض خوابیده (mm)"),
+    ("corrugator", "کروگیتور"),
+    ("industrial_width_cm", "عرض صنعتی (cm)"),
+    ("orientation", "جهت چیدمان"),
+    ("carton_per_row", "تعداد در ردیف"),
+    ("rotated_per_row", "تعداد چرخیده در ردیف"),
+    ("waste_percent", "درصد ضایعات عرضی"),
+    ("total_length_cm", "طول صنعتی کل (cm)"),
+    ("board_area_m2", "مصرف ورق (m²)"),
+    ("material_cost_total", "مایه‌کاری مواد (با سهم قالب)"),
+    ("overhead_cost_total", "سربار"),
+    ("die_cost", "هزینه قالب"),
+    ("cliche_cost", "هزینه کلیشه"),
+    ("design_cost", "هزینه طراحی"),
+    ("punch_cost_total", "هزینه پانچ"),
+    ("pallet_wrap_cost_total", "هزینه پالت‌کشی"),
+    ("shipping_cost", "هزینه حمل"),
+    ("base_cost_per_carton", "مایه‌کاری هر کارتن"),
+    ("sale_price_cash", "قیمت نقد"),
+    ("sale_price_credit", "قیمت مدت‌دار"),
+    ("unit_price_with_tax", "قیمت واحد با مالیات"),
+    ("total_price_with_tax", "مبلغ کل با مالیات"),
+]
+
+# ستون‌های انتخابی که برچسبشان به جای کلید نوشته می‌شود
+SELECTION_COLUMNS = {
+    "carton_type": ("cm.carton.price_inquiry", "carton_type"),
+    "payment_type": ("cm.carton.price_inquiry", "payment_type"),
+    "state": ("cm.carton.price_inquiry", "state"),
+    "orientation": ("cm.carton.sheet_suggestion", "orientation"),
+}
+
+
+class CartonExportWizard(models.TransientModel):
+    """
+    خروجی XLSX/CSV قیمت‌ها و چیدمان استعلام‌های انتخاب‌شده.
+
+    برخلاف خروجی عمومی، رکوردها به ORM بارگذاری نمی‌شوند: استعلام‌ها در
+    دسته‌های ``EXPORT_CHUNK_SIZE`` تایی با یک کوئری (همراه پیشنهاد منتخب)
+    خوانده و مستقیم در فایل موقت نوشته می‌شوند؛ کنترلر همان فایل را
+    جریانی برمی‌گرداند.
+    """
+
+    _name = "cm.carton.export.wizard"
+    _description = "خروجی قیمت و چیدمان استعلام‌ها"
+
+    file_format = fields.Selection(
+        [
+            ("xlsx", "اکسل (XLSX)"),
+            ("csv", "CSV"),
+        ],
+        string="قالب فایل",
+        default="xlsx",
+        required=True,
+    )
+
+    inquiry_ids = fields.Many2many(
+        "cm.carton.price_inquiry",
+        string="استعلام‌ها",
+        default=lambda self: self._default_inquiry_ids(),
+    )
+
+    @api.model
+    def _default_inquiry_ids(self):
+        # در فرم نیست تا کلاینت نام هزاران استعلام را بارگذاری نکند؛
+        # پیش‌فرض هنگام create از active_ids همان context گرفته می‌شود
+        if self.env.context.get("active_model") != "cm.carton.price_inquiry":
+            return False
+        return [Command.set(self.env.context.get("active_ids") or [])]
+
+    def action_export(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/cm_carton_pricing/export/%s" % self.id,
+            "target": "self",
+        }
+
+    # =====================================================
+    #   خواندن دسته‌ای
+    # =====================================================
+    def _fetch_chunk(self, inquiry_ids):
+        """
+        ردیف‌های خروجی یک دسته با یک کوئری.
+        پیشنهاد منتخب همان ترکیب کروگیتور/عرض ثبت‌شده روی استعلام است و
+        اگر نباشد، ارزان‌ترین پیشنهاد.
+        """
+        self.env.cr.execute(
+            """
+            SELECT
+                i.id,
+                p.complete_name,
+                cp.name,
+                cp.code,
+                i.carton_type,
+                i.quantity,
+                i.payment_type,
+                i.state,
+                i.flat_length_mm,
+                i.flat_width_mm,
+                c.name,
+                s.industrial_width_cm,
+                s.orientation,
+                s.carton_per_row,
+                s.rotated_per_row,
+                s.waste_percent,
+                s.total_length_cm,
+                s.board_area_m2,
+                i.material_cost_total,
+                i.overhead_cost_total,
+                CASE WHEN i.carton_type IN %s THEN 0 ELSE i.die_cost END,
+                i.cliche_cost,
+                i.design_cost,
+                i.punch_cost_total,
+                i.pallet_wrap_cost_total,
+                i.shipping_cost,
+                i.base_cost_per_carton,
+                i.sale_price_cash,
+                i.sale_price_credit,
+                i.unit_price_with_tax,
+                i.total_price_with_tax
+            FROM cm_carton_price_inquiry i
+            JOIN res_partner p ON p.id = i.partner_id
+            LEFT JOIN cm_carton_customer_product cp ON cp.id = i.customer_product_id
+            LEFT JOIN LATERAL (
+                SELECT *
+                  FROM cm_carton_sheet_suggestion s
+                 WHERE s.price_inquiry_id = i.id
+                 ORDER BY (
+                        s.industrial_width_cm = i.industrial_width_mm
+                        AND s.corrugator_id IS NOT DISTINCT FROM i.corrugator_id
+                      ) DESC,
+                      s.estimated_cost,
+                      s.waste_percent
+                 LIMIT 1
+            ) s ON TRUE
+            LEFT JOIN cm_carton_corrugator c ON c.id = s.corrugator_id
+            WHERE i.id = ANY(%s)
+            ORDER BY i.id
+            """,
+            [pricing_engine.DIE_PRICED_TYPES, list(inquiry_ids)],
+        )
+        return self.env.cr.fetchall()
+
+    def _iter_export_rows(self):
+        """ردیف‌های خروجی به ترتیب شماره استعلام، با رعایت قوانین دسترسی."""
+        self.ensure_one()
+        labels = {
+            column: dict(
+                self.env[model]._fields[field]._description_selection(self.env)
+            )
+            for column, (model, field) in SELECTION_COLUMNS.items()
+        }
+        positions = {
+            index: labels[key]
+            for index, (key, __) in enumerate(EXPORT_COLUMNS)
+            if key in labels
+        }
+
+        self.env.flush_all()
+        # خواندن many2many قوانین دسترسی رکورد استعلام را اعمال می‌کند
+        ids = sorted(self.inquiry_ids.ids)
+        for start in range(0, len(ids), EXPORT_CHUNK_SIZE):
+            for row in self._fetch_chunk(ids[start:start + EXPORT_CHUNK_SIZE]):
+                row = list(row)
+                for index, selection in positions.items():
+                    row[index] = selection.get(row[index], row[index] or "")
+                yield row
+
+    # =====================================================
+    #   نوشتن فایل
+    # =====================================================
+    def _export_filename(self):
+        return "carton_quotes.%s" % self.file_format
+
+    def _write_export(self, fileobj):
+        """نوشتن کل خروجی در ``fileobj`` (فایل باینری)، ردیف به ردیف."""
+        self.ensure_one()
+        if self.file_format == "csv":
+            self._write_csv(fileobj)
+        else:
+            self._write_xlsx(fileobj)
+
+    def _write_csv(self, fileobj):
+        # BOM برای نمایش درست حروف فارسی در اکسل
+        stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        writer = csv.writer(stream)
+        writer.writerow([title for __, title in EXPORT_COLUMNS])
+        for row in self._iter_export_rows():
+            writer.writerow(["" if value is None else value for value in row])
+        stream.flush()
+        stream.detach()
+
+    def _write_xlsx(self, fileobj):
+        if xlsxwriter is None:
+            raise UserError(_("برای خروجی اکسل، کتابخانه xlsxwriter باید نصب باشد."))
+        # constant_memory: هر ردیف بعد از نوشتن از حافظه خارج می‌شود
+        workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True})
+        sheet = workbook.add_worksheet(_("استعلام‌ها"))
+        sheet.right_to_left()
+        bold = workbook.add_format({"bold": True})
+        sheet.write_row(0, 0, [title for __, title in EXPORT_COLUMNS], bold)
+        for row_index, row in enumerate(self._iter_export_rows(), start=1):
+            sheet.write_row(row_index, 0, row)
+        workbook.close()
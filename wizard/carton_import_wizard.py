@@ -0,0 +1,374 @@
+import base64
+import io
+import zipfile
+
+from odoo import Command, api, fields, models, _
+from odoo.exceptions import UserError
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - openpyxl اختیاری است
+    openpyxl = None
+
+# عنوان‌های قابل قبول هر ستون (بدون حساسیت به حروف بزرگ/کوچک)
+COLUMN_ALIASES = {
+    "partner": ("مشتری", "کد مشتری", "partner", "customer"),
+    "name": ("نام محصول", "نام داخلی محصول", "محصول", "product", "name"),
+    "code": ("کد محصول", "code"),
+    "carton_type": ("نوع محصول", "نوع کارتن", "carton_type", "type"),
+    "length": ("طول", "طول کارتن (cm)", "length"),
+    "width": ("عرض", "عرض کارتن (cm)", "width"),
+    "height": ("ارتفاع", "ارتفاع کارتن (cm)", "height"),
+    "layer_count": ("تعداد لایه", "لایه", "layer_count", "layers"),
+    "flute_step": ("گام فلوت", "فلوت", "flute_step", "flute"),
+    "quantity": ("تیراژ", "تعداد", "quantity", "qty"),
+}
+
+REQUIRED_COLUMNS = ("name", "quantity")
+
+# ارقام فارسی/عربی و ممیز فارسی در سلول‌های متنی
+DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩٫", "01234567890123456789.")
+
+# حداکثر خطوط خطا که در فرم نمایش داده می‌شود
+MAX_ERROR_LINES = 200
+
+
+class CartonImportWizard(models.TransientModel):
+    """
+    ورود دسته‌ای محصول اختصاصی و استعلام قیمت از فایل اکسل.
+
+    فایل با openpyxl در حالت read_only ردیف به ردیف خوانده می‌شود (حافظه ثابت،
+    مستقل از تعداد ردیف)، هر ردیف با همان قواعد ``_check_basic_inputs`` بررسی
+    و ردیف‌های سالم در دسته‌های ``chunk_size`` تایی با یک create ساخته می‌شوند.
+    """
+
+    _name = "cm.carton.import.wizard"
+    _description = "ورود محصول و استعلام از اکسل"
+
+    file = fields.Binary(
+        string="فایل اکسل",
+        required=True,
+        attachment=False,
+    )
+
+    filename = fields.Char(string="نام فایل")
+
+    partner_id = fields.Many2one(
+        "res.partner",
+        string="مشتری پیش‌فرض",
+        help="برای ردیف‌هایی که ستون مشتری ندارند یا خالی است.",
+    )
+
+    flow_mode = fields.Selection(
+        lambda self: self.env["cm.carton.price_inquiry"].FLOW_MODE_SELECTION,
+        string="نوع فرآیند استعلام",
+        default="quick",
+        required=True,
+    )
+
+    compute_prices = fields.Boolean(
+        string="محاسبه قیمت بعد از ورود",
+        help="استعلام‌های ساخته‌شده با محاسبه دسته‌ای (برداری) قیمت‌گذاری می‌شوند.",
+    )
+
+    chunk_size = fields.Integer(
+        string="اندازه هر دسته",
+        default=500,
+    )
+
+    # ----------------- نتیجه -----------------
+    state = fields.Selection(
+        [
+            ("upload", "بارگذاری"),
+            ("done", "انجام شد"),
+        ],
+        default="upload",
+    )
+
+    imported_count = fields.Integer(string="تعداد استعلام ساخته‌شده", readonly=True)
+    error_count = fields.Integer(string="تعداد ردیف خطادار", readonly=True)
+    error_log = fields.Text(string="خطاها", readonly=True)
+
+    inquiry_ids = fields.Many2many(
+        "cm.carton.price_inquiry",
+        string="استعلام‌های ساخته‌شده",
+        readonly=True,
+    )
+
+    # =====================================================
+    #   خواندن فایل
+    # =====================================================
+    @api.model
+    def _map_columns(self, header):
+        """اندیس هر فیلد در ردیف عنوان؛ ستون‌های ناشناخته نادیده گرفته می‌شوند."""
+        aliases = {
+            alias.lower(): field
+            for field, names in COLUMN_ALIASES.items()
+            for alias in names
+        }
+        columns = {}
+        for index, title in enumerate(header or ()):
+            field = aliases.get(str(title or "").strip().lower())
+            if field and field not in columns:
+                columns[field] = index
+        return columns
+
+    @api.model
+    def _cell_text(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip().translate(DIGITS)
+
+    @api.model
+    def _cell_number(self, value):
+        if isinstance(value, (int, float)):
+            return float(value)
+        text = self._cell_text(value).replace(",", "")
+        return float(text) if text else 0.0
+
+    def _iter_rows(self):
+        """
+        (شماره ردیف، dict مقادیر) برای هر ردیف غیرخالی برگه اول.
+        فقط بایت‌های فشرده فایل در حافظه‌اند؛ XML برگه جریانی خوانده می‌شود.
+        """
+        if openpyxl is None:
+            raise UserError(_("برای ورود از اکسل، کتابخانه openpyxl باید نصب باشد."))
+        try:
+            workbook = openpyxl.load_workbook(
+                io.BytesIO(base64.b64decode(self.file)),
+                read_only=True,
+                data_only=True,
+            )
+        except (zipfile.BadZipFile, KeyError, ValueError, OSError):
+            raise UserError(_("فایل انتخاب‌شده یک فایل اکسل (xlsx) معتبر نیست.")) from None
+
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            columns = self._map_columns(next(rows, None))
+            missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+            if "partner" not in columns and not self.partner_id:
+                missing.append("partner")
+            if missing:
+                raise UserError(
+                    _(
+                        "ستون‌های لازم در ردیف اول فایل پیدا نشد: %s",
+                        ", ".join(COLUMN_ALIASES[c][0] for c in missing),
+                    )
+                )
+
+            for row_number, row in enumerate(rows, start=2):
+                if not row or not any(cell not in (None, "") for cell in row):
+                    continue
+                yield row_number, {
+                    field: row[index] if index < len(row) else None
+                    for field, index in columns.items()
+                }
+        finally:
+            workbook.close()
+
+    # =====================================================
+    #   اعتبارسنجی و ساخت دسته‌ای
+    # =====================================================
+    def _resolve_partners(self, names, partners):
+        """مشتری‌های یک دسته با یک search (اول کد مرجع، بعد نام دقیق)."""
+        names = {name for name in names if name and name not in partners}
+        if not names:
+            return
+        found = self.env["res.partner"].search_fetch(
+            ["|", ("ref", "in", list(names)), ("name", "in", list(names))],
+            ["ref", "name"],
+        )
+        for partner in found.filtered(lambda p: p.ref in names):
+            partners.setdefault(partner.ref, partner.id)
+        for partner in found.filtered(lambda p: p.name in names):
+            partners.setdefault(partner.name, partner.id)
+
+    def _parse_row(self, raw, partners, selections):
+        """
+        مقادیر معتبر یک ردیف، یا پیام خطا.
+        خروجی: (vals, None) یا (None, پیام)
+        """
+        partner_key = self._cell_text(raw.get("partner"))
+        partner_id = partners.get(partner_key) if partner_key else self.partner_id.id
+        if not partner_id:
+            if not partner_key:
+                return None, _("مشتری ردیف مشخص نشده است.")
+            return None, _("مشتری «%s» پیدا نشد.", partner_key)
+
+        name = self._cell_text(raw.get("name"))
+        if not name:
+            return None, _("نام محصول خالی است.")
+
+        vals = {"partner_id": partner_id, "name": name}
+        for field in ("carton_type", "layer_count", "flute_step"):
+            text = self._cell_text(raw.get(field))
+            if not text:
+                continue
+            value = selections[field].get(text.lower())
+            if not value:
+                return None, _(
+                    "مقدار «%(value)s» برای %(field)s معتبر نیست.",
+                    value=text,
+                    field=COLUMN_ALIASES[field][0],
+                )
+            vals[field] = value
+        vals.setdefault("carton_type", "normal")
+
+        try:
+            for field in ("length", "width", "height"):
+                vals[field] = self._cell_number(raw.get(field))
+            quantity = int(self._cell_number(raw.get("quantity")))
+        except ValueError:
+            return None, _("ابعاد و تیراژ باید عدد باشند.")
+
+        error = self.env["cm.carton.price_inquiry"]._get_basic_input_error(
+            quantity, vals["carton_type"], vals["length"], vals["width"], vals["height"]
+        )
+        if error:
+            return None, error
+
+        vals["code"] = self._cell_text(raw.get("code")) or False
+        vals["default_quantity"] = quantity
+        return vals, None
+
+    def _import_chunk(self, chunk, partners, selections, errors):
+        """
+        ساخت محصولات و استعلام‌های یک دسته، هرکدام با یک create.
+        محصولی با همان مشتری و کد، دوباره ساخته نمی‌شود.
+        """
+        Product = self.env["cm.carton.customer_product"]
+        self._resolve_partners(
+            (self._cell_text(raw.get("partner")) for __, raw in chunk), partners
+        )
+
+        rows = []
+        for row_number, raw in chunk:
+            vals, error = self._parse_row(raw, partners, selections)
+            if error:
+                errors.append((row_number, error))
+            else:
+                rows.append(vals)
+        if not rows:
+            return []
+
+        keys = {(vals["partner_id"], vals["code"]) for vals in rows if vals["code"]}
+        products = {}
+        if keys:
+            existing = Product.search_fetch(
+                [
+                    ("partner_id", "in", list({key[0] for key in keys})),
+                    ("code", "in", list({key[1] for key in keys})),
+                ],
+                ["partner_id", "code"],
+            )
+            for product in existing:
+                products.setdefault((product.partner_id.id, product.code), product.id)
+
+        new_vals, new_keys = [], []
+        for vals in rows:
+            key = (vals["partner_id"], vals["code"]) if vals["code"] else None
+            if key and key in products:
+                continue
+            if key:
+                # ردیف‌های بعدی همین دسته با همین کد، به این محصول وصل می‌شوند
+                products[key] = None
+            new_vals.append(dict(vals))
+            new_keys.append(key)
+        created = Product.create(new_vals)
+        for key, product in zip(new_keys, created):
+            if key:
+                products[key] = product.id
+        # محصول ردیف‌های بدون کد به همان ترتیب create ساخته شده است
+        unkeyed = iter(
+            product.id for key, product in zip(new_keys, created) if not key
+        )
+
+        inquiries = self.env["cm.carton.price_inquiry"].create(
+            [
+                {
+                    "partner_id": vals["partner_id"],
+                    "customer_product_id": (
+                        products[vals["partner_id"], vals["code"]]
+                        if vals["code"]
+                        else next(unkeyed)
+                    ),
+                    "quantity": vals["default_quantity"],
+                    "flow_mode": self.flow_mode,
+                }
+                for vals in rows
+            ]
+        )
+        if self.compute_prices:
+            inquiries.action_compute_batch()
+        return inquiries.ids
+
+    def _get_selections(self):
+        """مقادیر مجاز فیلدهای انتخابی: هم کلید و هم برچسب (کوچک‌شده)."""
+        Product = self.env["cm.carton.customer_product"]
+        selections = {}
+        for field in ("carton_type", "layer_count", "flute_step"):
+            options = Product._fields[field]._description_selection(self.env)
+            selections[field] = {
+                text.lower(): key
+                for key, label in options
+                for text in (key, label)
+            }
+        return selections
+
+    def action_import(self):
+        self.ensure_one()
+        # بدون پیام‌های ردیابی/دنبال‌کننده برای هزاران رکورد
+        wizard = self.with_context(
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+        )
+        chunk_size = max(self.chunk_size or 0, 1)
+        partners, selections = {}, wizard._get_selections()
+        errors, inquiry_ids, chunk = [], [], []
+
+        for row in wizard._iter_rows():
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inquiry_ids += wizard._import_chunk(chunk, partners, selections, errors)
+                chunk = []
+                # حافظه‌ی کش ORM با تعداد ردیف‌ها رشد نکند
+                self.env.flush_all()
+                self.env.invalidate_all()
+        if chunk:
+            inquiry_ids += wizard._import_chunk(chunk, partners, selections, errors)
+
+        log = [
+            _("ردیف %(row)s: %(error)s", row=row, error=error)
+            for row, error in errors[:MAX_ERROR_LINES]
+        ]
+        if len(errors) > MAX_ERROR_LINES:
+            log.append(_("... و %s خطای دیگر", len(errors) - MAX_ERROR_LINES))
+        self.write(
+            {
+                "state": "done",
+                "imported_count": len(inquiry_ids),
+                "error_count": len(errors),
+                "error_log": "\n".join(log) or False,
+                "inquiry_ids": [Command.set(inquiry_ids)],
+            }
+        )
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def action_open_inquiries(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("استعلام‌های واردشده"),
+            "res_model": "cm.carton.price_inquiry",
+            "view_mode": "list,form",
+            "domain": [("id", "in", self.inquiry_ids.ids)],
+        }